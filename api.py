@@ -0,0 +1,580 @@
+import os
+from decimal import Decimal
+from flask import Blueprint, Response, abort, current_app, request, jsonify, session
+from sqlalchemy import select, update
+from middleware import log_activity
+from events import live_events
+from extensions import db, cache
+from models import Goal, Transaction, SavingsRule
+from ledger import add_tx, apply_saving_to_goal, decimalize
+from pagination import page_args, keyset_page, keyset_order, paginated_response, ndjson_response, wants_ndjson
+from stats import user_summary
+from dashboard import dashboard, goal_dict, goal_overview
+from timeseries import goal_timeseries, series_args
+from forecast import user_forecast
+from simulator import simulate_rules
+from versioning import bump_versions, conditional, goal_version, resource_version, user_version
+from ingest import ingest_contributions, ingest_expenses, parse_records
+from triggers import trigger_index
+from recurring import run_recurring_rules
+from uploads import MULTIPART_OVERHEAD, UploadTooLarge, save_upload, thumbnail_name, thumbnail_url, upload_url
+
+bp = Blueprint('api', __name__)
+
+ALLOWED_IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.webp'}
+
+
+@bp.route('/api/goals', methods=['GET'])
+@log_activity
+@conditional(user_version)
+def get_goals():
+    if 'user_id' not in session:
+        return jsonify({"error": "Not authenticated"}), 401
+    
+    def build():
+        goals = Goal.query.filter_by(user_id=session['user_id'], is_active=True).all()
+        return [{
+            'id': g.id,
+            'name': g.name,
+            'target_amount': float(g.target_amount) if g.target_amount else None,
+            'current_amount': float(g.current_amount) if g.current_amount else 0.0,
+            'progress': float(g.current_amount / g.target_amount * 100) if g.target_amount else 0.0,
+            'description': g.description,
+            'image_url': g.image_url,
+            'thumbnail_url': thumbnail_url(g.image_url),
+            'savings_pace': g.savings_pace
+        } for g in goals]
+
+    return cache.cached_json(session['user_id'], f'goals:{resource_version()}', build)
+
+@bp.route('/api/goals/<int:goal_id>', methods=['GET'])
+@log_activity
+@conditional(goal_version)
+def get_goal(goal_id):
+    if 'user_id' not in session:
+        return jsonify({"error": "Not authenticated"}), 401
+
+    def build():
+        return goal_dict(Goal.query.filter_by(id=goal_id, user_id=session['user_id']).first_or_404())
+
+    return cache.cached_json(session['user_id'], f'goal:{goal_id}:{resource_version()}', build)
+
+@bp.route('/api/dashboard', methods=['GET'])
+@log_activity
+@conditional(user_version)
+def get_dashboard():
+    if 'user_id' not in session:
+        return jsonify({"error": "Not authenticated"}), 401
+
+    return cache.cached_json(session['user_id'], f'dashboard:{resource_version()}',
+                             lambda: dashboard(session['user_id']))
+
+@bp.route('/api/goals/<int:goal_id>/overview', methods=['GET'])
+@log_activity
+@conditional(goal_version)
+def get_goal_overview(goal_id):
+    if 'user_id' not in session:
+        return jsonify({"error": "Not authenticated"}), 401
+
+    def build():
+        overview = goal_overview(session['user_id'], goal_id)
+        if overview is None:
+            abort(404)
+        return overview
+
+    return cache.cached_json(session['user_id'], f'goal-overview:{goal_id}:{resource_version()}', build)
+
+@bp.route('/api/transactions', methods=['GET'])
+@log_activity
+@conditional(user_version)
+def get_transactions():
+    if 'user_id' not in session:
+        return jsonify({"error": "Not authenticated"}), 401
+
+    try:
+        limit, after, before = page_args(default_limit=50)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    stmt = select(Transaction).where(Transaction.user_id == session['user_id'])
+    if wants_ndjson():
+        return ndjson_response(stmt, after, before, descending=True)
+
+    transactions, next_cursor, prev_cursor = keyset_page(stmt, limit, after, before, descending=True)
+    return paginated_response([t.to_dict() for t in transactions], limit, next_cursor, prev_cursor)
+
+
+@bp.route('/api/events', methods=['GET'])
+@log_activity
+def event_stream():
+    """Server-Sent Events with the user's balance and transaction changes, from any worker or device."""
+    if 'user_id' not in session:
+        return jsonify({"error": "Not authenticated"}), 401
+
+    stream = live_events.open(session['user_id'], session.get('session_token'))
+    if stream is None:
+        response = jsonify({"error": "Too many open event streams"})
+        response.headers['Retry-After'] = '30'
+        return response, 503
+
+    # No stream_with_context: the request's app context (and DB session) ends before streaming
+    response = Response(live_events.generate(stream), mimetype='text/event-stream')
+    response.call_on_close(lambda: live_events.close(stream))
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # don't let nginx buffer the stream
+    return response
+
+
+@bp.route('/api/stats', methods=['GET'])
+@log_activity
+@conditional(user_version)
+def get_stats():
+    if 'user_id' not in session:
+        return jsonify({"error": "Not authenticated"}), 401
+
+    goal_id = request.args.get('goal_id', type=int)
+    if goal_id is not None:
+        Goal.query.filter_by(id=goal_id, user_id=session['user_id']).first_or_404()
+    return jsonify(user_summary(session['user_id'], goal_id))
+
+
+@bp.route('/api/upload-goal-image', methods=['POST'])
+def upload_goal_image():
+    if 'user_id' not in session:
+        return jsonify({"error": "Not authenticated"}), 401
+
+    max_bytes = current_app.config['UPLOAD_MAX_BYTES']
+    # Larger bodies are rejected by Werkzeug with a 413 while parsing
+    request.max_content_length = max_bytes + MULTIPART_OVERHEAD
+    file = request.files.get('file')
+    if not file or file.filename == '':
+        return jsonify({"error": "No file uploaded"}), 400
+
+    _, ext = os.path.splitext(file.filename)
+    if ext.lower() not in ALLOWED_IMAGE_EXTENSIONS:
+        return jsonify({"error": "Unsupported file type"}), 400
+
+    try:
+        name, sizes = save_upload(file.stream, current_app.config['UPLOAD_FOLDER'], max_bytes,
+                                  current_app.config['UPLOAD_CHUNK_SIZE'],
+                                  current_app.config['UPLOAD_THUMBNAIL_SIZES'])
+    except UploadTooLarge as e:
+        return jsonify({"error": str(e)}), 413
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify({
+        "url": upload_url(name),
+        "thumbnails": {str(size): upload_url(thumbnail_name(name, size)) for size in sizes}
+    }), 201
+
+@bp.route('/api/goals/<int:goal_id>/transactions', methods=['GET'])
+@log_activity
+@conditional(goal_version)
+def get_goal_transactions(goal_id):
+    if 'user_id' not in session:
+        return jsonify({"error": "Not authenticated"}), 401
+
+    goal = Goal.query.filter_by(id=goal_id, user_id=session['user_id']).first_or_404()
+    try:
+        limit, after, before = page_args()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    stmt = select(Transaction).where(Transaction.user_id == session['user_id'], Transaction.goal_id == goal.id)
+    if wants_ndjson():
+        return ndjson_response(stmt, after, before)
+
+    if limit is None and after is None and before is None:
+        # Unpaginated: full history, kept for existing clients
+        transactions = db.session.scalars(keyset_order(stmt)).all()
+        return jsonify([t.to_dict() for t in transactions])
+
+    limit = limit or current_app.config['PAGINATION_MAX_LIMIT']
+    transactions, next_cursor, prev_cursor = keyset_page(stmt, limit, after, before)
+    return paginated_response([t.to_dict() for t in transactions], limit, next_cursor, prev_cursor)
+
+@bp.route('/api/goals/<int:goal_id>/timeseries', methods=['GET'])
+@log_activity
+def get_goal_timeseries(goal_id):
+    if 'user_id' not in session:
+        return jsonify({"error": "Not authenticated"}), 401
+
+    goal = Goal.query.filter_by(id=goal_id, user_id=session['user_id']).first_or_404()
+    try:
+        since, until, bucket, points = series_args()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify(goal_timeseries(session['user_id'], goal.id, since, until, bucket, points))
+
+@bp.route('/api/goals/forecast', methods=['GET'])
+@log_activity
+def get_goal_forecast():
+    if 'user_id' not in session:
+        return jsonify({"error": "Not authenticated"}), 401
+
+    return jsonify(user_forecast(session['user_id']))
+
+@bp.route('/api/savings-rules', methods=['GET'])
+@log_activity
+@conditional(user_version)
+def get_savings_rules():
+    if 'user_id' not in session:
+        return jsonify({"error": "Not authenticated"}), 401
+    
+    def build():
+        rules = SavingsRule.query.filter_by(user_id=session['user_id'], is_active=True).all()
+        return [r.to_dict() for r in rules]
+
+    return cache.cached_json(session['user_id'], f'savings-rules:{resource_version()}', build)
+
+@bp.route('/api/goals/create', methods=['POST'])
+@log_activity
+def create_goal():
+    if 'user_id' not in session:
+        return jsonify({"error": "Not authenticated"}), 401
+    
+    data = request.get_json()
+    
+    goal = Goal(
+        user_id=session['user_id'],
+        name=data['name'],
+        target_amount=decimalize(data['target_amount']),
+        current_amount=Decimal('0.00'),
+        savings_pace=data.get('savings_pace', 'Moderate'),
+        description=data.get('description'),
+        image_url=data.get('image_url'),
+        is_active=True
+    )
+    
+    db.session.add(goal)
+    bump_versions(session['user_id'])
+    db.session.commit()
+    cache.invalidate(session['user_id'])
+    
+    return jsonify({"message": "Goal created successfully", "goal_id": goal.id}), 201
+
+
+@bp.route('/api/goals/<int:goal_id>/update', methods=['PUT', 'PATCH'])
+def update_goal_api(goal_id):
+    if 'user_id' not in session:
+        return jsonify({"error": "Not authenticated"}), 401
+
+    goal = Goal.query.filter_by(id=goal_id, user_id=session['user_id'], is_active=True).first()
+    if not goal:
+        return jsonify({"error": "Goal not found"}), 404
+
+    data = request.get_json() or {}
+
+    name = data.get('name')
+    target_amount = data.get('target_amount')
+    description = data.get('description')
+    savings_pace = data.get('savings_pace')
+    image_url = data.get('image_url')
+
+    if name is not None:
+        goal.name = name
+    if target_amount is not None:
+        try:
+            goal.target_amount = decimalize(target_amount)
+        except Exception:
+            return jsonify({"error": "Invalid target_amount"}), 400
+    if description is not None:
+        goal.description = description
+    if savings_pace is not None:
+        goal.savings_pace = savings_pace
+    if image_url is not None:
+        goal.image_url = image_url
+
+    bump_versions(session['user_id'], goal.id)
+    db.session.commit()
+    cache.invalidate(session['user_id'])
+
+    return jsonify({
+        "message": "Goal updated successfully",
+        "goal": {
+            "id": goal.id,
+            "name": goal.name,
+            "target_amount": float(goal.target_amount) if goal.target_amount else None,
+            "current_amount": float(goal.current_amount) if goal.current_amount else 0.0,
+            "description": goal.description,
+            "image_url": goal.image_url,
+            "savings_pace": goal.savings_pace,
+        }
+    })
+
+
+@bp.route('/api/goals/<int:goal_id>/delete', methods=['DELETE'])
+def delete_goal_api(goal_id):
+    if 'user_id' not in session:
+        return jsonify({"error": "Not authenticated"}), 401
+
+    goal = Goal.query.filter_by(id=goal_id, user_id=session['user_id'], is_active=True).first()
+    if not goal:
+        return jsonify({"error": "Goal not found"}), 404
+
+    # Soft-delete goal and deactivate associated rules
+    goal.is_active = False
+    SavingsRule.query.filter_by(goal_id=goal.id).update({SavingsRule.is_active: False})
+    bump_versions(session['user_id'], goal.id)
+    db.session.commit()
+    cache.invalidate(session['user_id'])
+    trigger_index.invalidate(session['user_id'])
+
+    return jsonify({"message": "Goal deleted"}), 200
+
+@bp.route('/api/rules/create', methods=['POST'])
+@log_activity
+def create_rule():
+    if 'user_id' not in session:
+        return jsonify({"error": "Not authenticated"}), 401
+    
+    data = request.get_json()
+    
+    rule = SavingsRule(
+        user_id=session['user_id'],
+        goal_id=data['goal_id'],
+        rule_type=data['rule_type'],
+        rule_name=data['rule_name'],
+        amount=decimalize(data['amount']),
+        frequency=data.get('frequency'),
+        trigger_category=data.get('trigger_category'),
+        is_active=True
+    )
+    
+    db.session.add(rule)
+    bump_versions(session['user_id'], rule.goal_id)
+    db.session.commit()
+    cache.invalidate(session['user_id'])
+    trigger_index.invalidate(session['user_id'])
+    
+    return jsonify({"message": "Rule created successfully", "rule_id": rule.id}), 201
+
+@bp.route('/api/rules/<int:rule_id>', methods=['PUT', 'PATCH'])
+@log_activity
+def update_rule(rule_id):
+    if 'user_id' not in session:
+        return jsonify({"error": "Not authenticated"}), 401
+
+    rule = SavingsRule.query.filter_by(id=rule_id, user_id=session['user_id']).first()
+    if not rule:
+        return jsonify({"error": "Rule not found"}), 404
+
+    data = request.get_json() or {}
+
+    if 'rule_name' in data:
+        rule.rule_name = data['rule_name']
+    if 'amount' in data and data['amount'] is not None:
+        rule.amount = decimalize(data['amount'])
+    if 'frequency' in data:
+        rule.frequency = data['frequency'] or None
+    if 'trigger_category' in data:
+        rule.trigger_category = data['trigger_category'] or None
+
+    bump_versions(session['user_id'], rule.goal_id)
+    db.session.commit()
+    cache.invalidate(session['user_id'])
+    trigger_index.invalidate(session['user_id'])
+
+    return jsonify({
+        "message": "Rule updated successfully",
+        "rule": rule.to_dict()
+    })
+
+def simulation_response(changes, days):
+    """Dry-run response for rule changes; nothing is written."""
+    max_days = current_app.config['FORECAST_HORIZON_DAYS']
+    if days is not None and (not isinstance(days, int) or not 1 <= days <= max_days):
+        return jsonify({"error": f"days must be between 1 and {max_days}"}), 400
+    try:
+        return jsonify(simulate_rules(session['user_id'], changes, days))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+@bp.route('/api/rules/simulate', methods=['POST'])
+@log_activity
+def simulate_rule_changes():
+    if 'user_id' not in session:
+        return jsonify({"error": "Not authenticated"}), 401
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Expected a JSON object"}), 400
+    return simulation_response(data.get('changes'), data.get('days'))
+
+@bp.route('/api/rules/<int:rule_id>/simulate', methods=['POST'])
+@log_activity
+def simulate_rule_update(rule_id):
+    if 'user_id' not in session:
+        return jsonify({"error": "Not authenticated"}), 401
+
+    rule = SavingsRule.query.filter_by(id=rule_id, user_id=session['user_id']).first()
+    if not rule:
+        return jsonify({"error": "Rule not found"}), 404
+
+    # Same body as PUT /api/rules/<id>, plus is_active and days
+    data = request.get_json(silent=True)
+    if data is None:
+        data = {}
+    if not isinstance(data, dict):
+        return jsonify({"error": "Expected a JSON object"}), 400
+    changes = [{k: v for k, v in data.items() if k != 'days'} | {'rule_id': rule_id}]
+    return simulation_response(changes, data.get('days'))
+
+@bp.route('/api/goals/<int:goal_id>/contribute', methods=['POST'])
+@log_activity
+def contribute_to_goal(goal_id):
+    if 'user_id' not in session:
+        return jsonify({"error": "Not authenticated"}), 401
+
+    goal = Goal.query.filter_by(id=goal_id, user_id=session['user_id']).first_or_404()
+    data = request.get_json() or {}
+
+    amount = data.get('amount')
+    investment_type = data.get('investment_type') or 'manual'
+
+    if amount is None:
+        return jsonify({"error": "Amount is required"}), 400
+
+    amount_dec = decimalize(amount)
+    if amount_dec <= Decimal('0'):
+        return jsonify({"error": "Amount must be positive"}), 400
+
+    tx_type = investment_type
+
+    add_tx(goal.id, amount_dec, tx_type, description=None, user_id=session['user_id'])
+    completed = apply_saving_to_goal(goal, amount_dec)
+    bump_versions(session['user_id'], goal.id)
+    db.session.commit()
+    cache.invalidate(session['user_id'])
+
+    return jsonify({
+        "message": "Contribution added",
+        "goal_id": goal.id,
+        "current_amount": float(goal.current_amount),
+        "progress": float(goal.current_amount / goal.target_amount * 100) if goal.target_amount else 0.0,
+        "completed": completed
+    }), 201
+
+def bulk_items():
+    """Items of a bulk request body: a JSON list, {"items": [...]} or NDJSON. Raises ValueError."""
+    request.max_content_length = current_app.config['BULK_MAX_BYTES']
+    if request.mimetype == 'application/x-ndjson':
+        try:
+            items = list(parse_records(request.get_data(as_text=True).splitlines(), 'ndjson'))
+        except ValueError:
+            raise ValueError("Invalid NDJSON body")
+    else:
+        data = request.get_json(silent=True)
+        items = data.get('items') if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        raise ValueError("Expected a non-empty list")
+    return items
+
+@bp.route('/api/contributions/bulk', methods=['POST'])
+@log_activity
+def bulk_contribute():
+    if 'user_id' not in session:
+        return jsonify({"error": "Not authenticated"}), 401
+
+    try:
+        items = bulk_items()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if len(items) > current_app.config['BULK_MAX_ITEMS']:
+        return jsonify({"error": f"At most {current_app.config['BULK_MAX_ITEMS']} items per request"}), 413
+
+    summary = ingest_contributions(session['user_id'], items)
+    return jsonify(summary), 201 if summary['accepted'] else 400
+
+@bp.route('/api/expenses', methods=['POST'])
+@log_activity
+def ingest_expenses_api():
+    if 'user_id' not in session:
+        return jsonify({"error": "Not authenticated"}), 401
+
+    try:
+        items = bulk_items()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if len(items) > current_app.config['BULK_MAX_ITEMS']:
+        return jsonify({"error": f"At most {current_app.config['BULK_MAX_ITEMS']} items per request"}), 413
+
+    summary = ingest_expenses(session['user_id'], items, current_app.config)
+    return jsonify(summary), 201 if summary['accepted'] else 400
+
+# Habit reward endpoint
+@bp.route('/api/habit/<int:rule_id>/log', methods=['POST'])
+@log_activity
+def log_habit(rule_id):
+    if 'user_id' not in session:
+        return jsonify({"error": "Not authenticated"}), 401
+    
+    rule = SavingsRule.query.filter_by(id=rule_id, user_id=session['user_id']).first_or_404()
+    if rule.rule_type != 'habit_reward' or not rule.is_active:
+        return jsonify({"error": "Invalid habit rule"}), 400
+    
+    amount = decimalize(rule.amount)
+    add_tx(rule.goal_id, amount, 'habit_reward', description=rule.rule_name, user_id=session['user_id'],
+           metadata={'rule_id': rule.id})
+    
+    goal = Goal.query.get(rule.goal_id)
+    apply_saving_to_goal(goal, amount)
+    bump_versions(session['user_id'], goal.id)
+    db.session.commit()
+    cache.invalidate(session['user_id'])
+    
+    return jsonify({
+        "message": "Habit logged", 
+        "added": float(amount), 
+        "goal_balance": float(goal.current_amount)
+    })
+
+# Recurring savings execution
+@bp.route('/recurring/run', methods=['POST'])
+def recurring_run():
+    summary = run_recurring_rules()
+    return jsonify({"message": "Recurring processed", **summary})
+
+# Undo a transaction
+@bp.route('/api/transactions/<int:tx_id>/undo', methods=['POST'])
+@log_activity
+def undo(tx_id):
+    if 'user_id' not in session:
+        return jsonify({"error": "Not authenticated"}), 401
+    
+    # Mark original transaction as undone. Conditional on is_undoable, so of two
+    # concurrent undos only one matches the row; the other gets a 400.
+    tx = db.session.execute(
+        update(Transaction)
+        .where(Transaction.id == tx_id,
+               Transaction.user_id == session['user_id'],
+               Transaction.is_undoable.is_(True))
+        .values(is_undoable=False)
+        .returning(Transaction.id, Transaction.goal_id, Transaction.amount)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if tx is None:
+        Transaction.query.filter_by(id=tx_id, user_id=session['user_id']).first_or_404()
+        return jsonify({"error": "Transaction not undoable"}), 400
+    
+    # Create a compensating transaction
+    neg_amount = decimalize(tx.amount) * Decimal('-1')
+    add_tx(tx.goal_id, neg_amount, 'undo', 
+          description=f"Undo #{tx.id}", 
+          user_id=session['user_id'],
+          is_undoable=False)
+    
+    # Update the goal balance
+    goal = Goal.query.get(tx.goal_id)
+    apply_saving_to_goal(goal, neg_amount)
+    
+    bump_versions(session['user_id'], goal.id)
+    db.session.commit()
+    cache.invalidate(session['user_id'])
+    
+    return jsonify({
+        "message": "Transaction undone", 
+        "goal_balance": float(goal.current_amount)
+    })
@@ -0,0 +1,58 @@
+import hmac
+from flask import current_app, request
+from werkzeug.security import generate_password_hash, check_password_hash
+from models import User
+
+_dummy_hashes = {}
+
+
+def hash_password(password):
+    """Hash with the configured PASSWORD_HASH_METHOD (werkzeug method spec, e.g. scrypt:32768:8:1)."""
+    return generate_password_hash(password, method=current_app.config['PASSWORD_HASH_METHOD'])
+
+
+def needs_rehash(password_hash):
+    """True when a stored hash was made with a different method or work factor than configured."""
+    # Werkzeug stores the expanded method ("scrypt" -> "scrypt:32768:8:1"), so compare with
+    # the prefix of a hash made with the configured method rather than the setting itself
+    return password_hash.split('$', 1)[0] != _dummy_hash().split('$', 1)[0]
+
+
+def _dummy_hash():
+    # Hash of a random-ish value with the current method, checked for unknown users so a
+    # failed lookup takes as long as a wrong password.
+    method = current_app.config['PASSWORD_HASH_METHOD']
+    if method not in _dummy_hashes:
+        _dummy_hashes[method] = generate_password_hash('not-a-real-password', method=method)
+    return _dummy_hashes[method]
+
+
+def authenticate(username, password):
+    """
+    Return the user for valid credentials, else None.
+
+    One indexed lookup by username. Hashes made with an outdated method are
+    transparently upgraded (the caller commits).
+    """
+    user = User.query.filter_by(username=username).first() if username else None
+    if user is None or not user.password_hash:
+        check_password_hash(_dummy_hash(), password or '')
+        return None
+    if not check_password_hash(user.password_hash, password or ''):
+        return None
+    if needs_rehash(user.password_hash):
+        user.password_hash = hash_password(password)
+    return user
+
+
+def internal_access_allowed():
+    """
+    Access check for /debug/* and /metrics: allowed in debug mode, otherwise only with
+    `Authorization: Bearer <INTERNAL_ENDPOINTS_TOKEN>` (never while the token is unset).
+    """
+    if current_app.debug:
+        return True
+    token = current_app.config['INTERNAL_ENDPOINTS_TOKEN']
+    if not token:
+        return False
+    return hmac.compare_digest(request.headers.get('Authorization', '').encode(), f'Bearer {token}'.encode())
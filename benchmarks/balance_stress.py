@@ -0,0 +1,177 @@
+"""
+Stress the goal balance paths for lost updates and double undos.
+
+Worker processes x threads hammer ONE goal with a random mix of
+/contribute, /api/habit/<rule_id>/log and /undo (undos deliberately collide
+on a small pool of transactions). Afterwards the goal balance must equal
+  - the seeded balance plus every acknowledged response, and
+  - the sum of the goal's transactions,
+and no transaction may be undone twice. Exits non-zero on any mismatch.
+
+Usage (SQLite or a local Postgres, never production):
+    DATABASE_URL=sqlite:////tmp/bench_stress.db python benchmarks/balance_stress.py
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import random
+import sys
+import threading
+import time
+from decimal import Decimal
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CONTRIBUTION = Decimal('1.00')
+HABIT_REWARD = Decimal('0.25')
+
+
+def load_app():
+    os.environ.setdefault('ACTIVITY_LOG_ENABLED', 'false')
+    os.environ.setdefault('SESSION_SWEEPER_ENABLED', 'false')
+    sys.path.insert(0, ROOT)
+    from app import app
+    return app
+
+
+def seed(undoable, tokens):
+    """One user/goal/habit rule plus `undoable` transactions to fight over."""
+    app = load_app()
+    from extensions import db
+    from models import User, Goal, SavingsRule, Transaction
+    from sessions import session_store
+    from scratch import require_scratch_database
+    with app.app_context():
+        require_scratch_database(db)
+        db.drop_all()
+        db.create_all()
+        user = User(username='stress', email='stress@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.flush()
+        goal = Goal(user_id=user.id, name='stress', target_amount=Decimal('100000'),
+                    current_amount=Decimal('5.00') * undoable)
+        db.session.add(goal)
+        db.session.flush()
+        rule = SavingsRule(user_id=user.id, goal_id=goal.id, rule_type='habit_reward',
+                           rule_name='stress habit', amount=HABIT_REWARD, is_active=True)
+        txs = [Transaction(user_id=user.id, goal_id=goal.id, amount=Decimal('5.00'),
+                           transaction_type='manual', is_undoable=True) for _ in range(undoable)]
+        db.session.add(rule)
+        db.session.add_all(txs)
+        db.session.flush()
+        seeded = {
+            'user_id': user.id, 'goal_id': goal.id, 'rule_id': rule.id,
+            'tx_ids': [tx.id for tx in txs], 'balance': str(goal.current_amount),
+            'tokens': [session_store.create(user.id) for _ in range(tokens)],
+        }
+        db.session.commit()
+        return seeded
+
+
+def worker(seeded, tokens, ops, results):
+    app = load_app()
+    app.logger.setLevel(logging.CRITICAL)  # failures are counted, not printed
+
+    def run(token, out):
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['user_id'] = seeded['user_id']
+            session['session_token'] = token
+        rng = random.Random()
+        for _ in range(ops):
+            roll = rng.random()
+            try:
+                if roll < 0.6:
+                    status = client.post(f"/api/goals/{seeded['goal_id']}/contribute",
+                                         json={'amount': str(CONTRIBUTION)}).status_code
+                    out.append(('contribute', None, status))
+                elif roll < 0.8:
+                    status = client.post(f"/api/habit/{seeded['rule_id']}/log").status_code
+                    out.append(('habit', None, status))
+                else:
+                    tx_id = rng.choice(seeded['tx_ids'])
+                    status = client.post(f'/api/transactions/{tx_id}/undo').status_code
+                    out.append(('undo', tx_id, status))
+            except Exception:
+                out.append(('error', None, 0))
+
+    samples = []
+    threads = [threading.Thread(target=run, args=(token, samples)) for token in tokens]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results.put(samples)
+
+
+def verify(seeded, samples):
+    app = load_app()
+    from sqlalchemy import func, select
+    from extensions import db
+    from models import Goal, Transaction
+
+    ok = lambda op: [s for s in samples if s[0] == op and s[2] in (200, 201)]
+    undone = ok('undo')
+    expected = (Decimal(seeded['balance'])
+                + CONTRIBUTION * len(ok('contribute'))
+                + HABIT_REWARD * len(ok('habit'))
+                - Decimal('5.00') * len(undone))
+
+    with app.app_context():
+        balance = db.session.scalar(select(Goal.current_amount).where(Goal.id == seeded['goal_id']))
+        ledger = db.session.scalar(select(func.sum(Transaction.amount)).where(Transaction.goal_id == seeded['goal_id']))
+        undo_rows = db.session.scalar(select(func.count()).where(Transaction.transaction_type == 'undo'))
+
+    double_undos = len(undone) - len({s[1] for s in undone})
+    rejected_undos = sum(1 for s in samples if s[0] == 'undo' and s[2] == 400)
+    failed = sum(1 for s in samples if s[2] not in (200, 201, 400))
+    print(f"requests: {len(samples)} (failed {failed}), undos accepted {len(undone)}, rejected {rejected_undos}")
+    print(f"balance {balance}  expected {expected:.2f}  ledger sum {Decimal(str(ledger)):.2f}")
+
+    problems = []
+    if Decimal(str(balance)) != expected:
+        problems.append(f"lost updates: balance off by {expected - Decimal(str(balance)):.2f}")
+    if Decimal(str(balance)) != Decimal(str(ledger)).quantize(Decimal('0.01')):
+        problems.append("balance does not match the sum of transactions")
+    if double_undos or undo_rows != len(undone):
+        problems.append(f"double undo: {double_undos} repeated, {undo_rows} undo rows for {len(undone)} accepted")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4, help='Worker processes.')
+    parser.add_argument('--threads', type=int, default=8, help='Client threads per worker.')
+    parser.add_argument('--ops', type=int, default=50, help='Requests per thread.')
+    parser.add_argument('--undoable', type=int, default=20, help='Transactions the undos compete for.')
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context('spawn')
+    with ctx.Pool(1) as pool:
+        seeded = pool.apply(seed, (args.undoable, args.workers * args.threads))
+
+    started = time.perf_counter()
+    results = ctx.Queue()
+    tokens = seeded['tokens']
+    procs = [ctx.Process(target=worker, args=(seeded, tokens[i * args.threads:(i + 1) * args.threads], args.ops, results))
+             for i in range(args.workers)]
+    for proc in procs:
+        proc.start()
+    samples = [s for _ in procs for s in results.get()]
+    for proc in procs:
+        proc.join()
+    elapsed = time.perf_counter() - started
+    print(f"{len(samples) / elapsed:.0f} req/s with {args.workers * args.threads} concurrent clients")
+
+    with ctx.Pool(1) as pool:
+        problems = pool.apply(verify, (seeded, samples))
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    if problems:
+        sys.exit(1)
+    print("OK: no lost updates, no double undos")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""
+Concurrent contribution throughput under each database engine profile.
+
+Every profile runs in fresh worker processes (like gunicorn workers) with the
+profile's environment applied before the app is imported; each worker runs
+several threads that POST contributions for a fixed duration. Reports
+requests/s, p50/p99 latency and failed requests (e.g. "database is locked").
+
+Profiles:
+    sqlite-default   rollback journal, synchronous=FULL, no busy timeout
+    sqlite-wal       the Config defaults: WAL, synchronous=NORMAL, busy_timeout, mmap
+    pg-pool          the Config defaults for Postgres (sized pool, pre-ping, timeouts)
+    pg-pgbouncer     DB_PGBOUNCER=true (no app-side pool)
+
+Usage (SQLite or a local Postgres, never production):
+    DATABASE_URL=sqlite:////tmp/bench_concurrency.db python benchmarks/concurrency.py
+    DATABASE_URL=postgresql://... python benchmarks/concurrency.py --profiles pg-pool,pg-pgbouncer
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import statistics
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROFILES = {
+    'sqlite-default': {'SQLITE_JOURNAL_MODE': 'DELETE', 'SQLITE_SYNCHRONOUS': 'FULL',
+                       'SQLITE_BUSY_TIMEOUT_MS': '0', 'SQLITE_MMAP_SIZE': '0'},
+    'sqlite-wal': {},
+    'pg-pool': {},
+    'pg-pgbouncer': {'DB_PGBOUNCER': 'true'},
+}
+
+
+def load_app(env):
+    os.environ.update(env)
+    os.environ.setdefault('ACTIVITY_LOG_ENABLED', 'false')
+    os.environ.setdefault('SESSION_SWEEPER_ENABLED', 'false')
+    sys.path.insert(0, ROOT)
+    from app import app
+    return app
+
+
+def seed(env, users):
+    """Fresh schema with one user, goal and session per client thread. Returns [(user_id, goal_id, token)]."""
+    app = load_app(env)
+    from decimal import Decimal
+    from extensions import db
+    from models import User, Goal
+    from sessions import session_store
+    from scratch import require_scratch_database
+    with app.app_context():
+        require_scratch_database(db)
+        db.drop_all()
+        db.create_all()
+        pairs = []
+        for i in range(users):
+            user = User(username=f'bench{i}', email=f'bench{i}@example.com', password_hash='x')
+            db.session.add(user)
+            db.session.flush()
+            goal = Goal(user_id=user.id, name='bench', target_amount=Decimal('1000000'), current_amount=Decimal('0'))
+            db.session.add(goal)
+            db.session.flush()
+            pairs.append((user.id, goal.id, session_store.create(user.id)))
+        db.session.commit()
+        return pairs
+
+
+def worker(env, pairs, duration, results):
+    app = load_app(env)
+    app.logger.setLevel(logging.CRITICAL)  # failures are counted, not printed
+
+    def run(user_id, goal_id, token, out):
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['user_id'] = user_id
+            session['session_token'] = token
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                ok = client.post(f'/api/goals/{goal_id}/contribute', json={'amount': '1.00'}).status_code == 201
+            except Exception:
+                ok = False
+            out.append(((time.perf_counter() - started) * 1000, ok))
+
+    samples = []
+    threads = [threading.Thread(target=run, args=(*pair, samples)) for pair in pairs]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results.put(samples)
+
+
+def run_profile(name, args):
+    env = dict(PROFILES[name])
+    ctx = multiprocessing.get_context('spawn')
+    with ctx.Pool(1) as pool:
+        pairs = pool.apply(seed, (env, args.workers * args.threads))
+
+    results = ctx.Queue()
+    procs = [ctx.Process(target=worker, args=(env, pairs[i * args.threads:(i + 1) * args.threads], args.duration, results))
+             for i in range(args.workers)]
+    for proc in procs:
+        proc.start()
+    samples = [s for _ in procs for s in results.get()]
+    for proc in procs:
+        proc.join()
+
+    latencies = sorted(ms for ms, ok in samples if ok)
+    failed = sum(1 for _, ok in samples if not ok)
+    p99 = latencies[int(0.99 * (len(latencies) - 1))] if latencies else float('nan')
+    print(f"{name:>15} {len(latencies) / args.duration:>9.0f} "
+          f"{statistics.median(latencies) if latencies else float('nan'):>8.2f} {p99:>8.2f} {failed:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profiles', default=None, help='Comma-separated profiles (default: the ones for DATABASE_URL).')
+    parser.add_argument('--workers', type=int, default=4, help='Worker processes.')
+    parser.add_argument('--threads', type=int, default=4, help='Client threads per worker.')
+    parser.add_argument('--duration', type=float, default=5.0, help='Seconds per profile.')
+    args = parser.parse_args()
+
+    if args.profiles:
+        profiles = args.profiles.split(',')
+    elif os.environ.get('DATABASE_URL', 'sqlite').startswith('sqlite'):
+        profiles = ['sqlite-default', 'sqlite-wal']
+    else:
+        profiles = ['pg-pool', 'pg-pgbouncer']
+
+    print(f"{'profile':>15} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'failed':>8}")
+    for name in profiles:
+        run_profile(name, args)
+
+
+if __name__ == '__main__':
+    main()
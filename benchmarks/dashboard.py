@@ -0,0 +1,144 @@
+"""
+Compare page-load cost of the old multi-request flows with the single-round-trip endpoints.
+
+    dashboard  GET /api/goals + /api/savings-rules + /api/goals (rule modal)  vs  GET /api/dashboard
+    goal page  GET /api/goals/<id> + /api/goals/<id>/transactions             vs  GET /api/goals/<id>/overview
+
+For each flow it reports HTTP requests, SQL statements, response size and p50/p99 server
+time per page load, plus an estimate with --rtt-ms of network round trip per request
+(the test client has none). The response cache is cleared before every load (cold, like
+the first view after a change); --warm keeps it.
+
+Usage (SQLite or a local Postgres, never production):
+    DATABASE_URL=sqlite:////tmp/bench_dashboard.db python benchmarks/dashboard.py --goals 20 --transactions 20000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TX_TYPES = ['manual', 'recurring', 'habit_reward', 'guilty_pleasure_tax', 'round_up']
+
+
+def load_app():
+    os.environ.setdefault('ACTIVITY_LOG_ENABLED', 'false')
+    os.environ.setdefault('SESSION_SWEEPER_ENABLED', 'false')
+    sys.path.insert(0, ROOT)
+    from app import app
+    return app
+
+
+def seed(goals, rules_per_goal, transactions):
+    """One user with `goals` goals, their rules and a transaction history. Returns (user_id, goal_id, token)."""
+    from sqlalchemy import insert, select
+    from extensions import db
+    from models import User, Goal, SavingsRule, Transaction
+    from sessions import session_store
+    from stats import rebuild_stats
+    from scratch import require_scratch_database
+
+    require_scratch_database(db)
+    db.drop_all()
+    db.create_all()
+    user = User(username='dashboard', email='dashboard@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.flush()
+    db.session.execute(insert(Goal), [
+        {'user_id': user.id, 'name': f'Goal {n}', 'target_amount': 10000, 'current_amount': 0, 'is_active': True}
+        for n in range(goals)
+    ])
+    goal_ids = list(db.session.scalars(select(Goal.id).where(Goal.user_id == user.id)))
+    db.session.execute(insert(SavingsRule), [
+        {'user_id': user.id, 'goal_id': g, 'rule_type': random.choice(['recurring', 'habit_reward']),
+         'rule_name': f'Rule {n}', 'amount': 5, 'frequency': 'weekly', 'is_active': True}
+        for g in goal_ids for n in range(rules_per_goal)
+    ])
+    now = datetime.utcnow()
+    db.session.execute(insert(Transaction), [
+        {'user_id': user.id, 'goal_id': random.choice(goal_ids), 'amount': round(random.uniform(0.5, 50), 2),
+         'transaction_type': random.choice(TX_TYPES), 'is_undoable': True,
+         'created_at': now - timedelta(minutes=random.randint(0, 60 * 24 * 730))}
+        for _ in range(transactions)
+    ])
+    rebuild_stats()
+    token = session_store.create(user.id)
+    db.session.commit()
+    return user.id, goal_ids[0], token
+
+
+def measure(app, client, paths, iterations, warm, user_id):
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+    from extensions import cache
+
+    statements = []
+    listener = lambda conn, cursor, stmt, *a: statements.append(stmt)  # noqa: E731
+    event.listen(Engine, 'before_cursor_execute', listener)
+    try:
+        latencies, counts, sizes = [], [], []
+        for _ in range(iterations):
+            if not warm:
+                cache.invalidate(user_id)
+            del statements[:]
+            size = 0
+            started = time.perf_counter()
+            for path in paths:
+                response = client.get(path)
+                assert response.status_code == 200, (path, response.status_code)
+                size += len(response.data)
+            latencies.append((time.perf_counter() - started) * 1000)
+            counts.append(len(statements))
+            sizes.append(size)
+    finally:
+        event.remove(Engine, 'before_cursor_execute', listener)
+
+    latencies.sort()
+    return {
+        'requests': len(paths),
+        'statements': statistics.median(counts),
+        'bytes': statistics.median(sizes),
+        'p50': statistics.median(latencies),
+        'p99': latencies[int(0.99 * (len(latencies) - 1))],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--goals', type=int, default=20)
+    parser.add_argument('--rules-per-goal', type=int, default=3)
+    parser.add_argument('--transactions', type=int, default=20000)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--warm', action='store_true', help='Keep the response cache between page loads.')
+    parser.add_argument('--rtt-ms', type=float, default=50.0, help='Network round trip added per request in the estimate.')
+    args = parser.parse_args()
+
+    app = load_app()
+    with app.app_context():
+        user_id, goal_id, token = seed(args.goals, args.rules_per_goal, args.transactions)
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = user_id
+        session['session_token'] = token
+
+    flows = [
+        ('dashboard (old)', ['/api/goals', '/api/savings-rules', '/api/goals']),
+        ('/api/dashboard', ['/api/dashboard']),
+        ('goal page (old)', [f'/api/goals/{goal_id}', f'/api/goals/{goal_id}/transactions']),
+        ('goal overview', [f'/api/goals/{goal_id}/overview']),
+    ]
+    client.get('/api/dashboard')  # warm up the session cache and connections
+    print(f"{'flow':>16} {'requests':>9} {'queries':>8} {'KiB':>8} {'p50 ms':>8} {'p99 ms':>8} {'+rtt ms':>8}")
+    for name, paths in flows:
+        r = measure(app, client, paths, args.iterations, args.warm, user_id)
+        print(f"{name:>16} {r['requests']:>9} {r['statements']:>8.0f} {r['bytes'] / 1024:>8.1f} "
+              f"{r['p50']:>8.2f} {r['p99']:>8.2f} {r['p50'] + r['requests'] * args.rtt_ms:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
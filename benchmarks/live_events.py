@@ -0,0 +1,82 @@
+"""
+Cost of idle live event streams (GET /api/events) in one worker process.
+
+Opens N streams for N users, each consumed by its own thread as under a gthread or
+gevent worker, then reports Python heap per idle stream, the SQL statements issued
+while idle (expected: none), and publish-to-delivery latency for one user's event.
+
+Usage (SQLite or a local Postgres, never production):
+    DATABASE_URL=sqlite:////tmp/bench_events.db python benchmarks/live_events.py --streams 2000
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_app():
+    os.environ.setdefault('ACTIVITY_LOG_ENABLED', 'false')
+    os.environ.setdefault('SESSION_SWEEPER_ENABLED', 'false')
+    sys.path.insert(0, ROOT)
+    from app import app
+    return app
+
+
+def consume(hub, stream, received):
+    for chunk in hub.generate(stream):
+        if chunk.startswith('event: balance'):
+            received[stream.user_id] = time.perf_counter()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--streams', type=int, default=2000)
+    parser.add_argument('--idle-seconds', type=float, default=3.0)
+    parser.add_argument('--events', type=int, default=200)
+    args = parser.parse_args()
+
+    app = load_app()
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+    from events import CHANNEL, live_events
+
+    threading.stack_size(256 * 1024)
+    received = {}
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    streams = [live_events.open(user_id, None) for user_id in range(1, args.streams + 1)]
+    for stream in streams:
+        threading.Thread(target=consume, args=(live_events, stream, received), daemon=True).start()
+    per_stream = (tracemalloc.get_traced_memory()[0] - before) / args.streams
+    tracemalloc.stop()
+
+    statements = []
+    event.listen(Engine, 'before_cursor_execute', lambda conn, cursor, stmt, *a: statements.append(stmt))
+    time.sleep(args.idle_seconds)
+    print(f"{args.streams} idle streams: {per_stream / 1024:.1f} KiB Python heap each, "
+          f"{len(statements)} SQL statements in {args.idle_seconds:.0f}s")
+
+    broker = app.extensions['pubsub']
+    latencies = []
+    with app.app_context():
+        for i in range(args.events):
+            user_id = 1 + i % args.streams
+            received.pop(user_id, None)
+            started = time.perf_counter()
+            broker.publish(CHANNEL, f'{user_id}:[{{"event":"balance","goal_id":1,"current_amount":{i}}}]')
+            while user_id not in received:
+                time.sleep(0.0005)
+            latencies.append((received[user_id] - started) * 1000)
+    latencies.sort()
+    print(f"publish -> stream: p50 {statistics.median(latencies):.2f} ms, "
+          f"p99 {latencies[int(0.99 * (len(latencies) - 1))]:.2f} ms ({broker.__class__.__name__})")
+    print(live_events.stats())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Measure login throughput and latency as the users table grows.
+
+The login path should cost one indexed lookup plus the password hash check, so
+logins/s should stay flat from thousands to hundreds of thousands of users.
+A cheap hash method is used so the numbers reflect the database path.
+
+Usage (SQLite or a local Postgres, never production):
+    DATABASE_URL=sqlite:////tmp/bench_login.db python benchmarks/login_throughput.py
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+os.environ.setdefault('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:1000')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, insert, select  # noqa: E402
+from werkzeug.security import generate_password_hash  # noqa: E402
+from app import app  # noqa: E402
+from extensions import db  # noqa: E402
+from models import User  # noqa: E402
+from scratch import require_scratch_database  # noqa: E402
+
+PASSWORD = 'bench-password'
+BATCH = 10000
+
+
+def grow_users(target, password_hash):
+    """Bulk-insert bench users until the table holds `target` of them."""
+    existing = db.session.scalar(select(func.count(User.id)).where(User.username.like('login_bench_%')))
+    for start in range(existing, target, BATCH):
+        db.session.execute(insert(User), [
+            {'username': f'login_bench_{i}', 'email': f'login_bench_{i}@example.com',
+             'password_hash': password_hash}
+            for i in range(start, min(start + BATCH, target))
+        ])
+        db.session.commit()
+
+
+def run_logins(client, user_count, attempts, unknown_ratio):
+    samples = []
+    for _ in range(attempts):
+        if random.random() < unknown_ratio:
+            username = f'nobody_{random.randint(0, 10 ** 9)}'
+        else:
+            username = f'login_bench_{random.randrange(user_count)}'
+        t0 = time.perf_counter()
+        client.post('/login', data={'username': username, 'password': PASSWORD})
+        samples.append((time.perf_counter() - t0) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scales', default='1000,10000,100000',
+                        help='Comma-separated user counts to measure at.')
+    parser.add_argument('--attempts', type=int, default=500)
+    parser.add_argument('--unknown-ratio', type=float, default=0.2,
+                        help='Fraction of attempts with a username that does not exist.')
+    args = parser.parse_args()
+
+    client = app.test_client()
+    with app.app_context():
+        require_scratch_database(db)
+        db.create_all()
+        password_hash = generate_password_hash(PASSWORD, method=app.config['PASSWORD_HASH_METHOD'])
+
+        print(f"{'users':>10} {'logins/s':>10} {'p50 ms':>8} {'p99 ms':>8}")
+        for scale in (int(s) for s in args.scales.split(',')):
+            grow_users(scale, password_hash)
+            started = time.perf_counter()
+            samples = run_logins(client, scale, args.attempts, args.unknown_ratio)
+            elapsed = time.perf_counter() - started
+            p99 = sorted(samples)[int(0.99 * (len(samples) - 1))]
+            print(f"{scale:>10} {args.attempts / elapsed:>10.0f} {statistics.median(samples):>8.2f} {p99:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
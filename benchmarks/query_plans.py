@@ -0,0 +1,165 @@
+"""
+Seed synthetic data and report EXPLAIN plans and p50/p99 latency for the /api/* queries,
+first without and then with the hot-path indexes.
+
+Usage (SQLite or a local Postgres, never production):
+    DATABASE_URL=sqlite:////tmp/bench.db python benchmarks/query_plans.py --transactions 2000000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert, select, text  # noqa: E402
+from app import app  # noqa: E402
+from extensions import db  # noqa: E402
+from models import User, Goal, Transaction, SavingsRule  # noqa: E402
+from reconcile import ledger_balances  # noqa: E402
+from scratch import require_scratch_database  # noqa: E402
+
+TX_TYPES = ['manual', 'recurring', 'habit_reward', 'guilty_pleasure_tax', 'round_up', 'undo']
+BATCH = 10000
+
+
+def seed(users, goals_per_user, transactions):
+    """Bulk-insert synthetic users, goals, rules and transactions."""
+    start_user = (db.session.scalar(select(db.func.max(User.id))) or 0) + 1
+    db.session.execute(insert(User), [
+        {'username': f'bench_{i}', 'email': f'bench_{i}@example.com', 'password_hash': 'x'}
+        for i in range(start_user, start_user + users)
+    ])
+    user_ids = list(range(start_user, start_user + users))
+
+    start_goal = (db.session.scalar(select(db.func.max(Goal.id))) or 0) + 1
+    db.session.execute(insert(Goal), [
+        {'user_id': u, 'name': f'Goal {n}', 'target_amount': 1000, 'current_amount': 0,
+         'is_active': n != 0}
+        for u in user_ids for n in range(goals_per_user)
+    ])
+    goal_owner = {start_goal + i: u for i, u in enumerate(
+        u for u in user_ids for _ in range(goals_per_user))}
+    goal_ids = list(goal_owner)
+
+    db.session.execute(insert(SavingsRule), [
+        {'user_id': goal_owner[g], 'goal_id': g, 'rule_type': random.choice(['recurring', 'habit_reward']),
+         'rule_name': 'Bench rule', 'amount': 5, 'frequency': 'weekly', 'is_active': True}
+        for g in goal_ids
+    ])
+    db.session.commit()
+
+    now = datetime.utcnow()
+    for offset in range(0, transactions, BATCH):
+        rows = []
+        for _ in range(min(BATCH, transactions - offset)):
+            g = random.choice(goal_ids)
+            rows.append({
+                'user_id': goal_owner[g], 'goal_id': g, 'amount': round(random.uniform(0.5, 50), 2),
+                'transaction_type': random.choice(TX_TYPES), 'is_undoable': True,
+                'created_at': now - timedelta(minutes=random.randint(0, 60 * 24 * 730)),
+            })
+        db.session.execute(insert(Transaction), rows)
+        db.session.commit()
+    return goal_owner
+
+
+def api_queries(user_id, goal_id):
+    """The statements issued by each /api/* read route (and the batch scans)."""
+    return {
+        'GET /api/goals': select(Goal).where(Goal.user_id == user_id, Goal.is_active.is_(True)),
+        'GET /api/goals/<id>': select(Goal).where(Goal.id == goal_id, Goal.user_id == user_id),
+        'GET /api/transactions': select(Transaction).where(Transaction.user_id == user_id)
+            .order_by(Transaction.created_at.desc()).limit(50),
+        'GET /api/goals/<id>/transactions': select(Transaction)
+            .where(Transaction.user_id == user_id, Transaction.goal_id == goal_id)
+            .order_by(Transaction.created_at.asc()),
+        'GET /api/savings-rules': select(SavingsRule)
+            .where(SavingsRule.user_id == user_id, SavingsRule.is_active.is_(True)),
+        'recurring due scan': select(SavingsRule.id)
+            .where(SavingsRule.rule_type == 'recurring', SavingsRule.is_active.is_(True)),
+        'cleanup-manual-contributions scan': select(Transaction.id)
+            .where(Transaction.transaction_type == 'manual_contribution'),
+        'reconcile-ledger --incremental': ledger_balances(datetime.utcnow() - timedelta(hours=1)),
+        'rule simulation history': select(Transaction.created_at, Transaction.amount)
+            .where(Transaction.user_id == user_id, Transaction.goal_id == goal_id,
+                   Transaction.transaction_type == 'recurring', Transaction.description == 'Bench rule'),
+    }
+
+
+def explain(stmt):
+    engine = db.engine
+    sql = str(stmt.compile(dialect=engine.dialect, compile_kwargs={'literal_binds': True}))
+    prefix = 'EXPLAIN QUERY PLAN ' if engine.dialect.name == 'sqlite' else 'EXPLAIN (ANALYZE, BUFFERS) '
+    rows = db.session.execute(text(prefix + sql)).all()
+    return [' | '.join(str(c) for c in row) for row in rows]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def measure(goal_owner, iterations):
+    samples = {}
+    goal_ids = list(goal_owner)
+    for _ in range(iterations):
+        g = random.choice(goal_ids)
+        for name, stmt in api_queries(goal_owner[g], g).items():
+            t0 = time.perf_counter()
+            db.session.execute(stmt).all()
+            samples.setdefault(name, []).append((time.perf_counter() - t0) * 1000)
+    return samples
+
+
+def set_indexes(enabled):
+    """Drop or (re)create every secondary index declared on the models."""
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            if enabled:
+                index.create(db.engine, checkfirst=True)
+            else:
+                index.drop(db.engine, checkfirst=True)
+
+
+def report(label, goal_owner, iterations):
+    print(f"\n=== {label} ===")
+    g = next(iter(goal_owner))
+    for name, stmt in api_queries(goal_owner[g], g).items():
+        print(f"\n{name}")
+        for line in explain(stmt):
+            print(f"    {line}")
+    db.session.rollback()
+    for name, ms in measure(goal_owner, iterations).items():
+        print(f"{name:40s} p50={statistics.median(ms):8.2f}ms  p99={percentile(ms, 99):8.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--goals-per-user', type=int, default=3)
+    parser.add_argument('--transactions', type=int, default=1000000)
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    with app.app_context():
+        require_scratch_database(db)
+        db.create_all()
+        t0 = time.perf_counter()
+        goal_owner = seed(args.users, args.goals_per_user, args.transactions)
+        print(f"Seeded {args.transactions} transactions in {time.perf_counter() - t0:.1f}s "
+              f"({db.engine.dialect.name})")
+
+        set_indexes(False)
+        report('before (primary keys only)', goal_owner, args.iterations)
+        set_indexes(True)
+        db.session.execute(text('ANALYZE'))
+        db.session.commit()
+        report('after (hot-path indexes)', goal_owner, args.iterations)
+
+
+if __name__ == '__main__':
+    main()
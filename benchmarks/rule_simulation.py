@@ -0,0 +1,143 @@
+"""
+Latency of what-if rule simulations (POST /api/rules/<id>/simulate and /api/rules/simulate)
+for a user with years of history: a weekly recurring rule, a habit reward logged most days
+and a guilty pleasure tax on card expenses.
+
+Reports p50/p99 server time and SQL statements per simulation for each kind of change.
+The target for interactive use is under 50 ms.
+
+Usage (SQLite or a local Postgres, never production):
+    DATABASE_URL=sqlite:////tmp/bench_simulation.db python benchmarks/rule_simulation.py --years 5 --expenses-per-day 12
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CATEGORIES = ['coffee', 'food', 'fuel', 'snacks']
+
+
+def load_app():
+    os.environ.setdefault('ACTIVITY_LOG_ENABLED', 'false')
+    os.environ.setdefault('SESSION_SWEEPER_ENABLED', 'false')
+    sys.path.insert(0, ROOT)
+    from app import app
+    return app
+
+
+def seed(years, expenses_per_day):
+    """One user with two goals, three rules and their history. Returns (user_id, rule ids, token)."""
+    from sqlalchemy import insert
+    from extensions import db
+    from models import User, Goal, SavingsRule, Transaction
+    from sessions import session_store
+    from stats import rebuild_stats
+    from scratch import require_scratch_database
+
+    require_scratch_database(db)
+    db.drop_all()
+    db.create_all()
+    now = datetime.utcnow()
+    days = years * 365
+    start = now - timedelta(days=days)
+    user = User(username='simulation', email='simulation@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.flush()
+    car = Goal(user_id=user.id, name='Car', target_amount=50000, current_amount=0, created_at=start)
+    trip = Goal(user_id=user.id, name='Trip', target_amount=200000, current_amount=0, created_at=start)
+    db.session.add_all([car, trip])
+    db.session.flush()
+    rules = [
+        SavingsRule(user_id=user.id, goal_id=car.id, rule_type='recurring', rule_name='Weekly', amount=50,
+                    frequency='weekly', is_active=True, created_at=start, last_executed=now - timedelta(days=3)),
+        SavingsRule(user_id=user.id, goal_id=car.id, rule_type='habit_reward', rule_name='Gym', amount=5,
+                    is_active=True, created_at=start),
+        SavingsRule(user_id=user.id, goal_id=trip.id, rule_type='guilty_pleasure_tax', rule_name='Coffee tax',
+                    amount=2, trigger_category='coffee', is_active=True, created_at=start),
+    ]
+    db.session.add_all(rules)
+    db.session.flush()
+    weekly, gym, coffee = ({'rule_id': r.id} for r in rules)
+
+    rows = [{'user_id': user.id, 'goal_id': car.id, 'amount': 50, 'transaction_type': 'recurring',
+             'description': 'Weekly', 'transaction_metadata': weekly, 'created_at': start + timedelta(weeks=w)}
+            for w in range(days // 7)]
+    for d in range(days):
+        day = start + timedelta(days=d)
+        if random.random() < 0.4:
+            rows.append({'user_id': user.id, 'goal_id': car.id, 'amount': 5, 'transaction_type': 'habit_reward',
+                         'description': 'Gym', 'transaction_metadata': gym, 'created_at': day + timedelta(hours=7)})
+        for _ in range(random.randint(0, 2 * expenses_per_day)):
+            category = random.choice(CATEGORIES)
+            expense = {'user_id': user.id, 'goal_id': trip.id, 'original_expense_amount': 4.5,
+                       'expense_category': category, 'created_at': day + timedelta(minutes=random.randint(0, 1439))}
+            rows.append({**expense, 'amount': 1.5, 'transaction_type': 'round_up'})
+            if category == 'coffee':
+                rows.append({**expense, 'amount': 2, 'transaction_type': 'guilty_pleasure_tax',
+                             'description': 'Coffee tax', 'transaction_metadata': coffee})
+    db.session.execute(insert(Transaction), rows)
+    for goal in (car, trip):
+        goal.current_amount = sum(r['amount'] for r in rows if r['goal_id'] == goal.id)
+    rebuild_stats()
+    token = session_store.create(user.id)
+    db.session.commit()
+    return user.id, [r.id for r in rules], len(rows), token
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--years', type=int, default=5)
+    parser.add_argument('--expenses-per-day', type=int, default=6)
+    parser.add_argument('--iterations', type=int, default=100)
+    args = parser.parse_args()
+
+    app = load_app()
+    with app.app_context():
+        user_id, (recurring, habit, tax), transactions, token = seed(args.years, args.expenses_per_day)
+    print(f"{transactions} transactions over {args.years} years")
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = user_id
+        session['session_token'] = token
+
+    cases = [
+        ('recurring amount', f'/api/rules/{recurring}/simulate', {'amount': 75}),
+        ('recurring frequency', f'/api/rules/{recurring}/simulate', {'frequency': 'daily'}),
+        ('habit amount', f'/api/rules/{habit}/simulate', {'amount': 10}),
+        ('tax category', f'/api/rules/{tax}/simulate', {'trigger_category': 'food'}),
+        ('three changes', '/api/rules/simulate', {'changes': [
+            {'rule_id': recurring, 'frequency': 'daily'},
+            {'rule_id': habit, 'amount': 10},
+            {'rule_id': tax, 'trigger_category': 'snacks', 'amount': 3},
+        ]}),
+    ]
+
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+    statements = []
+    event.listen(Engine, 'before_cursor_execute', lambda conn, cursor, stmt, *a: statements.append(stmt))
+
+    print(f"{'change':>20} {'queries':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, path, body in cases:
+        client.post(path, json=body)  # warm up
+        latencies, counts = [], []
+        for _ in range(args.iterations):
+            del statements[:]
+            started = time.perf_counter()
+            response = client.post(path, json=body)
+            latencies.append((time.perf_counter() - started) * 1000)
+            assert response.status_code == 200, (path, response.get_json())
+            counts.append(len(statements))
+        latencies.sort()
+        print(f"{name:>20} {statistics.median(counts):>8.0f} {statistics.median(latencies):>8.2f} "
+              f"{latencies[int(0.99 * (len(latencies) - 1))]:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,20 @@
+"""
+Guard for the benchmarks that drop, create or seed tables.
+
+They only run against a database that is empty or that a benchmark created earlier
+(it has the `benchmark_scratch` marker table), never one holding real data.
+"""
+from sqlalchemy import inspect, text
+
+MARKER = 'benchmark_scratch'
+
+
+def require_scratch_database(db):
+    """Raise unless the database is empty or benchmark-made, then mark it as benchmark-made."""
+    tables = set(inspect(db.engine).get_table_names())
+    if tables and MARKER not in tables:
+        url = db.engine.url.render_as_string(hide_password=True)
+        raise RuntimeError(f"Refusing to run against {url}: it already has tables and was not created by a benchmark. "
+                           f"Point DATABASE_URL at a new, empty database (e.g. sqlite:////tmp/bench.db).")
+    with db.engine.begin() as conn:
+        conn.execute(text(f'CREATE TABLE IF NOT EXISTS {MARKER} (created_at TIMESTAMP)'))
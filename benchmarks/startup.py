@@ -0,0 +1,73 @@
+"""
+Measure worker startup: time from a fresh interpreter to `import app` and to the
+first served request, plus the SQL statements executed on the way.
+
+Each sample is a new process, like a gunicorn worker boot or a CLI invocation.
+With the app factory, startup should run no SQL at all; --app-dir points at
+another checkout (e.g. a `git worktree` of an older commit) to compare.
+
+Usage (SQLite or a local Postgres, never production):
+    DATABASE_URL=sqlite:////tmp/bench_startup.db python benchmarks/startup.py --workers 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r"""
+import json, sys, time
+started = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+statements = []
+event.listen(Engine, 'before_cursor_execute', lambda conn, cursor, stmt, *a: statements.append(stmt))
+from app import app
+imported = time.perf_counter()
+import_statements = len(statements)
+response = app.test_client().get(sys.argv[2])
+first = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'first_request_ms': (first - imported) * 1000,
+    'total_ms': (first - started) * 1000,
+    'import_statements': import_statements,
+    'total_statements': len(statements),
+    'status': response.status_code,
+}))
+"""
+
+
+def run_worker(app_dir, path):
+    started = time.perf_counter()
+    out = subprocess.run([sys.executable, '-c', CHILD, app_dir, path], cwd=app_dir,
+                         capture_output=True, text=True, check=True)
+    sample = json.loads(out.stdout.strip().splitlines()[-1])
+    sample['process_ms'] = (time.perf_counter() - started) * 1000
+    return sample
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=10, help='Number of cold starts to sample.')
+    parser.add_argument('--path', default='/login', help='Path requested as the first request.')
+    parser.add_argument('--app-dir', default=ROOT, help='Checkout to import app.py from.')
+    args = parser.parse_args()
+
+    samples = [run_worker(args.app_dir, args.path) for _ in range(args.workers)]
+
+    print(f"{'':>22} {'p50':>9} {'max':>9}")
+    for key in ('import_ms', 'first_request_ms', 'total_ms', 'process_ms'):
+        values = [s[key] for s in samples]
+        print(f"{key:>22} {statistics.median(values):>9.1f} {max(values):>9.1f}")
+    print(f"SQL statements at import: {samples[0]['import_statements']}, "
+          f"by first response: {samples[0]['total_statements']} (status {samples[0]['status']})")
+
+
+if __name__ == '__main__':
+    main()
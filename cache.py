@@ -0,0 +1,151 @@
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+
+
+class MemoryBackend:
+    """Thread-safe in-process LRU with per-entry TTL."""
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()  # (user_id, key) -> (expires_at, value)
+        self.user_keys = {}  # user_id -> set of keys, for per-user invalidation
+        self.lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, user_id, key):
+        with self.lock:
+            entry = self.entries.get((user_id, key))
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                self._remove((user_id, key))
+                return None
+            self.entries.move_to_end((user_id, key))
+            return entry[1]
+
+    def set(self, user_id, key, value):
+        with self.lock:
+            self.entries[(user_id, key)] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end((user_id, key))
+            self.user_keys.setdefault(user_id, set()).add(key)
+            while len(self.entries) > self.max_entries:
+                oldest = next(iter(self.entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, user_id):
+        with self.lock:
+            for key in self.user_keys.pop(user_id, ()):
+                self.entries.pop((user_id, key), None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.user_keys.clear()
+
+    def size(self):
+        return len(self.entries)
+
+    def _remove(self, entry_key):
+        self.entries.pop(entry_key, None)
+        keys = self.user_keys.get(entry_key[0])
+        if keys is not None:
+            keys.discard(entry_key[1])
+            if not keys:
+                del self.user_keys[entry_key[0]]
+
+
+class RedisBackend:
+    """
+    Shared backend for multi-worker deployments (any Redis-compatible server).
+    Invalidation bumps a per-user generation number that is part of every key,
+    so stale entries are never read again and simply expire.
+    """
+
+    def __init__(self, url, ttl, prefix='milestone'):
+        import redis  # optional dependency, only needed for CACHE_BACKEND=redis
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+        self.evictions = 0
+
+    def _generation(self, user_id):
+        return int(self.client.get(f"{self.prefix}:gen:{user_id}") or 0)
+
+    def _key(self, user_id, key):
+        return f"{self.prefix}:{user_id}:{self._generation(user_id)}:{key}"
+
+    def get(self, user_id, key):
+        return self.client.get(self._key(user_id, key))
+
+    def set(self, user_id, key, value):
+        self.client.set(self._key(user_id, key), value, ex=self.ttl)
+
+    def invalidate(self, user_id):
+        self.client.incr(f"{self.prefix}:gen:{user_id}")
+
+    def clear(self):
+        for key in self.client.scan_iter(f"{self.prefix}:*"):
+            self.client.delete(key)
+
+    def size(self):
+        return None
+
+
+class ResponseCache:
+    """Per-user cache of serialized JSON responses, configured from CACHE_* settings."""
+
+    def __init__(self):
+        self.backend = None
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        backend = app.config.get('CACHE_BACKEND', 'memory')
+        ttl = app.config.get('CACHE_TTL', 60)
+        if backend == 'redis':
+            self.backend = RedisBackend(app.config['CACHE_REDIS_URL'], ttl)
+        elif backend == 'memory':
+            self.backend = MemoryBackend(app.config.get('CACHE_MAX_ENTRIES', 10000), ttl)
+        else:
+            self.backend = None
+        app.extensions['response_cache'] = self
+
+    def cached_json(self, user_id, key, build):
+        """
+        Return a JSON response for (user_id, key), calling build() for the payload on a miss.
+        Exceptions from build() (e.g. 404) propagate and nothing is cached.
+        """
+        if self.backend is None:
+            return current_app.json.response(build())
+
+        body = self.backend.get(user_id, key)
+        if body is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            body = current_app.json.dumps(build()).encode()
+            self.backend.set(user_id, key, body)
+        return current_app.response_class(body, mimetype=current_app.json.mimetype)
+
+    def invalidate(self, *user_ids):
+        if self.backend is None:
+            return
+        for user_id in user_ids:
+            self.backend.invalidate(user_id)
+
+    def clear(self):
+        if self.backend is not None:
+            self.backend.clear()
+
+    def stats(self):
+        return {
+            'backend': type(self.backend).__name__ if self.backend else None,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.backend.evictions if self.backend else 0,
+            'entries': self.backend.size() if self.backend else 0,
+        }
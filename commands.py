@@ -0,0 +1,226 @@
+import os
+import sys
+import time
+import click
+from flask import Blueprint, current_app
+from flask_migrate import stamp
+from extensions import db
+from models import User, Transaction
+from auth import hash_password
+from ingest import ingest_contributions, parse_records
+from forecast import precompute_forecasts
+from ledger import apply_goal_deltas, goal_deltas
+from partitions import archive_transactions, create_partitions, partition_transactions
+from reconcile import run_reconciliation
+from recurring import run_recurring_rules, run_sharded, RecurringScheduler
+from sessions import session_store
+from uploads import cleanup_orphans
+from stats import record_transactions, rebuild_stats
+from versioning import bump_versions
+
+# CLI-only blueprint; cli_group=None keeps the commands at the top level (flask init-db, ...)
+bp = Blueprint('commands', __name__, cli_group=None)
+
+# Demo account for local and first-time deployments (flask seed-demo)
+DEMO_USERNAME = 'gowrisankar'
+DEMO_EMAIL = 'gowrisankar@example.com'
+DEMO_PASSWORD = 'pass'
+
+
+# Schema and seed data are explicit steps, never run at import/worker boot
+@bp.cli.command('init-db')
+def init_db():
+    """Create all tables on an empty database and mark it as fully migrated."""
+    db.create_all()
+    # Postgres gets the same monthly-partitioned transactions table as migrated databases
+    partition_transactions(db.session.connection(), current_app.config['TRANSACTION_PARTITIONS_AHEAD'])
+    db.session.commit()
+    stamp()
+    print('Initialized the database.')
+
+@bp.cli.command('seed-demo')
+def seed_demo():
+    """Create the demo user if it doesn't exist."""
+    if db.session.query(User.id).filter_by(username=DEMO_USERNAME).first():
+        print('Demo user already exists.')
+        return
+    db.session.add(User(
+        username=DEMO_USERNAME,
+        email=DEMO_EMAIL,
+        password_hash=hash_password(DEMO_PASSWORD)
+    ))
+    db.session.commit()
+    print(f'Created demo user {DEMO_USERNAME!r}.')
+
+@bp.cli.command('run-recurring')
+@click.option('--shards', type=int, default=None, help='Number of user_id shards (default RECURRING_SHARDS).')
+@click.option('--shard-index', type=int, default=None, help='Only run this shard (for one process/host per shard).')
+@click.option('--loop', is_flag=True, help='Keep running every RECURRING_SCHEDULER_INTERVAL seconds.')
+def run_recurring(shards, shard_index, loop):
+    """Execute due recurring savings rules."""
+    shards = shards or current_app.config['RECURRING_SHARDS']
+    if loop:
+        print(f"Running recurring scheduler with {shards} shard(s).")
+        RecurringScheduler(current_app._get_current_object(), current_app.config['RECURRING_SCHEDULER_INTERVAL'], shards).run()
+        return
+
+    if shard_index is not None:
+        summary = run_recurring_rules(shard_index=shard_index, shard_count=shards)
+    else:
+        summary = run_sharded(current_app._get_current_object(), shards)
+    print(f"Executed {summary['executed']} rules, skipped {summary['skipped']} "
+          f"({summary['already_run']} already run this period).")
+
+@bp.cli.command('cleanup-manual-contributions')
+def cleanup_manual_contributions():
+    """Remove legacy manual_contribution transactions and adjust goal balances."""
+    with current_app.app_context():
+        txs = Transaction.query.filter_by(transaction_type='manual_contribution').all()
+        count = len(txs)
+
+        # Take the removed rows back out of the balances (atomic per-goal decrements)
+        # and the summary tables
+        removed = [{
+            'user_id': tx.user_id, 'goal_id': tx.goal_id, 'transaction_type': tx.transaction_type,
+            'amount': -tx.amount, 'created_at': tx.created_at, 'count': -1
+        } for tx in txs if tx.amount is not None]
+        apply_goal_deltas(goal_deltas(removed))
+        record_transactions(removed)
+
+        bump_versions({tx.user_id for tx in txs}, {tx.goal_id for tx in txs})
+        Transaction.query.filter_by(transaction_type='manual_contribution').delete(synchronize_session=False)
+        db.session.commit()
+        print(f"Removed {count} manual_contribution transactions and updated goal balances.")
+
+@bp.cli.command('import-contributions')
+@click.option('--user', 'username', required=True, help='Username the contributions belong to.')
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson']), default='ndjson')
+@click.option('--batch-size', type=int, default=None, help='Items per transaction (default BULK_MAX_ITEMS).')
+def import_contributions(username, fmt, batch_size):
+    """Bulk-import contributions from CSV or NDJSON on stdin."""
+    user = User.query.filter_by(username=username).first()
+    if not user:
+        raise click.ClickException(f"Unknown user {username!r}")
+    batch_size = batch_size or current_app.config['BULK_MAX_ITEMS']
+
+    started = time.perf_counter()
+    accepted = rejected = 0
+    batch = []
+    records = parse_records(sys.stdin, fmt)
+    while True:
+        item = next(records, None)
+        if item is not None:
+            batch.append(item)
+        if batch and (item is None or len(batch) >= batch_size):
+            summary = ingest_contributions(user.id, batch)
+            accepted += summary['accepted']
+            rejected += summary['rejected']
+            for result in summary['results']:
+                if result['status'] == 'error':
+                    print(f"item {accepted + rejected - len(batch) + result['index']}: {result['error']}", file=sys.stderr)
+            batch = []
+        if item is None:
+            break
+
+    elapsed = time.perf_counter() - started
+    print(f"Imported {accepted} contributions ({rejected} rejected) in {elapsed:.2f}s "
+          f"({(accepted + rejected) / elapsed if elapsed else 0:.0f} items/s).")
+
+@bp.cli.command('rebuild-stats')
+def rebuild_stats_command():
+    """Recompute goal_stats/user_stats from the transactions table."""
+    rebuild_stats()
+    db.session.commit()
+    print('Rebuilt savings statistics.')
+
+@bp.cli.command('reconcile-ledger')
+@click.option('--incremental', is_flag=True, help='Only goals with transactions since the last clean run.')
+@click.option('--since', type=click.DateTime(), default=None, help='Only goals with transactions created after this time.')
+@click.option('--repair', is_flag=True, help='Correct drifted balances to the sum of their transactions.')
+@click.option('--chunk-size', type=int, default=None, help='Rows fetched per chunk (default RECONCILE_CHUNK_SIZE).')
+@click.option('--show', type=int, default=20, help='Number of drifted goals to list.')
+def reconcile_ledger(incremental, since, repair, chunk_size, show):
+    """Verify goal balances against their transactions."""
+    summary = run_reconciliation(incremental=incremental, since=since, repair=repair, chunk_size=chunk_size)
+    scope = f"since {summary['since']:%Y-%m-%d %H:%M:%S}" if summary['since'] else 'all goals'
+    print(f"Checked {summary['checked']} goals ({scope}) in {summary['elapsed_ms']:.0f} ms: "
+          f"{summary['drifted']} drifted, total drift {summary['total_drift']}, {summary['repaired']} repaired.")
+    for d in summary['goals'][:show]:
+        print(f"  goal {d['goal_id']} (user {d['user_id']}): balance {d['balance']}, "
+              f"transactions {d['ledger']}, drift {d['drift']}")
+    if summary['drifted'] > summary['repaired']:
+        sys.exit(1)
+
+@bp.cli.command('create-partitions')
+@click.option('--months-ahead', type=click.IntRange(min=0), default=None,
+              help='Months after the current one to create (default TRANSACTION_PARTITIONS_AHEAD).')
+def create_partitions_command(months_ahead):
+    """Create the upcoming monthly partitions of the transactions table (Postgres)."""
+    if months_ahead is None:
+        months_ahead = current_app.config['TRANSACTION_PARTITIONS_AHEAD']
+    created = create_partitions(months_ahead)
+    if created is None:
+        print('The transactions table is not partitioned (SQLite, or run flask db upgrade); nothing to do.')
+        return
+    for name in created:
+        print(f"  {name}")
+    print(f"Created {len(created)} partitions.")
+
+@bp.cli.command('archive-transactions')
+@click.option('--older-than', type=click.IntRange(min=1), default=None,
+              help='Archive months that ended this many months ago (default TRANSACTION_ARCHIVE_AFTER_MONTHS).')
+@click.option('--output', type=click.Path(file_okay=False), default=None,
+              help='Folder for the archive files (default TRANSACTION_ARCHIVE_FOLDER).')
+@click.option('--dry-run', is_flag=True, help='Only list the months that would be archived.')
+def archive_transactions_command(older_than, output, dry_run):
+    """Move old months of transactions to compressed archive files."""
+    config = current_app.config
+    folder = output or config['TRANSACTION_ARCHIVE_FOLDER'] or os.path.join(current_app.instance_path, 'transaction-archive')
+    if not dry_run:
+        os.makedirs(folder, exist_ok=True)
+    summary = archive_transactions(older_than or config['TRANSACTION_ARCHIVE_AFTER_MONTHS'], folder,
+                                   config['TRANSACTION_ARCHIVE_ROW_GROUP'], dry_run=dry_run)
+    for month in summary['months']:
+        print(f"  {month['month']}: {month['rows']} transactions, total {month['amount_total']}"
+              + (f" -> {os.path.join(folder, month['file'])}" if 'file' in month else ''))
+    print(f"{'Would archive' if dry_run else 'Archived'} {len(summary['months'])} months "
+          f"before {summary['cutoff']:%Y-%m}.")
+
+@bp.cli.command('forecast-goals')
+@click.option('--workers', type=int, default=None, help='Worker processes, one user_id shard each (default: CPU count).')
+@click.option('--batch-size', type=int, default=None, help='Users per query/commit (default FORECAST_BATCH_SIZE).')
+def forecast_goals_command(workers, batch_size):
+    """Precompute goal completion forecasts for every user."""
+    summary = precompute_forecasts(current_app._get_current_object(), workers or os.cpu_count() or 1,
+                                   batch_size or current_app.config['FORECAST_BATCH_SIZE'])
+    print(f"Forecast {summary['goals']} goals for {summary['users']} users with "
+          f"{summary['workers']} worker(s) in {summary['elapsed_s']:.2f}s.")
+
+@bp.cli.command('cleanup-uploads')
+@click.option('--dry-run', is_flag=True, help='Only list the files that would be deleted.')
+@click.option('--min-age-hours', type=float, default=None, help='Keep newer files (default UPLOAD_ORPHAN_MIN_AGE_HOURS).')
+def cleanup_uploads(dry_run, min_age_hours):
+    """Delete uploaded images (and thumbnails) that no goal references."""
+    if min_age_hours is None:
+        min_age_hours = current_app.config['UPLOAD_ORPHAN_MIN_AGE_HOURS']
+    removed = cleanup_orphans(current_app.config['UPLOAD_FOLDER'], min_age_hours * 3600, dry_run=dry_run)
+    for name in removed:
+        print(f"  {name}")
+    print(f"{'Would delete' if dry_run else 'Deleted'} {len(removed)} orphaned upload files.")
+
+@bp.cli.command('sweep-sessions')
+@click.option('--batch-size', type=int, default=None, help='Rows deleted per transaction (default SESSION_SWEEP_BATCH_SIZE).')
+def sweep_sessions(batch_size):
+    """Delete expired user sessions."""
+    deleted = session_store.sweep(batch_size)
+    print(f'Deleted {deleted} expired sessions.')
+
+@bp.cli.command('revoke-sessions')
+@click.option('--user', 'username', required=True, help='Username whose sessions are revoked.')
+def revoke_sessions(username):
+    """Log a user out everywhere."""
+    user = User.query.filter_by(username=username).first()
+    if user is None:
+        raise click.ClickException(f"Unknown user {username!r}")
+    deleted = session_store.revoke_user(user.id)
+    print(f'Revoked {deleted} sessions for {username}.')
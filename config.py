@@ -1,11 +1,56 @@
 import os
 from decimal import Decimal
+from sqlalchemy.pool import NullPool
+
+
+def engine_options(uri):
+    """
+    SQLALCHEMY_ENGINE_OPTIONS for the given database URL, tuned from the environment.
+
+    Postgres: each worker process gets DB_MAX_CONNECTIONS / WEB_CONCURRENCY connections
+    (pool + overflow) unless DB_POOL_SIZE is set, connections are pinged before use and
+    recycled, and every statement runs under DB_STATEMENT_TIMEOUT_MS. With DB_PGBOUNCER=true
+    the app keeps no pool of its own (PgBouncer pools) and sends no startup options, which
+    transaction pooling doesn't allow; set statement_timeout on the database role instead.
+    SQLite: wait up to SQLITE_BUSY_TIMEOUT_MS for locks (pragmas are applied on connect).
+    """
+    if uri.startswith("sqlite"):
+        return {"connect_args": {"timeout": int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000")) / 1000}}
+
+    connect_args = {"connect_timeout": int(os.environ.get("DB_CONNECT_TIMEOUT", "10"))}
+    if os.environ.get("DB_PGBOUNCER", "false").lower() == "true":
+        return {"poolclass": NullPool, "connect_args": connect_args}
+
+    statement_timeout = int(os.environ.get("DB_STATEMENT_TIMEOUT_MS", "30000"))
+    if statement_timeout:
+        connect_args["options"] = f"-c statement_timeout={statement_timeout}"
+
+    max_overflow = int(os.environ.get("DB_MAX_OVERFLOW", "2"))
+    workers = max(1, int(os.environ.get("WEB_CONCURRENCY", "1")))  # gunicorn worker processes
+    budget = int(os.environ.get("DB_MAX_CONNECTIONS", "20"))  # connections this app may hold in total
+    pool_size = int(os.environ.get("DB_POOL_SIZE") or max(1, budget // workers - max_overflow))
+    return {
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": int(os.environ.get("DB_POOL_TIMEOUT", "10")),
+        "pool_recycle": int(os.environ.get("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": os.environ.get("DB_POOL_PRE_PING", "true").lower() == "true",
+        "pool_use_lifo": True,  # idle surplus connections age out via pool_recycle
+        "connect_args": connect_args,
+    }
 
 
 class Config:
     # Database: Render will inject DATABASE_URL (use SSL mode if required)
     SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL", "sqlite:///local.db")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+
+    # SQLite profile (local/dev): WAL lets readers run alongside the single writer
+    SQLITE_JOURNAL_MODE = os.environ.get("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    SQLITE_MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
 
     # Round-up configuration
     # mode: 'fixed' => always add FIXED_ROUND_UP_STEP
@@ -21,5 +66,119 @@ class Config:
         "Aggressive": Decimal(os.environ.get("PACE_BONUS_AGGRESSIVE", "1.50")),
     }
 
+    # Recurring rules are executed in chunks of this many rules, one commit per chunk
+    RECURRING_BATCH_SIZE = int(os.environ.get("RECURRING_BATCH_SIZE", "1000"))
+    # Number of user_id shards (one worker thread each) used by the scheduler
+    RECURRING_SHARDS = int(os.environ.get("RECURRING_SHARDS", "1"))
+    # In-process scheduler: run due rules every RECURRING_SCHEDULER_INTERVAL seconds
+    RECURRING_SCHEDULER_ENABLED = os.environ.get("RECURRING_SCHEDULER_ENABLED", "false").lower() == "true"
+    RECURRING_SCHEDULER_INTERVAL = int(os.environ.get("RECURRING_SCHEDULER_INTERVAL", "300"))
+
+    # Transaction history paging: max page size and rows fetched per round trip when streaming NDJSON
+    PAGINATION_MAX_LIMIT = int(os.environ.get("PAGINATION_MAX_LIMIT", "500"))
+    STREAM_YIELD_PER = int(os.environ.get("STREAM_YIELD_PER", "1000"))
+
+    # Per-user response cache for goal/rule listings: 'memory', 'redis' or 'none'
+    CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "memory")
+    CACHE_TTL = int(os.environ.get("CACHE_TTL", "60"))
+    CACHE_MAX_ENTRIES = int(os.environ.get("CACHE_MAX_ENTRIES", "10000"))
+    CACHE_REDIS_URL = os.environ.get("CACHE_REDIS_URL", "redis://localhost:6379/0")
+
+    # Activity logging: records are queued and bulk-inserted by a background thread
+    ACTIVITY_LOG_ENABLED = os.environ.get("ACTIVITY_LOG_ENABLED", "true").lower() == "true"
+    ACTIVITY_LOG_SAMPLE_RATE = float(os.environ.get("ACTIVITY_LOG_SAMPLE_RATE", "1.0"))
+    ACTIVITY_LOG_QUEUE_SIZE = int(os.environ.get("ACTIVITY_LOG_QUEUE_SIZE", "10000"))
+    ACTIVITY_LOG_BATCH_SIZE = int(os.environ.get("ACTIVITY_LOG_BATCH_SIZE", "500"))
+    ACTIVITY_LOG_FLUSH_INTERVAL = float(os.environ.get("ACTIVITY_LOG_FLUSH_INTERVAL", "2.0"))
+    ACTIVITY_LOG_MAX_DATA = int(os.environ.get("ACTIVITY_LOG_MAX_DATA", "1000"))  # chars kept of request/response bodies
+
+    # Instrumentation: /metrics (Prometheus text format), optional Server-Timing headers,
+    # and warnings for requests over the query-count or latency budget
+    METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_SERVER_TIMING = os.environ.get("METRICS_SERVER_TIMING", "false").lower() == "true"
+    METRICS_LOG_OVER_BUDGET = os.environ.get("METRICS_LOG_OVER_BUDGET", "false").lower() == "true"
+    METRICS_QUERY_BUDGET = int(os.environ.get("METRICS_QUERY_BUDGET", "20"))
+    METRICS_LATENCY_BUDGET_MS = float(os.environ.get("METRICS_LATENCY_BUDGET_MS", "500"))
+
+    # Maximum items per bulk contribution request / import transaction, and body size of a
+    # bulk contribution or expense request
+    BULK_MAX_ITEMS = int(os.environ.get("BULK_MAX_ITEMS", "10000"))
+    BULK_MAX_BYTES = int(os.environ.get("BULK_MAX_BYTES", str(16 * 1024 * 1024)))
+    # Per-process index of guilty-pleasure trigger categories used by expense ingestion; rule
+    # changes are broadcast to all workers over PUBSUB_BACKEND, the TTL bounds a lost message
+    TRIGGER_INDEX_TTL = float(os.environ.get("TRIGGER_INDEX_TTL", "300"))
+    TRIGGER_INDEX_MAX_USERS = int(os.environ.get("TRIGGER_INDEX_MAX_USERS", "10000"))
+
+    # Server-side sessions (user_sessions table); valid tokens are cached per process for
+    # SESSION_CACHE_TTL seconds and revocations are broadcast to all workers over PUBSUB_BACKEND
+    SESSION_LIFETIME = int(os.environ.get("SESSION_LIFETIME", str(14 * 24 * 3600)))  # seconds
+    SESSION_CACHE_TTL = float(os.environ.get("SESSION_CACHE_TTL", "30"))
+    SESSION_CACHE_MAX_ENTRIES = int(os.environ.get("SESSION_CACHE_MAX_ENTRIES", "50000"))
+    SESSION_SWEEPER_ENABLED = os.environ.get("SESSION_SWEEPER_ENABLED", "true").lower() == "true"
+    SESSION_SWEEP_INTERVAL = float(os.environ.get("SESSION_SWEEP_INTERVAL", "600"))
+    SESSION_SWEEP_BATCH_SIZE = int(os.environ.get("SESSION_SWEEP_BATCH_SIZE", "1000"))
+    # "auto": Postgres LISTEN/NOTIFY when DATABASE_URL is Postgres, else in-process; "local" forces in-process
+    PUBSUB_BACKEND = os.environ.get("PUBSUB_BACKEND", "auto")
+    # LISTEN needs a session-level connection: point this at Postgres directly when DATABASE_URL is PgBouncer
+    PUBSUB_DATABASE_URL = os.environ.get("PUBSUB_DATABASE_URL")
+    # gunicorn workers (gunicorn.conf.py): "gthread" with WEB_THREADS threads per process,
+    # or "gevent" (needs gevent installed)
+    WEB_WORKER_CLASS = os.environ.get("WEB_WORKER_CLASS", "gthread")
+    WEB_THREADS = int(os.environ.get("WEB_THREADS", "100"))
+    # Live goal events (GET /api/events, Server-Sent Events): heartbeat interval, how long a
+    # stream stays open before the browser reconnects, events buffered per stream before a
+    # slow client is told to resync, and open streams allowed per worker process. Each stream
+    # holds a worker thread, so under gthread they get at most 3/4 of WEB_THREADS by default
+    # and the rest stay free for ordinary requests
+    EVENTS_HEARTBEAT_SECONDS = float(os.environ.get("EVENTS_HEARTBEAT_SECONDS", "25"))
+    EVENTS_MAX_AGE_SECONDS = float(os.environ.get("EVENTS_MAX_AGE_SECONDS", "3600"))
+    EVENTS_BUFFER_SIZE = int(os.environ.get("EVENTS_BUFFER_SIZE", "100"))
+    EVENTS_MAX_STREAMS = int(os.environ.get("EVENTS_MAX_STREAMS")
+                             or (5000 if WEB_WORKER_CLASS == "gevent" else max(1, WEB_THREADS * 3 // 4)))
+
+    # Ledger reconciliation (flask reconcile-ledger): rows streamed per chunk, and how far
+    # before the last watermark incremental runs look to catch late-committed transactions
+    RECONCILE_CHUNK_SIZE = int(os.environ.get("RECONCILE_CHUNK_SIZE", "5000"))
+    RECONCILE_OVERLAP_SECONDS = int(os.environ.get("RECONCILE_OVERLAP_SECONDS", "300"))
+
+    # Transactions are range-partitioned by month on Postgres: flask create-partitions keeps
+    # TRANSACTION_PARTITIONS_AHEAD months ready, flask archive-transactions exports months older
+    # than TRANSACTION_ARCHIVE_AFTER_MONTHS to TRANSACTION_ARCHIVE_FOLDER (default: instance folder)
+    TRANSACTION_PARTITIONS_AHEAD = int(os.environ.get("TRANSACTION_PARTITIONS_AHEAD", "3"))
+    TRANSACTION_ARCHIVE_AFTER_MONTHS = int(os.environ.get("TRANSACTION_ARCHIVE_AFTER_MONTHS", "24"))
+    TRANSACTION_ARCHIVE_FOLDER = os.environ.get("TRANSACTION_ARCHIVE_FOLDER")
+    TRANSACTION_ARCHIVE_ROW_GROUP = int(os.environ.get("TRANSACTION_ARCHIVE_ROW_GROUP", "50000"))
+
+    # Goal image uploads: stored once per content hash, with thumbnails pre-rendered at these
+    # widths with Pillow (the first one is used by the goal listing)
+    UPLOAD_MAX_BYTES = int(os.environ.get("UPLOAD_MAX_BYTES", str(5 * 1024 * 1024)))
+    UPLOAD_CHUNK_SIZE = int(os.environ.get("UPLOAD_CHUNK_SIZE", str(64 * 1024)))
+    UPLOAD_THUMBNAIL_SIZES = [int(s) for s in os.environ.get("UPLOAD_THUMBNAIL_SIZES", "320,640").split(",")]
+    UPLOAD_ORPHAN_MIN_AGE_HOURS = float(os.environ.get("UPLOAD_ORPHAN_MIN_AGE_HOURS", "24"))
+    # Largest request body Werkzeug accepts (413 while parsing, before anything is buffered).
+    # Image uploads (UPLOAD_MAX_BYTES plus multipart framing) and bulk ingest (BULK_MAX_BYTES)
+    # set their own limit per request
+    MAX_CONTENT_LENGTH = int(os.environ.get("MAX_CONTENT_LENGTH", str(1024 * 1024)))
+
+    # Recent transactions included in /api/dashboard and /api/goals/<id>/overview
+    DASHBOARD_RECENT_TRANSACTIONS = int(os.environ.get("DASHBOARD_RECENT_TRANSACTIONS", "10"))
+    # Upper bound on points per /api/goals/<id>/timeseries response (longer series are downsampled)
+    TIMESERIES_MAX_POINTS = int(os.environ.get("TIMESERIES_MAX_POINTS", "500"))
+
+    # Goal completion forecasts: days of history sampled, simulated paths per goal (with NumPy),
+    # how far ahead to look, and how long forecasts precomputed by flask forecast-goals are served
+    FORECAST_LOOKBACK_DAYS = int(os.environ.get("FORECAST_LOOKBACK_DAYS", "90"))
+    FORECAST_SIMULATIONS = int(os.environ.get("FORECAST_SIMULATIONS", "1000"))
+    FORECAST_HORIZON_DAYS = int(os.environ.get("FORECAST_HORIZON_DAYS", str(5 * 365)))
+    FORECAST_MAX_AGE_HOURS = float(os.environ.get("FORECAST_MAX_AGE_HOURS", "24"))
+    FORECAST_BATCH_SIZE = int(os.environ.get("FORECAST_BATCH_SIZE", "200"))
+    # What-if rule simulations: default projection length and points returned per goal
+    SIMULATION_DAYS = int(os.environ.get("SIMULATION_DAYS", "365"))
+    SIMULATION_MAX_POINTS = int(os.environ.get("SIMULATION_MAX_POINTS", "100"))
+
     # Security (simple demo)
-    SECRET_KEY = os.environ.get("SECRET_KEY", "dev-secret")
\ No newline at end of file
+    SECRET_KEY = os.environ.get("SECRET_KEY", "dev-secret")
+    # werkzeug hash method incl. work factor; stored hashes using another method are upgraded at login
+    PASSWORD_HASH_METHOD = os.environ.get("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+    # Bearer token for /debug/* and /metrics outside debug mode (they answer 404 while unset)
+    INTERNAL_ENDPOINTS_TOKEN = os.environ.get("INTERNAL_ENDPOINTS_TOKEN")
\ No newline at end of file
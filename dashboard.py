@@ -0,0 +1,103 @@
+from flask import current_app
+from sqlalchemy import select
+from extensions import db
+from models import Goal, SavingsRule, Transaction, UserStats
+from pagination import encode_cursor
+from stats import user_summary
+from uploads import thumbnail_url
+
+
+def goal_dict(goal):
+    return {
+        'id': goal.id,
+        'name': goal.name,
+        'target_amount': float(goal.target_amount) if goal.target_amount else None,
+        'current_amount': float(goal.current_amount) if goal.current_amount else 0.0,
+        'progress': float(goal.current_amount / goal.target_amount * 100) if goal.target_amount else 0.0,
+        'description': goal.description,
+        'image_url': goal.image_url,
+        'thumbnail_url': thumbnail_url(goal.image_url),
+        'savings_pace': goal.savings_pace,
+        'created_at': goal.created_at.isoformat() if goal.created_at else None,
+        'completed_at': goal.completed_at.isoformat() if goal.completed_at else None
+    }
+
+
+def active_rules_by_goal(user_id, goal_id=None):
+    """
+    {goal_id: [rule, ...]} for the active rules of the user's active goals (or of one goal).
+    One joined query on (user_id, is_active); cheaper than a selectinload keyed on goal ids.
+    """
+    stmt = (select(SavingsRule).join(Goal, Goal.id == SavingsRule.goal_id)
+            .where(SavingsRule.user_id == user_id, SavingsRule.is_active.is_(True))
+            .order_by(SavingsRule.id))
+    if goal_id is None:
+        stmt = stmt.where(Goal.is_active.is_(True))
+    else:
+        stmt = stmt.where(SavingsRule.goal_id == goal_id)
+    rules = {}
+    for rule in db.session.scalars(stmt):
+        rules.setdefault(rule.goal_id, []).append(rule.to_dict())
+    return rules
+
+
+def recent_transactions(user_id, goal_id=None, limit=None):
+    """Newest transactions first, served by the (user_id[, goal_id], created_at, id) indexes."""
+    stmt = select(Transaction).where(Transaction.user_id == user_id)
+    if goal_id is not None:
+        stmt = stmt.where(Transaction.goal_id == goal_id)
+    stmt = stmt.order_by(Transaction.created_at.desc(), Transaction.id.desc())
+    limit = limit or current_app.config['DASHBOARD_RECENT_TRANSACTIONS']
+    return db.session.scalars(stmt.limit(limit)).all()
+
+
+def dashboard(user_id):
+    """
+    Everything the dashboard renders in one payload: active goals, their active rules
+    (grouped by goal id), recent transactions and savings totals.
+    Costs a fixed number of queries however many goals and rules the user has; the
+    per-type/per-month breakdowns stay on /api/stats.
+    """
+    goals = db.session.scalars(
+        select(Goal).where(Goal.user_id == user_id, Goal.is_active.is_(True)).order_by(Goal.id)
+    ).all()
+    rules_by_goal = active_rules_by_goal(user_id)
+    total_saved = sum(float(g.current_amount or 0) for g in goals)
+    total_target = sum(float(g.target_amount or 0) for g in goals)
+    stats = db.session.get(UserStats, user_id)
+
+    return {
+        'goals': [goal_dict(g) for g in goals],
+        'rules_by_goal': rules_by_goal,
+        'recent_transactions': [t.to_dict() for t in recent_transactions(user_id)],
+        'summary': {
+            'goals': len(goals),
+            'completed_goals': sum(1 for g in goals if g.completed_at),
+            'active_rules': sum(len(r) for r in rules_by_goal.values()),
+            'total_saved': total_saved,
+            'total_target': total_target,
+            'progress': total_saved / total_target * 100 if total_target else 0.0,
+        },
+        'stats': stats.to_dict() if stats else UserStats(tx_count=0, total_saved=0).to_dict(),
+    }
+
+
+def goal_overview(user_id, goal_id):
+    """
+    One goal with its active rules, recent transactions and per-goal stats. None if not the user's.
+    When there may be older transactions, `older_transactions_cursor` pages back through them
+    with GET /api/goals/<id>/transactions?before=<cursor> (then X-Prev-Cursor).
+    """
+    goal = db.session.scalars(select(Goal).where(Goal.id == goal_id, Goal.user_id == user_id)).first()
+    if goal is None:
+        return None
+
+    recent = recent_transactions(user_id, goal.id)
+    more = len(recent) == current_app.config['DASHBOARD_RECENT_TRANSACTIONS']
+    return {
+        'goal': goal_dict(goal),
+        'rules': active_rules_by_goal(user_id, goal.id).get(goal.id, []),
+        'recent_transactions': [t.to_dict() for t in recent],
+        'older_transactions_cursor': encode_cursor(recent[-1]) if more else None,
+        'stats': user_summary(user_id, goal.id),
+    }
@@ -0,0 +1,46 @@
+from flask import Blueprint, current_app, jsonify
+from auth import internal_access_allowed
+from events import live_events
+from extensions import cache
+from models import User
+from sessions import session_store
+
+bp = Blueprint('debug', __name__)
+
+
+@bp.before_request
+def require_internal_access():
+    if not internal_access_allowed():
+        return jsonify({"error": "Not found"}), 404
+
+
+@bp.route('/debug/users')
+def debug_users():
+    """Debug endpoint to check users in database"""
+    users = User.query.all()
+    return jsonify([{
+        'id': u.id,
+        'username': u.username,
+        'email': u.email
+    } for u in users])
+
+@bp.route('/debug/activity-log')
+def debug_activity_log():
+    """Debug endpoint with activity log writer counters"""
+    writer = current_app.extensions.get('activity_log')
+    return jsonify(writer.stats() if writer else {"enabled": False})
+
+@bp.route('/debug/cache')
+def debug_cache():
+    """Debug endpoint with response cache counters"""
+    return jsonify(cache.stats())
+
+@bp.route('/debug/sessions')
+def debug_sessions():
+    """Debug endpoint with session store counters"""
+    return jsonify(session_store.stats())
+
+@bp.route('/debug/events')
+def debug_events():
+    """Debug endpoint with live event stream counters"""
+    return jsonify(live_events.stats())
@@ -0,0 +1,193 @@
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from sessions import REVOKE_CHANNEL, token_hash
+
+CHANNEL = 'live_events'
+PENDING = 'live_events'  # Session.info key for events waiting for the commit
+MAX_PAYLOAD = 7900  # NOTIFY payloads must stay under 8000 bytes
+RETRY_MS = 5000  # browser reconnect delay
+
+
+def queue_event(session, user_id, name, data, instance=None):
+    """
+    Publish an event to the user's open streams once `session` commits; dropped on
+    rollback. `instance` is a row being inserted whose primary key is added as `id`.
+    """
+    if user_id is not None:
+        session.info.setdefault(PENDING, []).append((user_id, name, data, instance))
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_pending(session):
+    pending = session.info.pop(PENDING, None)
+    if not pending or not has_app_context():
+        return
+    by_user = defaultdict(list)
+    for user_id, name, data, instance in pending:
+        if instance is not None:
+            identity = inspect(instance).identity  # known after the flush, no reload needed
+            data = dict(data, id=identity[0] if identity else None)
+        by_user[user_id].append(dict(data, event=name))
+
+    payloads = []
+    for user_id, events in by_user.items():
+        payload = f'{user_id}:{json.dumps(events, default=str, separators=(",", ":"))}'
+        if len(payload.encode()) > MAX_PAYLOAD:
+            payload = f'{user_id}:[{{"event":"resync"}}]'
+        payloads.append(payload)
+    try:
+        current_app.extensions['pubsub'].publish_many(CHANNEL, payloads)
+    except Exception:
+        # The data is committed; streams catch up on their next resync or reconnect
+        current_app.logger.exception("Publishing live events failed")
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending(session):
+    session.info.pop(PENDING, None)
+
+
+def sse_frame(name, data):
+    return f'event: {name}\ndata: {json.dumps(data, separators=(",", ":"))}\n\n'
+
+
+class Stream:
+    """One open event stream: a bounded buffer of SSE frames and a wakeup flag."""
+
+    __slots__ = ('user_id', 'token', 'frames', 'wakeup', 'closed', 'overflowed')
+
+    def __init__(self, user_id, token, size):
+        self.user_id = user_id
+        self.token = token  # hash of the session token, to end the stream on revocation
+        self.frames = deque(maxlen=size)
+        self.wakeup = threading.Event()
+        self.closed = False
+        self.overflowed = False
+
+    def push(self, frame):
+        if len(self.frames) == self.frames.maxlen:
+            self.overflowed = True
+        self.frames.append(frame)
+        self.wakeup.set()
+
+    def close(self):
+        self.closed = True
+        self.wakeup.set()
+
+
+class EventHub:
+    """
+    Fans live balance/transaction events out to the open streams of this process.
+
+    Publishers go through the pub/sub broker (Postgres NOTIFY across workers), and the hub
+    holds a single subscription per process however many streams are open. A message is
+    routed by the user id in front of its payload and parsed only when that user has a
+    stream here. An idle stream is a small buffer plus an Event its request thread (or
+    greenlet) sleeps on, waking for heartbeats; nothing polls the database. A stream
+    whose buffer overflows gets a resync event and the client refetches.
+    """
+
+    def __init__(self, app=None):
+        self.streams = {}  # user_id -> set of Streams
+        self.count = 0
+        self.lock = threading.Lock()
+        self.counters = {'opened': 0, 'rejected': 0, 'messages': 0, 'delivered': 0, 'overflows': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.heartbeat = app.config['EVENTS_HEARTBEAT_SECONDS']
+        self.max_age = app.config['EVENTS_MAX_AGE_SECONDS']
+        self.buffer_size = app.config['EVENTS_BUFFER_SIZE']
+        self.max_streams = app.config['EVENTS_MAX_STREAMS']
+        self.broker = app.extensions['pubsub']
+        self.broker.subscribe(CHANNEL, self._on_message)
+        self.broker.subscribe(REVOKE_CHANNEL, self._on_revoked)
+        app.extensions['live_events'] = self
+
+    def open(self, user_id, token):
+        """Register a stream for the user, or None when this process is at EVENTS_MAX_STREAMS."""
+        stream = Stream(user_id, token_hash(token) if token else None, self.buffer_size)
+        with self.lock:
+            if self.count >= self.max_streams:
+                self.counters['rejected'] += 1
+                return None
+            self.streams.setdefault(user_id, set()).add(stream)
+            self.count += 1
+            self.counters['opened'] += 1
+        self.broker.ensure_started()
+        return stream
+
+    def close(self, stream):
+        stream.close()
+        with self.lock:
+            streams = self.streams.get(stream.user_id)
+            if streams is not None and stream in streams:
+                streams.remove(stream)
+                self.count -= 1
+                if not streams:
+                    del self.streams[stream.user_id]
+
+    def generate(self, stream):
+        """
+        SSE body for a stream. Comments are sent every EVENTS_HEARTBEAT_SECONDS so proxies
+        keep the connection and dead clients are noticed; after EVENTS_MAX_AGE_SECONDS the
+        stream ends and the browser reconnects, re-checking the session.
+        """
+        deadline = time.monotonic() + self.max_age
+        yield f'retry: {RETRY_MS}\n' + sse_frame('ready', {'heartbeat': self.heartbeat})
+        while not stream.closed:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            if not stream.wakeup.wait(min(self.heartbeat, remaining)):
+                yield ': keepalive\n\n'
+                continue
+            stream.wakeup.clear()
+            if stream.overflowed:
+                stream.overflowed = False
+                stream.frames.clear()
+                self.counters['overflows'] += 1
+                yield sse_frame('resync', {})
+                continue
+            frames = []
+            while stream.frames:
+                frames.append(stream.frames.popleft())
+            if frames:
+                yield ''.join(frames)
+
+    def _on_message(self, payload):
+        user_id, _, events = payload.partition(':')
+        self.counters['messages'] += 1
+        streams = self.streams.get(int(user_id))
+        if not streams:
+            return
+        frame = ''.join(sse_frame(e.pop('event'), e) for e in json.loads(events))
+        with self.lock:
+            streams = list(streams)
+        for stream in streams:
+            stream.push(frame)
+        self.counters['delivered'] += len(streams)
+
+    def _on_revoked(self, payload):
+        kind, _, value = payload.partition(':')
+        with self.lock:
+            if kind == 'token':
+                doomed = [s for streams in self.streams.values() for s in streams if s.token == value]
+            else:
+                doomed = list(self.streams.get(int(value), ()))
+        for stream in doomed:
+            self.close(stream)
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counters, streams=self.count, users=len(self.streams))
+
+
+live_events = EventHub()
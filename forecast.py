@@ -0,0 +1,357 @@
+import math
+import multiprocessing
+import statistics
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from flask import current_app
+from sqlalchemy import case, func, select
+from extensions import db, dialect_insert
+from models import Goal, GoalForecast, SavingsRule, Transaction, User
+from recurring import RECURRING_INTERVALS
+from timeseries import as_datetime, time_bucket
+
+PERCENTILES = (10, 50, 90)
+# Completion-day percentile -> z-score of cumulative savings (p10 = optimistic, p90 = pessimistic)
+Z_SCORES = {10: 1.2816, 50: 0.0, 90: -1.2816}
+# Days simulated per step; blocks of goals are sized so one step stays around this many cells
+SIMULATION_CHUNK_DAYS = 30
+SIMULATION_CELLS = 4_000_000
+
+_fallback_logged = False  # the missing-NumPy warning is logged once per process
+
+
+def forecast_inputs(user_ids, now, config):
+    """
+    Everything the model needs for the active goals of `user_ids`, in three queries:
+    the goals, their active recurring rules, and daily totals of the unscheduled
+    contributions over the last FORECAST_LOOKBACK_DAYS (round-ups counted separately
+    so they can be valued at the goal's current pace bonus).
+    """
+    lookback = config['FORECAST_LOOKBACK_DAYS']
+    start = (now - timedelta(days=lookback - 1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    goals = db.session.scalars(
+        select(Goal).where(Goal.user_id.in_(user_ids), Goal.is_active.is_(True)).order_by(Goal.id)
+    ).all()
+    inputs = {g.id: {
+        'goal': g,
+        'remaining': float(g.target_amount - g.current_amount),
+        # New goals sample only the days they existed (at least a week)
+        'window': min(lookback, max(7, (now - g.created_at).days + 1)) if g.created_at else lookback,
+        'other': [0.0] * lookback,
+        'round_ups': [0] * lookback,
+        'round_up_total': 0.0,
+        'rules': {},  # rule id -> rule_schedule()
+    } for g in goals}
+
+    rules = db.session.scalars(
+        select(SavingsRule).where(SavingsRule.user_id.in_(user_ids), SavingsRule.rule_type == 'recurring',
+                                  SavingsRule.is_active.is_(True))
+    )
+    for rule in rules:
+        if rule.goal_id not in inputs or rule.frequency not in RECURRING_INTERVALS:
+            continue
+        inputs[rule.goal_id]['rules'][rule.id] = rule_schedule(rule, now)
+
+    is_round_up = Transaction.transaction_type == 'round_up'
+    day = time_bucket(Transaction.created_at, 'day')
+    rows = db.session.execute(
+        select(Transaction.goal_id, day,
+               func.sum(case((is_round_up, 0), else_=Transaction.amount)),
+               func.sum(case((is_round_up, 1), else_=0)),
+               func.sum(case((is_round_up, Transaction.amount), else_=0)))
+        .where(Transaction.user_id.in_(user_ids), Transaction.created_at >= start,
+               Transaction.transaction_type != 'recurring')  # recurring is modelled from the rules
+        .group_by(Transaction.goal_id, day)
+    )
+    for goal_id, bucket, other, round_ups, round_up_total in rows:
+        index = (as_datetime(bucket) - start).days
+        if goal_id in inputs and 0 <= index < lookback:
+            inputs[goal_id]['other'][index] += float(other or 0)
+            inputs[goal_id]['round_ups'][index] += int(round_ups or 0)
+            inputs[goal_id]['round_up_total'] += float(round_up_total or 0)
+
+    for item in inputs.values():
+        item['daily'] = [o + n * round_up_value(item, config)
+                         for o, n in zip(item['other'], item['round_ups'])][-item['window']:]
+    return list(inputs.values())
+
+
+def rule_schedule(rule, now):
+    """(first day, step in days, amount) of a recurring rule's deposits from `now` on."""
+    interval = RECURRING_INTERVALS[rule.frequency]
+    first = 0
+    if rule.last_executed is not None:
+        first = max(0, math.ceil((rule.last_executed + interval - now) / timedelta(days=1)))
+    return first, interval.days, float(rule.amount)
+
+
+def round_up_value(item, config):
+    """What one future round-up is worth to this goal: the fixed step plus the current pace bonus."""
+    bonus = float(config['PACE_BONUS'].get(item['goal'].savings_pace, Decimal('0')))
+    if config['ROUND_UP_MODE'] == 'fixed':
+        return float(config['FIXED_ROUND_UP_STEP']) + bonus
+    count = sum(item['round_ups'])
+    return item['round_up_total'] / count if count else bonus
+
+
+def schedule(item, horizon):
+    """Scheduled (recurring) savings per day for the next `horizon` days."""
+    days = [0.0] * horizon
+    for first, step, amount in item['rules'].values():
+        for d in range(first, horizon, step):
+            days[d] += amount
+    return days
+
+
+def simulate_numpy(np, items, horizon, simulations, rng):
+    """
+    Monte-Carlo completion days for a block of goals at once.
+
+    Every path draws each future day's unscheduled savings from the goal's own
+    history (bootstrap) and adds the scheduled rule deposits; days are simulated
+    SIMULATION_CHUNK_DAYS at a time as (goals x paths x days) arrays until every
+    path has reached its target or the horizon. Returns (percentile days, probability).
+    """
+    count = len(items)
+    width = max(len(i['daily']) for i in items)
+    history = np.zeros((count, width))
+    windows = np.array([len(i['daily']) for i in items])
+    for g, item in enumerate(items):
+        history[g, width - windows[g]:] = item['daily']
+    scheduled = np.array([schedule(i, horizon) for i in items])
+    remaining = np.array([i['remaining'] for i in items])
+
+    saved = np.zeros((count, simulations))
+    reached = np.full((count, simulations), -1)
+    # Only goals with unfinished paths are simulated; goals that can't get there even at
+    # their best historical day every day are left unreached without simulating
+    active = np.flatnonzero(history.max(axis=1) * horizon + scheduled.sum(axis=1) >= remaining)
+    for day in range(0, horizon, SIMULATION_CHUNK_DAYS):
+        if not active.size:
+            break
+        days = min(SIMULATION_CHUNK_DAYS, horizon - day)
+        picks = ((width - windows[active])[:, None, None]
+                 + (rng.random((active.size, simulations, days)) * windows[active, None, None]).astype(np.int64))
+        daily = history[active[:, None, None], picks] + scheduled[active, None, day:day + days]
+        path = saved[active, :, None] + np.cumsum(daily, axis=2)
+        hit = path >= remaining[active, None, None]
+        first = np.where(hit.any(axis=2), day + hit.argmax(axis=2) + 1, -1)
+        reached[active] = np.where(reached[active] < 0, first, reached[active])
+        saved[active] = path[:, :, -1]
+        active = active[(reached[active] < 0).any(axis=1)]
+
+    ordered = np.sort(np.where(reached < 0, np.inf, reached), axis=1)
+    ranks = [min(simulations - 1, math.ceil(p / 100 * simulations) - 1) for p in PERCENTILES]
+    return ordered[:, ranks].tolist(), (reached >= 0).mean(axis=1).tolist()
+
+
+def simulate_normal(items, horizon):
+    """
+    Pure-Python fallback without NumPy: the sum of t bootstrapped days is approximately
+    normal (mean t*mu, sd sigma*sqrt(t)), so each percentile is the first day where
+    scheduled + mu*t + z*sigma*sqrt(t) reaches the target. Same inputs and outputs
+    as simulate_numpy.
+    """
+    percentiles, probabilities = [], []
+    for item in items:
+        mu = statistics.fmean(item['daily'])
+        sigma = statistics.pstdev(item['daily'])
+        deposits = schedule(item, horizon)
+        scheduled = 0.0
+        days = {p: math.inf for p in PERCENTILES}
+        for t, deposit in enumerate(deposits, start=1):
+            scheduled += deposit
+            for p in PERCENTILES:
+                if days[p] == math.inf and scheduled + mu * t + Z_SCORES[p] * sigma * math.sqrt(t) >= item['remaining']:
+                    days[p] = t
+            if days[PERCENTILES[-1]] != math.inf:
+                break
+        shortfall = item['remaining'] - sum(deposits) - mu * horizon
+        if sigma:
+            probability = 0.5 * math.erfc(shortfall / (sigma * math.sqrt(2 * horizon)))
+        else:
+            probability = 1.0 if shortfall <= 0 else 0.0
+        percentiles.append([days[p] for p in PERCENTILES])
+        probabilities.append(probability)
+    return percentiles, probabilities
+
+
+def log_degraded():
+    global _fallback_logged
+    if not _fallback_logged:
+        _fallback_logged = True
+        current_app.logger.warning("NumPy is not installed: goal forecasts use the normal approximation "
+                                   "instead of Monte-Carlo (pip install -r requirements.txt)")
+
+
+def forecast_goals(user_ids, now=None, config=None):
+    """
+    Projected completion dates for every active goal of `user_ids`.
+
+    Returns one dict per goal with the p10/p50/p90 completion dates (None past
+    FORECAST_HORIZON_DAYS), the probability of finishing within the horizon and
+    the expected daily savings. Uses NumPy Monte-Carlo; without NumPy it degrades
+    to the normal approximation (method 'normal', flagged `degraded` in responses).
+    """
+    now = now or datetime.utcnow()
+    config = config or current_app.config
+    horizon = config['FORECAST_HORIZON_DAYS']
+    simulations = config['FORECAST_SIMULATIONS']
+    items = forecast_inputs(user_ids, now, config)
+    pending = [i for i in items if i['remaining'] > 0]
+
+    try:
+        import numpy as np  # in requirements.txt; vectorized Monte-Carlo
+    except ImportError:
+        np = None
+        log_degraded()
+
+    method = 'monte_carlo' if np is not None else 'normal'
+    results = {}
+    if pending and np is not None:
+        rng = np.random.default_rng(now.toordinal())  # stable within a day
+        block = max(1, SIMULATION_CELLS // (simulations * SIMULATION_CHUNK_DAYS))
+        for i in range(0, len(pending), block):
+            chunk = pending[i:i + block]
+            days, probabilities = simulate_numpy(np, chunk, horizon, simulations, rng)
+            results.update((item['goal'].id, r) for item, r in zip(chunk, zip(days, probabilities)))
+    elif pending:
+        days, probabilities = simulate_normal(pending, horizon)
+        results.update((item['goal'].id, r) for item, r in zip(pending, zip(days, probabilities)))
+
+    today = now.date()
+    forecasts = []
+    for item in items:
+        goal = item['goal']
+        scheduled_daily = sum(amount / step for _, step, amount in item['rules'].values())
+        forecast = {
+            'goal_id': goal.id,
+            'user_id': goal.user_id,
+            'goal_version': goal.version,
+            'method': method,
+            'remaining': round(max(item['remaining'], 0.0), 2),
+            'daily_rate': round(statistics.fmean(item['daily']) + scheduled_daily, 2),
+        }
+        if goal.id in results:
+            days, probability = results[goal.id]
+            forecast['probability'] = round(probability, 3)
+            for p, d in zip(PERCENTILES, days):
+                forecast[f'p{p}'] = today + timedelta(days=int(d)) if d != math.inf else None
+        else:
+            done = (goal.completed_at or now).date()
+            forecast['probability'] = 1.0
+            forecast.update({f'p{p}': done for p in PERCENTILES})
+        forecasts.append(forecast)
+    return forecasts
+
+
+def forecast_dict(forecast):
+    """JSON shape of a forecast (a forecast_goals dict or a GoalForecast row)."""
+    get = forecast.get if isinstance(forecast, dict) else lambda key: getattr(forecast, key)
+    dates = {f'p{p}': get(f'p{p}').isoformat() if get(f'p{p}') else None for p in PERCENTILES}
+    return {
+        'goal_id': get('goal_id'),
+        'remaining': float(get('remaining')),
+        'daily_rate': float(get('daily_rate')),
+        'probability': get('probability'),
+        'expected_date': dates['p50'],
+        'optimistic_date': dates['p10'],
+        'pessimistic_date': dates['p90'],
+        'method': get('method'),
+        'degraded': get('method') != 'monte_carlo',
+    }
+
+
+def stored_forecasts(user_id, now=None):
+    """
+    Precomputed forecasts for the user's active goals, or None unless every goal has
+    one that is younger than FORECAST_MAX_AGE_HOURS and computed at its current version.
+    """
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(hours=current_app.config['FORECAST_MAX_AGE_HOURS'])
+    rows = db.session.execute(
+        select(Goal.id, Goal.version, GoalForecast)
+        .outerjoin(GoalForecast, GoalForecast.goal_id == Goal.id)
+        .where(Goal.user_id == user_id, Goal.is_active.is_(True))
+        .order_by(Goal.id)
+    ).all()
+    if any(f is None or f.goal_version != version or f.computed_at < cutoff for _, version, f in rows):
+        return None
+    return [f for _, _, f in rows]
+
+
+def user_forecast(user_id):
+    """/api/goals/forecast payload: the precomputed forecasts when fresh, else computed now."""
+    now = datetime.utcnow()
+    forecasts = stored_forecasts(user_id, now)
+    precomputed = forecasts is not None
+    if not precomputed:
+        forecasts = forecast_goals([user_id], now)
+    names = dict(db.session.execute(select(Goal.id, Goal.name).where(Goal.user_id == user_id)).all())
+    return {
+        'precomputed': precomputed,
+        'horizon_days': current_app.config['FORECAST_HORIZON_DAYS'],
+        'goals': [{'name': names.get(f['goal_id']), **f} for f in map(forecast_dict, forecasts)],
+    }
+
+
+def store_forecasts(forecasts, now):
+    if not forecasts:
+        return
+    stmt = dialect_insert(GoalForecast).values([
+        {'computed_at': now, **f} for f in forecasts
+    ])
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=['goal_id'],
+        set_={c: stmt.excluded[c] for c in ('user_id', 'goal_version', 'computed_at', 'method', 'remaining',
+                                             'daily_rate', 'probability', 'p10', 'p50', 'p90')},
+    ))
+
+
+def precompute_shard(app, shard_index, shard_count, batch_size):
+    """Forecast and store every user in one user_id shard, batch_size users per query/commit."""
+    with app.app_context():
+        user_ids = db.session.scalars(
+            select(User.id).where(User.id % shard_count == shard_index).order_by(User.id)
+        ).all()
+        goals = 0
+        for i in range(0, len(user_ids), batch_size):
+            now = datetime.utcnow()
+            forecasts = forecast_goals(user_ids[i:i + batch_size], now)
+            store_forecasts(forecasts, now)
+            db.session.commit()
+            goals += len(forecasts)
+        return len(user_ids), goals
+
+
+_forked_app = None
+
+
+def _forked_shard(shard_index, shard_count, batch_size):
+    with _forked_app.app_context():
+        db.engine.dispose(close=False)  # pooled connections inherited over fork belong to the parent
+    return precompute_shard(_forked_app, shard_index, shard_count, batch_size)
+
+
+def precompute_forecasts(app, workers, batch_size):
+    """
+    Forecast every user's goals in `workers` forked processes, one user_id shard each
+    (the simulation is CPU-bound, so threads would serialize on the GIL). Runs a single
+    in-process shard where fork isn't available.
+    """
+    global _forked_app
+    started = time.perf_counter()
+    if workers > 1 and 'fork' in multiprocessing.get_all_start_methods():
+        _forked_app = app
+        with multiprocessing.get_context('fork').Pool(workers) as pool:
+            results = pool.starmap(_forked_shard, [(i, workers, batch_size) for i in range(workers)])
+    else:
+        workers = 1
+        results = [precompute_shard(app, 0, 1, batch_size)]
+    return {
+        'users': sum(r[0] for r in results),
+        'goals': sum(r[1] for r in results),
+        'workers': workers,
+        'elapsed_s': round(time.perf_counter() - started, 2),
+    }
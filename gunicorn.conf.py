@@ -0,0 +1,15 @@
+"""
+gunicorn settings, read by `gunicorn app:app` from the project root.
+
+Live event streams (GET /api/events) hold a worker thread each while open, so workers
+are gthread (or gevent) rather than gunicorn's default sync workers, which would be
+taken up by a single stream. Worker processes come from WEB_CONCURRENCY and the bind
+address from PORT (gunicorn defaults); see WEB_WORKER_CLASS, WEB_THREADS and
+EVENTS_MAX_STREAMS in config.py.
+"""
+from config import Config
+
+worker_class = Config.WEB_WORKER_CLASS
+threads = Config.WEB_THREADS
+# gevent: simultaneous connections per worker, streams included
+worker_connections = max(1000, Config.EVENTS_MAX_STREAMS + 1000)
@@ -0,0 +1,232 @@
+import csv
+import json
+import time
+from decimal import Decimal, InvalidOperation
+from sqlalchemy import select
+from extensions import db, cache
+from ledger import bulk_add_transactions
+from models import Goal, Transaction
+from roundup import compute_round_ups
+from triggers import normalize_category, trigger_index
+
+# Checked per item, so one bad row is rejected instead of failing the whole INSERT
+MAX_AMOUNT = Decimal(10) ** (Transaction.amount.type.precision - Transaction.amount.type.scale)
+TYPE_LENGTH = Transaction.transaction_type.type.length
+CATEGORY_LENGTH = Transaction.expense_category.type.length
+
+
+def _decimal(value):
+    if value is None or value == '':
+        return None
+    if isinstance(value, bool):
+        raise ValueError(f"Invalid number: {value!r}")
+    try:
+        number = Decimal(str(value)).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        raise ValueError(f"Invalid number: {value!r}")
+    if not number.is_finite() or abs(number) >= MAX_AMOUNT:
+        raise ValueError(f"Invalid number: {value!r}")
+    return number
+
+
+def _string(value, field, max_length=None):
+    if value is None:
+        return None
+    if not isinstance(value, str):
+        raise ValueError(f"{field} must be a string")
+    if max_length is not None and len(value) > max_length:
+        raise ValueError(f"{field} must be at most {max_length} characters")
+    return value
+
+
+def parse_records(stream, fmt):
+    """Yield contribution dicts from a text stream of CSV (with header) or NDJSON lines."""
+    if fmt == 'csv':
+        for row in csv.DictReader(stream):
+            yield {k: v for k, v in row.items() if v not in (None, '')}
+    else:
+        for line in stream:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def owned_goals(user_id, items):
+    """{goal_id: savings_pace} for the active goals of `user_id` referenced by a batch (one query)."""
+    goal_ids = set()
+    for item in items:
+        try:
+            goal_ids.add(int(item.get('goal_id')))
+        except (TypeError, ValueError, AttributeError):
+            pass
+    if not goal_ids:
+        return {}
+    return dict(db.session.execute(
+        select(Goal.id, Goal.savings_pace)
+        .where(Goal.user_id == user_id, Goal.is_active.is_(True), Goal.id.in_(goal_ids))
+    ).all())
+
+
+def _goal_id(item, owned):
+    if not isinstance(item, dict):
+        raise ValueError("Item must be an object")
+    try:
+        goal_id = int(item.get('goal_id'))
+    except (TypeError, ValueError):
+        raise ValueError("goal_id is required")
+    if goal_id not in owned:
+        raise ValueError("Goal not found")
+    return goal_id
+
+
+def validate_contributions(user_id, items):
+    """
+    Check a batch against the user's active goals with a single query.
+    Returns (transaction rows, per-item results).
+    """
+    owned = owned_goals(user_id, items)
+
+    rows, results = [], []
+    for index, item in enumerate(items):
+        try:
+            goal_id = _goal_id(item, owned)
+            amount = _decimal(item.get('amount'))
+            if amount is None:
+                raise ValueError("Amount is required")
+            if amount <= Decimal('0'):
+                raise ValueError("Amount must be positive")
+            metadata = item.get('metadata')
+            if metadata is not None and not isinstance(metadata, dict):
+                raise ValueError("metadata must be an object")
+
+            rows.append({
+                'user_id': user_id,
+                'goal_id': goal_id,
+                'amount': amount,
+                'transaction_type': (_string(item.get('transaction_type'), 'transaction_type', TYPE_LENGTH)
+                                     or _string(item.get('investment_type'), 'investment_type', TYPE_LENGTH)
+                                     or 'manual'),
+                'description': _string(item.get('description'), 'description'),
+                'original_expense_amount': _decimal(item.get('original_expense_amount')),
+                'expense_category': _string(item.get('expense_category'), 'expense_category', CATEGORY_LENGTH),
+                'transaction_metadata': metadata,
+                'is_undoable': True,
+            })
+            results.append({'index': index, 'status': 'ok', 'goal_id': goal_id, 'amount': float(amount)})
+        except ValueError as e:
+            results.append({'index': index, 'status': 'error', 'error': str(e)})
+    return rows, results
+
+
+def ingest_contributions(user_id, items):
+    """Validate and write a batch of contributions in one transaction (one balance update per goal)."""
+    started = time.perf_counter()
+    rows, results = validate_contributions(user_id, items)
+    deltas = bulk_add_transactions(rows)
+    db.session.commit()
+    if rows:
+        cache.invalidate(user_id)
+
+    elapsed = time.perf_counter() - started
+    return {
+        'accepted': len(rows),
+        'rejected': len(results) - len(rows),
+        'goals_updated': len(deltas),
+        'elapsed_ms': round(elapsed * 1000, 2),
+        'items_per_second': round(len(items) / elapsed, 1) if elapsed > 0 else None,
+        'results': results,
+    }
+
+
+def ingest_expenses(user_id, items, config):
+    """
+    Turn a batch of card expenses into round-up and guilty-pleasure-tax transactions.
+
+    Each expense ({goal_id?, amount, category?, description?}) saves its round-up
+    (per ROUND_UP_MODE) plus the goal's pace bonus into goal_id, and every active
+    guilty_pleasure_tax rule whose trigger_category matches the expense category
+    fires once. All resulting transactions are written with one bulk insert and
+    one balance update per goal.
+    """
+    started = time.perf_counter()
+    owned = owned_goals(user_id, items)
+    triggers = trigger_index.rules_for(user_id)
+
+    valid, results = [], []
+    for index, item in enumerate(items):
+        try:
+            if not isinstance(item, dict):
+                raise ValueError("Item must be an object")
+            goal_id = _goal_id(item, owned) if item.get('goal_id') is not None else None
+            expense = _decimal(item.get('amount'))
+            if expense is None or expense <= Decimal('0'):
+                raise ValueError("Expense amount must be positive")
+            category = (_string(item.get('category'), 'category', CATEGORY_LENGTH)
+                        or _string(item.get('expense_category'), 'expense_category', CATEGORY_LENGTH))
+            _string(item.get('description'), 'description')
+            valid.append((index, goal_id, expense, category, item))
+            results.append(None)
+        except ValueError as e:
+            results.append({'index': index, 'status': 'error', 'error': str(e)})
+
+    rounded = [v for v in valid if v[1] is not None]
+    round_ups = dict(zip(
+        (v[0] for v in rounded),
+        compute_round_ups([v[2] for v in rounded], [owned[v[1]] for v in rounded], config),
+    ))
+
+    rows = []
+    taxes = 0
+    for index, goal_id, expense, category, item in valid:
+        result = {'index': index, 'status': 'ok', 'goal_id': goal_id}
+
+        if goal_id is not None:
+            round_up, bonus, total = round_ups[index]
+            result.update({'round_up': float(round_up), 'bonus': float(bonus), 'saved': float(total)})
+            if total > Decimal('0'):
+                rows.append({
+                    'user_id': user_id,
+                    'goal_id': goal_id,
+                    'amount': total,
+                    'transaction_type': 'round_up',
+                    'description': item.get('description'),
+                    'original_expense_amount': expense,
+                    'expense_category': category,
+                    'transaction_metadata': {'round_up': str(round_up), 'pace_bonus': str(bonus)},
+                    'is_undoable': True,
+                })
+
+        matched = triggers.get(normalize_category(category), ()) if category else ()
+        for rule in matched:
+            rows.append({
+                'user_id': user_id,
+                'goal_id': rule.goal_id,
+                'amount': rule.amount,
+                'transaction_type': 'guilty_pleasure_tax',
+                'description': rule.rule_name,
+                'original_expense_amount': expense,
+                'expense_category': category,
+                'transaction_metadata': {'rule_id': rule.id},
+                'is_undoable': True,
+            })
+        taxes += len(matched)
+        result['triggered_rule_ids'] = [rule.id for rule in matched]
+        results[index] = result
+
+    deltas = bulk_add_transactions(rows)
+    db.session.commit()
+    if rows:
+        cache.invalidate(user_id)
+
+    elapsed = time.perf_counter() - started
+    return {
+        'accepted': len(valid),
+        'rejected': len(items) - len(valid),
+        'transactions': len(rows),
+        'taxes_triggered': taxes,
+        'total_saved': float(sum((r['amount'] for r in rows), Decimal('0'))),
+        'goals_updated': len(deltas),
+        'elapsed_ms': round(elapsed * 1000, 2),
+        'items_per_second': round(len(items) / elapsed, 1) if elapsed > 0 else None,
+        'results': results,
+    }
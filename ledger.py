@@ -0,0 +1,145 @@
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+from flask import session
+from sqlalchemy import and_, case, insert, update
+from sqlalchemy.orm.attributes import set_committed_value
+from events import queue_event
+from extensions import db
+from models import Goal, Transaction
+from stats import record_transactions
+from versioning import bump_versions
+
+
+def decimalize(value):
+    """Convert value to Decimal if it's not already."""
+    if isinstance(value, Decimal):
+        return value
+    return Decimal(str(value)) if value is not None else None
+
+
+def add_tx(goal_id, amount, tx_type, description=None, user_id=None, is_undoable=True, metadata=None):
+    """Add a new transaction."""
+    if not user_id and 'user_id' in session:
+        user_id = session['user_id']
+    
+    tx = Transaction(
+        user_id=user_id,
+        goal_id=goal_id,
+        amount=amount,
+        transaction_type=tx_type,
+        description=description,
+        transaction_metadata=metadata,
+        is_undoable=is_undoable
+    )
+    db.session.add(tx)
+    record_transactions([{'user_id': user_id, 'goal_id': goal_id, 'transaction_type': tx_type, 'amount': amount}])
+    queue_event(db.session, user_id, 'transaction', {
+        'goal_id': goal_id, 'amount': float(amount), 'transaction_type': tx_type,
+        'description': description, 'created_at': datetime.utcnow().isoformat(),
+    }, instance=tx)
+    return tx
+
+
+def queue_balance_event(row, now):
+    """Live 'balance' event for a goal row returned by a balance UPDATE (see events.py)."""
+    queue_event(db.session, row.user_id, 'balance', {
+        'goal_id': row.id, 'current_amount': float(row.current_amount),
+        'target_amount': float(row.target_amount), 'completed': row.completed_at is not None,
+        'just_completed': row.completed_at == now,
+    })
+
+
+def apply_saving_to_goal(goal, amount, now=None):
+    """
+    Apply savings to a goal.
+
+    Runs as one atomic UPDATE (current_amount = current_amount + :amount ... RETURNING),
+    so concurrent contributions, habit logs and undos on the same goal never lose
+    updates and need no lock. completed_at is stamped in the same statement when the
+    goal crosses its target; `goal` is refreshed with the returned values, and the new
+    balance is pushed to the user's live event streams after commit.
+    Returns True if this update completed the goal.
+    """
+    now = now or datetime.utcnow()
+    new_amount = Goal.current_amount + decimalize(amount)
+    row = db.session.execute(
+        update(Goal)
+        .where(Goal.id == goal.id)
+        .values(
+            current_amount=new_amount,
+            completed_at=case(
+                (and_(Goal.completed_at.is_(None), new_amount >= Goal.target_amount), now),
+                else_=Goal.completed_at,
+            ),
+        )
+        .returning(Goal.id, Goal.user_id, Goal.current_amount, Goal.target_amount, Goal.completed_at)
+        .execution_options(synchronize_session=False)
+    ).one()
+    set_committed_value(goal, 'current_amount', row.current_amount)
+    set_committed_value(goal, 'completed_at', row.completed_at)
+    queue_balance_event(row, now)
+    return row.completed_at == now
+
+
+def goal_deltas(rows):
+    """Sum transaction amounts per goal_id."""
+    deltas = defaultdict(Decimal)
+    for row in rows:
+        deltas[row['goal_id']] += Decimal(str(row['amount']))
+    return dict(deltas)
+
+
+def apply_goal_deltas(deltas, now=None):
+    """
+    Apply per-goal balance increments with a single set-based UPDATE.
+    Goals crossing their target get completed_at stamped in the same statement, and the
+    new balances are pushed to live event streams after commit.
+    """
+    if not deltas:
+        return
+    now = now or datetime.utcnow()
+    delta = case(deltas, value=Goal.id, else_=Decimal('0'))
+    new_amount = Goal.current_amount + delta
+
+    rows = db.session.execute(
+        update(Goal)
+        .where(Goal.id.in_(list(deltas)))
+        .values(
+            current_amount=new_amount,
+            version=Goal.version + 1,
+            completed_at=case(
+                (and_(Goal.completed_at.is_(None), new_amount >= Goal.target_amount), now),
+                else_=Goal.completed_at,
+            ),
+        )
+        .returning(Goal.id, Goal.user_id, Goal.current_amount, Goal.target_amount, Goal.completed_at)
+        .execution_options(synchronize_session=False)
+    )
+    for row in rows:
+        queue_balance_event(row, now)
+
+
+def bulk_add_transactions(rows, now=None):
+    """
+    Bulk-insert Transaction rows, apply the aggregated balance change to each goal
+    and fold the rows into the summary tables.
+    Rows are dicts keyed by Transaction attribute names. The caller commits.
+    Returns the per-goal deltas that were applied.
+    """
+    if not rows:
+        return {}
+    db.session.execute(insert(Transaction), rows)
+    record_transactions(rows, now=now)
+    # One live event per goal rather than per row (imports can be thousands of rows)
+    added = defaultdict(lambda: [0, Decimal('0')])
+    for row in rows:
+        totals = added[(row['user_id'], row['goal_id'])]
+        totals[0] += 1
+        totals[1] += Decimal(str(row['amount']))
+    for (user_id, goal_id), (count, amount) in added.items():
+        queue_event(db.session, user_id, 'transactions', {'goal_id': goal_id, 'count': count, 'amount': float(amount)})
+    deltas = goal_deltas(rows)
+    apply_goal_deltas(deltas, now=now)
+    bump_versions(user_ids={row['user_id'] for row in rows})
+    return deltas
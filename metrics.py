@@ -0,0 +1,153 @@
+import threading
+import time
+from flask import Response, g, has_request_context, jsonify, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from auth import internal_access_allowed
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """Prometheus-style cumulative histogram keyed by a tuple of label values."""
+
+    def __init__(self, name, help_text, label_names, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self.series = {}  # labels -> [bucket counts..., sum, count]
+        self.lock = threading.Lock()
+
+    def observe(self, labels, value):
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            items = [(labels, list(series)) for labels, series in self.series.items()]
+        for labels, series in sorted(items):
+            base = _labels(self.label_names, labels)
+            for bound, count in zip(self.buckets, series):
+                lines.append(f'{self.name}_bucket{{{base},le="{bound}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{base},le="+Inf"}} {series[-1]}')
+            lines.append(f'{self.name}_sum{{{base}}} {series[-2]}')
+            lines.append(f'{self.name}_count{{{base}}} {series[-1]}')
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, labels, value=1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            items = sorted(self.values.items())
+        for labels, value in items:
+            lines.append(f'{self.name}{{{_labels(self.label_names, labels)}}} {value}')
+        return lines
+
+
+def _labels(names, values):
+    return ','.join(f'{n}="{str(v).replace(chr(34), "")}"' for n, v in zip(names, values))
+
+
+request_latency = Histogram('http_request_duration_seconds', 'Request latency by endpoint.',
+                            ('endpoint', 'method'), LATENCY_BUCKETS)
+request_queries = Histogram('http_request_db_queries', 'SQL statements executed per request.',
+                            ('endpoint', 'method'), QUERY_COUNT_BUCKETS)
+requests_total = Counter('http_requests_total', 'Requests by endpoint and status.',
+                         ('endpoint', 'method', 'status'))
+db_time_total = Counter('http_request_db_seconds_total', 'Time spent in SQL per endpoint.',
+                        ('endpoint', 'method'))
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['query_start'].pop()
+    # Only statements issued while serving a request are attributed (not background threads)
+    if has_request_context() and 'metrics_start' in g:
+        g.metrics_queries += 1
+        g.metrics_db_time += time.perf_counter() - started
+
+
+def _endpoint_label():
+    return request.url_rule.rule if request.url_rule else 'unmatched'
+
+
+def init_metrics(app):
+    """Register request timing hooks and the /metrics endpoint."""
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_start = time.perf_counter()
+        g.metrics_queries = 0
+        g.metrics_db_time = 0.0
+
+    @app.after_request
+    def record_request_metrics(response):
+        if 'metrics_start' not in g:
+            return response
+        elapsed = time.perf_counter() - g.metrics_start
+        labels = (_endpoint_label(), request.method)
+        request_latency.observe(labels, elapsed)
+        request_queries.observe(labels, g.metrics_queries)
+        requests_total.inc(labels + (response.status_code,))
+        db_time_total.inc(labels, g.metrics_db_time)
+
+        if app.config.get('METRICS_SERVER_TIMING'):
+            response.headers.add('Server-Timing', f'db;dur={g.metrics_db_time * 1000:.2f};desc="{g.metrics_queries} queries"')
+            response.headers.add('Server-Timing', f'total;dur={elapsed * 1000:.2f}')
+
+        if app.config.get('METRICS_LOG_OVER_BUDGET') and (
+                g.metrics_queries > app.config['METRICS_QUERY_BUDGET']
+                or elapsed * 1000 > app.config['METRICS_LATENCY_BUDGET_MS']):
+            app.logger.warning("Over budget: %s %s took %.1fms with %d queries (%.1fms in DB)",
+                               request.method, request.full_path, elapsed * 1000,
+                               g.metrics_queries, g.metrics_db_time * 1000)
+        return response
+
+    def metrics_endpoint():
+        if not internal_access_allowed():
+            return jsonify({"error": "Not found"}), 404
+        lines = []
+        for metric in (request_latency, request_queries, requests_total, db_time_total):
+            lines.extend(metric.render())
+
+        cache = app.extensions.get('response_cache')
+        if cache is not None:
+            for name, value in cache.stats().items():
+                if isinstance(value, (int, float)):
+                    lines.append(f'response_cache_{name} {value}')
+        writer = app.extensions.get('activity_log')
+        if writer is not None:
+            for name, value in writer.stats().items():
+                lines.append(f'activity_log_{name} {value}')
+        return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
+    app.add_url_rule('/metrics', 'metrics', metrics_endpoint)
@@ -1,21 +1,167 @@
+import atexit
+import json
+import os
+import queue
+import random
+import threading
+import time
 from functools import wraps
-from flask import session, request
+from flask import session, request, current_app, make_response
 from datetime import datetime
+from sqlalchemy import insert
+from extensions import db
+from models import ActivityLog
+
+
+class ActivityLogWriter:
+    """
+    Buffers activity log records in a bounded queue and writes them from a
+    background thread with bulk inserts, flushing when a batch fills up or
+    the flush interval passes. When the queue is full new records are dropped
+    (and counted) instead of blocking the request.
+    """
+
+    def __init__(self, app, queue_size=10000, batch_size=500, flush_interval=2.0, sample_rate=1.0):
+        self.app = app
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.sample_rate = sample_rate
+        self.thread = None
+        self.pid = None
+        self.lock = threading.Lock()
+        self.counters = {'enqueued': 0, 'written': 0, 'dropped': 0, 'sampled_out': 0, 'flushes': 0, 'errors': 0}
+
+    def enqueue(self, record):
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            self.counters['sampled_out'] += 1
+            return
+        self._ensure_started()
+        try:
+            self.queue.put_nowait(record)
+            self.counters['enqueued'] += 1
+        except queue.Full:
+            self.counters['dropped'] += 1
+
+    def _ensure_started(self):
+        # Started lazily (and restarted after fork) so each worker process gets its own thread
+        if self.thread is not None and self.thread.is_alive() and self.pid == os.getpid():
+            return
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive() or self.pid != os.getpid():
+                self.pid = os.getpid()
+                self.thread = threading.Thread(target=self._run, name='activity-log-writer', daemon=True)
+                self.thread.start()
+
+    def _run(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                batch.append(self.queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                while len(batch) < self.batch_size:
+                    batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                pass
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                self._write(batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+
+    def flush(self):
+        """Write everything currently queued (used at shutdown)."""
+        batch = []
+        try:
+            while True:
+                batch.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+        self._write(batch)
+
+    def _write(self, batch):
+        if not batch:
+            return
+        try:
+            with self.app.app_context():
+                db.session.execute(insert(ActivityLog), batch)
+                db.session.commit()
+            self.counters['written'] += len(batch)
+            self.counters['flushes'] += 1
+        except Exception:
+            self.counters['errors'] += 1
+            self.app.logger.exception("Failed to write %d activity log records", len(batch))
+
+    def stats(self):
+        return dict(self.counters, queued=self.queue.qsize(), sample_rate=self.sample_rate)
+
+
+def _truncate(text, limit):
+    if text is None:
+        return None
+    return text if len(text) <= limit else text[:limit] + '...'
+
+
+def _client_ip():
+    forwarded = request.headers.get('X-Forwarded-For')
+    if forwarded:
+        return forwarded.split(',')[0].strip()
+    return request.remote_addr
+
 
 def log_activity(f):
     """
     Decorator to log API activity.
-    Currently a pass-through decorator - can be extended to log to database.
+    Records are handed to the app's ActivityLogWriter; the request only pays for
+    building a small dict and a non-blocking queue put.
     """
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        # Just pass through - logging can be added here if needed
-        return f(*args, **kwargs)
+        writer = current_app.extensions.get('activity_log')
+        user_id = session.get('user_id')
+        if writer is None or user_id is None:
+            return f(*args, **kwargs)
+
+        response = make_response(f(*args, **kwargs))
+        limit = current_app.config.get('ACTIVITY_LOG_MAX_DATA', 1000)
+
+        request_data = request.get_json(silent=True) if request.is_json else None
+        if request_data is not None:
+            encoded = json.dumps(request_data, default=str)
+            if len(encoded) > limit:
+                request_data = {'truncated': _truncate(encoded, limit)}
+        response_data = None
+        if not response.is_streamed:
+            response_data = _truncate(response.get_data()[:limit + 1].decode('utf-8', 'replace'), limit)
+
+        writer.enqueue({
+            'user_id': user_id,
+            'endpoint': _truncate(request.path, 255),
+            'method': request.method,
+            'status_code': response.status_code,
+            'ip_address': _truncate(_client_ip(), 50),
+            'user_agent': _truncate(request.user_agent.string, limit),
+            'request_data': request_data,
+            'response_data': response_data,
+            'created_at': datetime.utcnow(),
+        })
+        return response
     return decorated_function
 
 def setup_activity_logging(app):
     """
     Set up activity logging for the Flask app.
-    Currently a no-op - can be extended to set up logging infrastructure.
+    Controlled by ACTIVITY_LOG_* settings; disabled logging leaves log_activity a pass-through.
     """
-    pass
+    if not app.config.get('ACTIVITY_LOG_ENABLED', True):
+        return None
+
+    writer = ActivityLogWriter(
+        app,
+        queue_size=app.config.get('ACTIVITY_LOG_QUEUE_SIZE', 10000),
+        batch_size=app.config.get('ACTIVITY_LOG_BATCH_SIZE', 500),
+        flush_interval=app.config.get('ACTIVITY_LOG_FLUSH_INTERVAL', 2.0),
+        sample_rate=app.config.get('ACTIVITY_LOG_SAMPLE_RATE', 1.0),
+    )
+    app.extensions['activity_log'] = writer
+    atexit.register(writer.flush)
+    return writer
@@ -0,0 +1,37 @@
+"""Run ledger for recurring savings rules
+
+One row per (rule, period) a recurring rule has executed for, so retried or
+concurrent runs never save twice. Databases from before migrations got the
+table from db.create_all(), so it is only created when missing.
+
+Revision ID: 0000_recurring_runs
+Revises: 
+Create Date: 2026-10-18 08:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0000_recurring_runs'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'recurring_runs' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        'recurring_runs',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('rule_id', sa.Integer(), sa.ForeignKey('savings_rules.id'), nullable=False),
+        sa.Column('period', sa.String(20), nullable=False),
+        sa.Column('executed_at', sa.DateTime(), server_default=sa.func.now()),
+        sa.UniqueConstraint('rule_id', 'period', name='uq_recurring_runs_rule_period'),
+    )
+
+
+def downgrade():
+    op.drop_table('recurring_runs')
@@ -0,0 +1,41 @@
+"""Composite indexes for transaction, goal and savings rule hot paths
+
+Revision ID: 0001_hot_path_indexes
+Revises: 0000_recurring_runs
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001_hot_path_indexes'
+down_revision = '0000_recurring_runs'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_transactions_user_created', 'transactions', ['user_id', 'created_at', 'id']),
+    ('ix_transactions_user_goal_created', 'transactions', ['user_id', 'goal_id', 'created_at', 'id']),
+    ('ix_transactions_type', 'transactions', ['transaction_type']),
+    ('ix_savings_rules_type_active', 'savings_rules', ['rule_type', 'is_active']),
+    ('ix_savings_rules_user_active', 'savings_rules', ['user_id', 'is_active']),
+    ('ix_goals_user_active', 'goals', ['user_id', 'is_active']),
+]
+
+
+def upgrade():
+    # Build indexes without blocking writes on Postgres (CONCURRENTLY can't run in a transaction)
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True,
+                            postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in INDEXES:
+            op.drop_index(name, table_name=table, if_exists=True,
+                          postgresql_concurrently=True)
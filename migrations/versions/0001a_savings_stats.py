@@ -0,0 +1,52 @@
+"""Per-goal and per-user savings statistics
+
+goal_stats holds transaction counts and totals per goal, transaction type and
+month, user_stats the per-user totals, both maintained as transactions are
+written. Databases that got the tables from db.create_all() keep them. Run
+`flask rebuild-stats` once afterwards to fill them.
+
+Revision ID: 0001a_savings_stats
+Revises: 0001_hot_path_indexes
+Create Date: 2026-10-18 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001a_savings_stats'
+down_revision = '0001_hot_path_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'goal_stats' not in existing:
+        op.create_table(
+            'goal_stats',
+            sa.Column('goal_id', sa.Integer(), sa.ForeignKey('goals.id'), primary_key=True),
+            sa.Column('transaction_type', sa.String(50), primary_key=True),
+            sa.Column('month', sa.String(7), primary_key=True),
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+            sa.Column('tx_count', sa.Integer(), server_default='0', nullable=False),
+            sa.Column('amount_total', sa.Numeric(14, 2), server_default='0.00', nullable=False),
+            sa.Column('last_activity_at', sa.DateTime()),
+        )
+        op.create_index('ix_goal_stats_user_id', 'goal_stats', ['user_id'])
+
+    if 'user_stats' not in existing:
+        op.create_table(
+            'user_stats',
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), primary_key=True),
+            sa.Column('tx_count', sa.Integer(), server_default='0', nullable=False),
+            sa.Column('total_saved', sa.Numeric(14, 2), server_default='0.00', nullable=False),
+            sa.Column('last_activity_at', sa.DateTime()),
+        )
+
+
+def downgrade():
+    op.drop_table('user_stats')
+    op.drop_table('goal_stats')
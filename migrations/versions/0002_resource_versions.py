@@ -0,0 +1,30 @@
+"""Version counters on users and goals for ETag validation
+
+Revision ID: 0002_resource_versions
+Revises: 0001a_savings_stats
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_resource_versions'
+down_revision = '0001a_savings_stats'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.add_column(sa.Column('data_version', sa.Integer(), server_default='0', nullable=False))
+    with op.batch_alter_table('goals') as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('goals') as batch_op:
+        batch_op.drop_column('version')
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('data_version')
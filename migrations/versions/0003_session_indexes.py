@@ -0,0 +1,36 @@
+"""Indexes for the server-side session store
+
+Revision ID: 0003_session_indexes
+Revises: 0002_resource_versions
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_session_indexes'
+down_revision = '0002_resource_versions'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_user_sessions_expires_at', 'user_sessions', ['expires_at']),
+    ('ix_user_sessions_user_id', 'user_sessions', ['user_id']),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True,
+                            postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in INDEXES:
+            op.drop_index(name, table_name=table, if_exists=True,
+                          postgresql_concurrently=True)
@@ -0,0 +1,31 @@
+"""Schema that used to be changed at app import time
+
+Widens users.password_hash (previously a best-effort ALTER TABLE on every
+import). The tables that db.create_all() used to add on import have their own
+migrations (0000_recurring_runs, 0001a_savings_stats).
+
+Revision ID: 0004_import_time_schema
+Revises: 0003_session_indexes
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_import_time_schema'
+down_revision = '0003_session_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # SQLite doesn't enforce VARCHAR lengths, so only Postgres needs the change
+    if op.get_bind().dialect.name == 'postgresql':
+        op.alter_column('users', 'password_hash', type_=sa.String(255),
+                        existing_type=sa.String(), existing_nullable=True)
+
+
+def downgrade():
+    pass
@@ -0,0 +1,42 @@
+"""Watermarks and indexes for incremental ledger reconciliation
+
+Revision ID: 0005_ledger_reconciliation
+Revises: 0004_import_time_schema
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_ledger_reconciliation'
+down_revision = '0004_import_time_schema'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_transactions_created_goal', 'transactions', ['created_at', 'goal_id']),
+]
+
+
+def upgrade():
+    op.create_table(
+        'job_watermarks',
+        sa.Column('name', sa.String(50), primary_key=True),
+        sa.Column('watermark', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now()),
+    )
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True,
+                            postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in INDEXES:
+            op.drop_index(name, table_name=table, if_exists=True,
+                          postgresql_concurrently=True)
+    op.drop_table('job_watermarks')
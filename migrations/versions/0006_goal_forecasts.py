@@ -0,0 +1,39 @@
+"""Precomputed goal completion forecasts
+
+Revision ID: 0006_goal_forecasts
+Revises: 0005_ledger_reconciliation
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006_goal_forecasts'
+down_revision = '0005_ledger_reconciliation'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'goal_forecasts',
+        sa.Column('goal_id', sa.Integer(), sa.ForeignKey('goals.id'), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('goal_version', sa.Integer(), nullable=False),
+        sa.Column('computed_at', sa.DateTime(), nullable=False),
+        sa.Column('method', sa.String(20), nullable=False),
+        sa.Column('remaining', sa.Numeric(12, 2), nullable=False),
+        sa.Column('daily_rate', sa.Numeric(12, 2), nullable=False),
+        sa.Column('probability', sa.Float(), nullable=False),
+        sa.Column('p10', sa.Date()),
+        sa.Column('p50', sa.Date()),
+        sa.Column('p90', sa.Date()),
+    )
+    op.create_index('ix_goal_forecasts_user_id', 'goal_forecasts', ['user_id'])
+
+
+def downgrade():
+    op.drop_index('ix_goal_forecasts_user_id', table_name='goal_forecasts')
+    op.drop_table('goal_forecasts')
@@ -0,0 +1,37 @@
+"""Indexes for rule simulations
+
+Revision ID: 0007_rule_simulation_indexes
+Revises: 0006_goal_forecasts
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007_rule_simulation_indexes'
+down_revision = '0006_goal_forecasts'
+branch_labels = None
+depends_on = None
+
+
+EXPENSES = sa.text('original_expense_amount IS NOT NULL')
+
+INDEXES = [
+    ('ix_transactions_user_expense_category', 'transactions', ['user_id', 'expense_category', 'created_at'], EXPENSES),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True, postgresql_where=where,
+                            sqlite_where=where, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in INDEXES:
+            op.drop_index(name, table_name=table, if_exists=True,
+                          postgresql_concurrently=True)
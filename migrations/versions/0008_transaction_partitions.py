@@ -0,0 +1,51 @@
+"""Monthly transaction partitions and archived month totals
+
+Revision ID: 0008_transaction_partitions
+Revises: 0007_rule_simulation_indexes
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from flask import current_app
+
+
+# revision identifiers, used by Alembic.
+revision = '0008_transaction_partitions'
+down_revision = '0007_rule_simulation_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'transaction_archives',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('month', sa.String(7), nullable=False),
+        sa.Column('goal_id', sa.Integer(), sa.ForeignKey('goals.id'), nullable=False),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('transaction_type', sa.String(50), nullable=False),
+        sa.Column('tx_count', sa.Integer(), nullable=False),
+        sa.Column('amount_total', sa.Numeric(14, 2), nullable=False),
+        sa.Column('last_activity_at', sa.DateTime()),
+        sa.Column('file', sa.String(255), nullable=False),
+        sa.Column('archived_at', sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_index('ix_transaction_archives_goal_id', 'transaction_archives', ['goal_id'])
+
+    # Postgres only: SQLite keeps the plain table. The table is rewritten under an exclusive
+    # lock, so run this in a maintenance window on large databases. The conversion is shared
+    # with flask init-db, which builds new databases the same way.
+    if op.get_bind().dialect.name == 'postgresql':
+        from partitions import partition_transactions
+        partition_transactions(op.get_bind(), current_app.config['TRANSACTION_PARTITIONS_AHEAD'])
+
+
+def downgrade():
+    # Rows already moved out by flask archive-transactions stay in their archive files
+    if op.get_bind().dialect.name == 'postgresql':
+        from partitions import unpartition_transactions
+        unpartition_transactions(op.get_bind())
+
+    op.drop_index('ix_transaction_archives_goal_id', table_name='transaction_archives')
+    op.drop_table('transaction_archives')
@@ -16,6 +16,7 @@ class User(db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(255))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    data_version = db.Column(db.Integer, server_default='0', nullable=False)  # bumped on every change to the user's data
     
     # Relationships
     goals = db.relationship('Goal', secondary=user_goals, backref=db.backref('users', lazy=True))
@@ -36,6 +37,11 @@ class Goal(db.Model):
     is_active = db.Column(db.Boolean, server_default=db.text('true'), nullable=False)
     created_at = db.Column(db.DateTime, server_default=db.func.now())
     completed_at = db.Column(db.DateTime)
+    version = db.Column(db.Integer, server_default='0', nullable=False)  # bumped on every change to the goal
+
+    __table_args__ = (
+        db.Index('ix_goals_user_active', 'user_id', 'is_active'),
+    )
 
 
 # TRANSACTIONS
@@ -56,6 +62,17 @@ class Transaction(db.Model):
 
     __table_args__ = (
         CheckConstraint('amount IS NOT NULL'),
+        # /api/transactions: user history, newest first
+        db.Index('ix_transactions_user_created', 'user_id', 'created_at', 'id'),
+        # Goal history, charts, per-goal sums for reconciliation and what a rule saved in simulations
+        db.Index('ix_transactions_user_goal_created', 'user_id', 'goal_id', 'created_at', 'id'),
+        db.Index('ix_transactions_type', 'transaction_type'),
+        # Incremental reconciliation: goals with transactions since the watermark
+        db.Index('ix_transactions_created_goal', 'created_at', 'goal_id'),
+        # Rule simulations: a user's card expenses by category
+        db.Index('ix_transactions_user_expense_category', 'user_id', 'expense_category', 'created_at',
+                 postgresql_where=db.text('original_expense_amount IS NOT NULL'),
+                 sqlite_where=db.text('original_expense_amount IS NOT NULL')),
     )
 
     def to_dict(self):
@@ -90,6 +107,11 @@ class SavingsRule(db.Model):
     created_at = db.Column(db.DateTime, server_default=db.func.now())
     last_executed = db.Column(db.DateTime)
 
+    __table_args__ = (
+        db.Index('ix_savings_rules_type_active', 'rule_type', 'is_active'),
+        db.Index('ix_savings_rules_user_active', 'user_id', 'is_active'),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -102,6 +124,85 @@ class SavingsRule(db.Model):
             'is_active': self.is_active
         }
 
+# SAVINGS STATISTICS (maintained alongside transactions, see stats.py)
+class GoalStats(db.Model):
+    __tablename__ = 'goal_stats'
+
+    goal_id = db.Column(db.Integer, db.ForeignKey('goals.id'), primary_key=True)
+    transaction_type = db.Column(db.String(50), primary_key=True)
+    month = db.Column(db.String(7), primary_key=True)  # YYYY-MM
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    tx_count = db.Column(db.Integer, server_default='0', nullable=False)
+    amount_total = db.Column(db.Numeric(14,2), server_default='0.00', nullable=False)
+    last_activity_at = db.Column(db.DateTime)
+
+class UserStats(db.Model):
+    __tablename__ = 'user_stats'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    tx_count = db.Column(db.Integer, server_default='0', nullable=False)
+    total_saved = db.Column(db.Numeric(14,2), server_default='0.00', nullable=False)
+    last_activity_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            'tx_count': self.tx_count,
+            'total_saved': float(self.total_saved) if self.total_saved else 0.0,
+            'last_activity_at': self.last_activity_at.isoformat() if self.last_activity_at else None
+        }
+
+# ARCHIVED TRANSACTIONS (per-month totals of rows exported by flask archive-transactions, see partitions.py)
+class TransactionArchive(db.Model):
+    __tablename__ = 'transaction_archives'
+
+    id = db.Column(db.Integer, primary_key=True)
+    month = db.Column(db.String(7), nullable=False)  # YYYY-MM
+    goal_id = db.Column(db.Integer, db.ForeignKey('goals.id'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    transaction_type = db.Column(db.String(50), nullable=False)
+    tx_count = db.Column(db.Integer, nullable=False)
+    amount_total = db.Column(db.Numeric(14,2), nullable=False)
+    last_activity_at = db.Column(db.DateTime)
+    file = db.Column(db.String(255), nullable=False)  # export file in TRANSACTION_ARCHIVE_FOLDER
+    archived_at = db.Column(db.DateTime, server_default=db.func.now())
+
+# RECURRING RUN LEDGER
+class RecurringRun(db.Model):
+    __tablename__ = 'recurring_runs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    rule_id = db.Column(db.Integer, db.ForeignKey('savings_rules.id'), nullable=False)
+    period = db.Column(db.String(20), nullable=False)  # e.g. 2024-05-17, 2024-W20, 2024-05
+    executed_at = db.Column(db.DateTime, server_default=db.func.now())
+
+    __table_args__ = (
+        db.UniqueConstraint('rule_id', 'period', name='uq_recurring_runs_rule_period'),
+    )
+
+# GOAL FORECASTS (precomputed by flask forecast-goals, see forecast.py)
+class GoalForecast(db.Model):
+    __tablename__ = 'goal_forecasts'
+
+    goal_id = db.Column(db.Integer, db.ForeignKey('goals.id'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    goal_version = db.Column(db.Integer, nullable=False)  # Goal.version the forecast was computed at
+    computed_at = db.Column(db.DateTime, nullable=False)
+    method = db.Column(db.String(20), nullable=False)  # monte_carlo or normal
+    remaining = db.Column(db.Numeric(12,2), nullable=False)
+    daily_rate = db.Column(db.Numeric(12,2), nullable=False)
+    probability = db.Column(db.Float, nullable=False)  # of completing within the horizon
+    p10 = db.Column(db.Date)  # completion date percentiles; NULL = beyond the horizon
+    p50 = db.Column(db.Date)
+    p90 = db.Column(db.Date)
+
+# JOB WATERMARKS (last successful run of incremental maintenance jobs)
+class JobWatermark(db.Model):
+    __tablename__ = 'job_watermarks'
+
+    name = db.Column(db.String(50), primary_key=True)
+    watermark = db.Column(db.DateTime, nullable=False)
+    updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
+
 # EXPENSE CATEGORIES
 class ExpenseCategory(db.Model):
     __tablename__ = 'expense_categories'
@@ -156,6 +257,12 @@ class UserSession(db.Model):
     session_token = db.Column(db.String(255), unique=True, nullable=False)
     expires_at = db.Column(db.DateTime, nullable=False)
     created_at = db.Column(db.DateTime, server_default=db.func.now())
+
+    __table_args__ = (
+        # Sweeper deletes expired sessions in batches; revoke-all looks up by user
+        db.Index('ix_user_sessions_expires_at', 'expires_at'),
+        db.Index('ix_user_sessions_user_id', 'user_id'),
+    )
     
     def is_expired(self):
         from datetime import datetime
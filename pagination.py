@@ -0,0 +1,140 @@
+import base64
+from datetime import datetime
+from flask import Response, current_app, json, request, stream_with_context, url_for
+from sqlalchemy import String, tuple_, type_coerce
+from extensions import db
+from models import Transaction
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+
+def encode_cursor(tx):
+    """Opaque cursor for a transaction's (created_at, id) position."""
+    raw = f"{tx.created_at.isoformat()}|{tx.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor. Raises ValueError for malformed cursors."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, tx_id = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        return datetime.fromisoformat(created_at), int(tx_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def page_args(default_limit=None):
+    """
+    Read limit/after/before from the query string.
+    Returns (limit, after, before) with cursors decoded. Raises ValueError on bad input.
+    """
+    limit = request.args.get('limit')
+    after = request.args.get('after')
+    before = request.args.get('before')
+
+    if after and before:
+        raise ValueError("Use either 'after' or 'before', not both")
+    if limit is None:
+        limit = default_limit
+    else:
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise ValueError("Invalid limit")
+        if limit < 1:
+            raise ValueError("Invalid limit")
+    if limit is not None:
+        limit = min(limit, current_app.config['PAGINATION_MAX_LIMIT'])
+
+    return (
+        limit,
+        decode_cursor(after) if after else None,
+        decode_cursor(before) if before else None,
+    )
+
+
+def wants_ndjson():
+    return (request.args.get('format') == 'ndjson'
+            or request.accept_mimetypes.best == NDJSON_MIMETYPE)
+
+
+def keyset_filter(stmt, after=None, before=None, descending=False):
+    """Restrict a transaction select to rows after/before the given cursors."""
+    created_at = Transaction.created_at
+    if db.engine.dialect.name == 'sqlite':
+        # SQLite stores timestamps as text and CURRENT_TIMESTAMP has no fractional part, so
+        # compare against the same representation rather than SQLAlchemy's microsecond format.
+        created_at = type_coerce(created_at, String)
+        after = (after[0].isoformat(sep=' '), after[1]) if after is not None else None
+        before = (before[0].isoformat(sep=' '), before[1]) if before is not None else None
+    key = tuple_(created_at, Transaction.id)
+    if after is not None:
+        stmt = stmt.where(key < after if descending else key > after)
+    if before is not None:
+        stmt = stmt.where(key > before if descending else key < before)
+    return stmt
+
+
+def keyset_order(stmt, descending=False):
+    if descending:
+        return stmt.order_by(Transaction.created_at.desc(), Transaction.id.desc())
+    return stmt.order_by(Transaction.created_at.asc(), Transaction.id.asc())
+
+
+def keyset_page(stmt, limit, after=None, before=None, descending=False):
+    """
+    Fetch one page of transactions ordered by (created_at, id).
+
+    `after`/`before` are decoded cursors relative to the natural order of the
+    listing. Returns (transactions, next_cursor, prev_cursor).
+    """
+    backward = before is not None
+    stmt = keyset_filter(stmt, after, before, descending)
+    # Paging backwards walks the index in the opposite direction and flips the page afterwards
+    stmt = keyset_order(stmt, descending != backward)
+
+    rows = db.session.scalars(stmt.limit(limit + 1)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if backward:
+        rows.reverse()
+
+    if not rows:
+        return rows, None, None
+    if backward:
+        next_cursor = encode_cursor(rows[-1])
+        prev_cursor = encode_cursor(rows[0]) if has_more else None
+    else:
+        next_cursor = encode_cursor(rows[-1]) if has_more else None
+        prev_cursor = encode_cursor(rows[0]) if after is not None else None
+    return rows, next_cursor, prev_cursor
+
+
+def paginated_response(items, limit, next_cursor, prev_cursor):
+    """JSON list response with cursors in Link / X-Next-Cursor / X-Prev-Cursor headers."""
+    response = current_app.json.response(items)
+    links = []
+    args = dict(request.view_args or {})
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+        links.append(f'<{url_for(request.endpoint, **args, limit=limit, after=next_cursor)}>; rel="next"')
+    if prev_cursor:
+        response.headers['X-Prev-Cursor'] = prev_cursor
+        links.append(f'<{url_for(request.endpoint, **args, limit=limit, before=prev_cursor)}>; rel="prev"')
+    if links:
+        response.headers['Link'] = ', '.join(links)
+    return response
+
+
+def ndjson_response(stmt, after=None, before=None, descending=False):
+    """Stream every matching transaction as NDJSON from a server-side cursor."""
+    stmt = keyset_order(keyset_filter(stmt, after, before, descending), descending)
+    stmt = stmt.execution_options(yield_per=current_app.config['STREAM_YIELD_PER'])
+
+    def generate():
+        for tx in db.session.scalars(stmt):
+            yield json.dumps(tx.to_dict()) + '\n'
+        db.session.rollback()
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
@@ -0,0 +1,298 @@
+import gzip
+import json
+import os
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal
+from sqlalchemy import and_, delete, func, insert, select, text
+from extensions import db, cache
+from models import Transaction, TransactionArchive
+from versioning import bump_versions
+
+DEFAULT_PARTITION = 'transactions_default'
+FORMAT_VERSION = 1
+
+
+def month_start(value):
+    return datetime(value.year, value.month, 1)
+
+
+def add_months(month, n):
+    index = month.year * 12 + month.month - 1 + n
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'transactions_{month:%Y_%m}'
+
+
+def is_partitioned(bind):
+    """True if transactions is a partitioned table (Postgres, after migration 0008)."""
+    if bind.dialect.name != 'postgresql':
+        return False
+    return bind.scalar(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('transactions'))"
+    ))
+
+
+def partitions(bind):
+    """{month: partition name} for the monthly partitions of transactions."""
+    months = {}
+    for (name,) in bind.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'transactions'::regclass"
+    )):
+        try:
+            months[datetime.strptime(name, 'transactions_%Y_%m')] = name
+        except ValueError:
+            pass  # the default partition
+    return months
+
+
+def create_partition(bind, month):
+    """
+    Add the partition for one month. Postgres refuses to add a partition while the default
+    partition holds rows in its range, so such rows are moved into a new table which is
+    then attached.
+    """
+    name, end = partition_name(month), add_months(month, 1)
+    bounds = f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+    in_range = {'start': month, 'end': end}
+    stray = bind.scalar(text(
+        f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE created_at >= :start AND created_at < :end)"
+    ), in_range)
+    if not stray:
+        bind.execute(text(f"CREATE TABLE {name} PARTITION OF transactions {bounds}"))
+        return
+    bind.execute(text(f"CREATE TABLE {name} (LIKE transactions INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    bind.execute(text(
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= :start AND created_at < :end "
+        f"RETURNING *) INSERT INTO {name} SELECT * FROM moved"
+    ), in_range)
+    bind.execute(text(f"ALTER TABLE transactions ATTACH PARTITION {name} {bounds}"))
+
+
+def create_partitions(months_ahead, now=None):
+    """
+    Make sure the current month and the next `months_ahead` have partitions, and move
+    months that piled up in the default partition (e.g. backfilled history) into their
+    own. Returns the names of the partitions created, or None if transactions isn't
+    partitioned (SQLite).
+    """
+    bind = db.session.connection()
+    if not is_partitioned(bind):
+        return None
+    existing = partitions(bind)
+    current = month_start(now or datetime.utcnow())
+    months = {add_months(current, n) for n in range(months_ahead + 1)}
+    months.update(month for (month,) in bind.execute(text(
+        f"SELECT DISTINCT date_trunc('month', created_at) FROM {DEFAULT_PARTITION}"
+    )))
+    created = []
+    for month in sorted(months - set(existing)):
+        create_partition(bind, month)
+        created.append(partition_name(month))
+    db.session.commit()
+    return created
+
+
+def _rebuild_table(bind, partitioned, months_ahead=0):
+    """
+    Replace transactions by a copy that is (or isn't) range-partitioned on created_at, in
+    the caller's transaction. The old table and its indexes are renamed out of the way,
+    rows are copied over, the id sequence changes owner and the old table is dropped.
+    A partitioned table's primary key must include the partition key, so it becomes
+    (id, created_at); ids still come from the one sequence and stay unique.
+    """
+    old = 'transactions_old'
+    bind.execute(text(f"ALTER TABLE transactions RENAME TO {old}"))
+    for (index,) in bind.execute(text(
+        "SELECT indexname FROM pg_indexes WHERE schemaname = current_schema() AND tablename = :table"
+    ), {'table': old}).all():
+        bind.execute(text(f'ALTER INDEX "{index}" RENAME TO "{index}_old"'))
+    sequence = bind.scalar(text(f"SELECT pg_get_serial_sequence('{old}', 'id')"))
+
+    like = f"CREATE TABLE transactions (LIKE {old} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+    if partitioned:
+        bind.execute(text(like + " PARTITION BY RANGE (created_at)"))
+        bind.execute(text("ALTER TABLE transactions ALTER COLUMN created_at SET NOT NULL"))
+        bind.execute(text("ALTER TABLE transactions ADD PRIMARY KEY (id, created_at)"))
+    else:
+        bind.execute(text(like))
+        bind.execute(text("ALTER TABLE transactions ALTER COLUMN created_at DROP NOT NULL"))
+        bind.execute(text("ALTER TABLE transactions ADD PRIMARY KEY (id)"))
+    for column, parent in (('user_id', 'users'), ('goal_id', 'goals')):
+        bind.execute(text(f"ALTER TABLE transactions ADD CONSTRAINT transactions_{column}_fkey "
+                          f"FOREIGN KEY ({column}) REFERENCES {parent} (id)"))
+    for index in Transaction.__table__.indexes:
+        index.create(bind)  # on a partitioned table, also created on every partition
+
+    if partitioned:
+        bind.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF transactions DEFAULT"))
+        current = month_start(datetime.utcnow())
+        first = bind.scalar(text(f"SELECT min(created_at) FROM {old}"))
+        month = min(month_start(first), current) if first else current
+        while month <= add_months(current, months_ahead):
+            create_partition(bind, month)
+            month = add_months(month, 1)
+
+    columns = ', '.join(f'"{c.name}"' for c in Transaction.__table__.columns)
+    values = columns.replace('"created_at"', 'COALESCE("created_at", now())')
+    bind.execute(text(f"INSERT INTO transactions ({columns}) SELECT {values} FROM {old}"))
+    if sequence:
+        bind.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY transactions.id"))
+    bind.execute(text(f"DROP TABLE {old}"))
+
+
+def partition_transactions(bind, months_ahead):
+    """
+    Turn the plain transactions table into one partitioned by created_at month (Postgres
+    only; a no-op elsewhere or when already done): one partition per month from the oldest
+    transaction to `months_ahead` months from now, plus a DEFAULT partition catching rows
+    outside them (e.g. when flask create-partitions hasn't run for a while).
+    """
+    if bind.dialect.name != 'postgresql' or is_partitioned(bind):
+        return
+    _rebuild_table(bind, partitioned=True, months_ahead=months_ahead)
+
+
+def unpartition_transactions(bind):
+    """Copy a partitioned transactions table back into a plain one (migration downgrade)."""
+    if not is_partitioned(bind):
+        return
+    _rebuild_table(bind, partitioned=False)
+
+
+def json_value(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def write_archive(path, month, columns, chunks):
+    """
+    Write row chunks to `path` as gzip'd JSON lines, column by column: a header with the
+    column names, one line per chunk ({"columns": {name: [values...]}}), then a trailer
+    with the row count and amount total. The file is fsynced and renamed into place, so
+    a file that exists is complete. Yields each chunk after writing it.
+    """
+    tmp = path + '.tmp'
+    rows, amount = 0, Decimal('0')
+    amount_index = columns.index('amount')
+    try:
+        with open(tmp, 'wb') as raw:
+            with gzip.GzipFile(fileobj=raw, mode='wb') as out:
+                def write(record):
+                    out.write((json.dumps(record, default=json_value, separators=(',', ':')) + '\n').encode())
+
+                write({'format': FORMAT_VERSION, 'table': 'transactions', 'month': f'{month:%Y-%m}',
+                       'columns': columns})
+                for chunk in chunks:
+                    write({'rows': len(chunk),
+                           'columns': {name: [row[i] for row in chunk] for i, name in enumerate(columns)}})
+                    rows += len(chunk)
+                    amount += sum((row[amount_index] for row in chunk), Decimal('0'))
+                    yield chunk
+                write({'rows': rows, 'amount_total': amount})
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def archive_month(bind, month, folder, row_group):
+    """
+    Move one month of transactions to an archive file and record its per-(goal, type)
+    totals in transaction_archives, in the caller's transaction.
+
+    A month with its own partition is locked against writes (reads go on), exported and
+    then detached and dropped; otherwise the rows are deleted with RETURNING and exported
+    as they come back. Either way exactly the exported rows leave the table. If the
+    transaction doesn't commit, the file is left over but no row refers to it.
+    Returns (file name, rows, totals) or None when the month had no rows.
+    """
+    table = Transaction.__table__
+    end = add_months(month, 1)
+    in_month = and_(table.c.created_at >= month, table.c.created_at < end)
+    partition = partitions(bind).get(month) if is_partitioned(bind) else None
+    if partition:
+        bind.execute(text(f"LOCK TABLE {partition} IN EXCLUSIVE MODE"))
+        result = bind.execute(select(table).where(in_month).order_by(table.c.created_at, table.c.id)
+                              .execution_options(yield_per=row_group))
+    else:
+        result = bind.execute(delete(table).where(in_month).returning(*table.c))
+
+    name = f'transactions-{month:%Y-%m}-{datetime.utcnow():%Y%m%d%H%M%S}.json.gz'
+    columns = [c.name for c in table.columns]
+    totals = defaultdict(lambda: {'user_id': None, 'tx_count': 0, 'amount_total': Decimal('0'),
+                                  'last_activity_at': None})
+    rows = 0
+    for chunk in write_archive(os.path.join(folder, name), month, columns, result.partitions(row_group)):
+        for row in chunk:
+            entry = totals[(row.goal_id, row.transaction_type)]
+            entry['user_id'] = row.user_id
+            entry['tx_count'] += 1
+            entry['amount_total'] += row.amount
+            if entry['last_activity_at'] is None or row.created_at > entry['last_activity_at']:
+                entry['last_activity_at'] = row.created_at
+        rows += len(chunk)
+
+    if partition:
+        bind.execute(text(f"ALTER TABLE transactions DETACH PARTITION {partition}"))
+        bind.execute(text(f"DROP TABLE {partition}"))
+    if not rows:
+        os.remove(os.path.join(folder, name))
+        return None
+    bind.execute(insert(TransactionArchive), [
+        {'month': f'{month:%Y-%m}', 'goal_id': goal_id, 'transaction_type': transaction_type, 'file': name,
+         **entry} for (goal_id, transaction_type), entry in totals.items()
+    ])
+    return name, rows, totals
+
+
+def archive_transactions(older_than_months, folder, row_group, dry_run=False, now=None):
+    """
+    Archive every month that ended more than `older_than_months` months ago, oldest
+    first, one transaction per month.
+
+    Goal balances and goal_stats/user_stats are left as they are: they already include
+    the archived rows, and rebuild_stats, the ledger reconciliation and goal charts add
+    the transaction_archives totals back in. Returns a summary dict.
+    """
+    cutoff = add_months(month_start(now or datetime.utcnow()), -older_than_months)
+    bind = db.session.connection()
+    first = bind.scalar(select(func.min(Transaction.created_at)).where(Transaction.created_at < cutoff))
+    months = set(m for m in partitions(bind) if m < cutoff) if is_partitioned(bind) else set()
+    month = month_start(first) if first else cutoff
+    while month < cutoff:
+        months.add(month)
+        month = add_months(month, 1)
+
+    summary = {'cutoff': cutoff, 'months': []}
+    for month in sorted(months):
+        if dry_run:
+            count, amount = db.session.execute(
+                select(func.count(Transaction.id), func.coalesce(func.sum(Transaction.amount), 0))
+                .where(Transaction.created_at >= month, Transaction.created_at < add_months(month, 1))
+            ).one()
+            if count:
+                summary['months'].append({'month': f'{month:%Y-%m}', 'rows': count, 'amount_total': Decimal(amount)})
+            continue
+
+        archived = archive_month(db.session.connection(), month, folder, row_group)
+        if archived is None:
+            db.session.commit()  # an empty partition was dropped
+            continue
+        name, rows, totals = archived
+        user_ids = {entry['user_id'] for entry in totals.values()}
+        bump_versions(user_ids=user_ids, goal_ids={goal_id for goal_id, _ in totals})
+        db.session.commit()
+        cache.invalidate(*user_ids)
+        summary['months'].append({'month': f'{month:%Y-%m}', 'rows': rows, 'file': name,
+                                  'amount_total': sum((e['amount_total'] for e in totals.values()), Decimal('0'))})
+    db.session.commit()
+    return summary
@@ -0,0 +1,125 @@
+import os
+import select
+import threading
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+from extensions import db
+
+
+class LocalBroker:
+    """In-process publish/subscribe; callbacks run synchronously in the publisher's thread."""
+
+    def __init__(self):
+        self.subscribers = {}  # channel -> list of callbacks
+        self.lock = threading.Lock()
+
+    def subscribe(self, channel, callback):
+        with self.lock:
+            self.subscribers.setdefault(channel, []).append(callback)
+
+    def unsubscribe(self, channel, callback):
+        with self.lock:
+            callbacks = self.subscribers.get(channel, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    def publish(self, channel, payload):
+        self.dispatch(channel, payload)
+
+    def publish_many(self, channel, payloads):
+        for payload in payloads:
+            self.dispatch(channel, payload)
+
+    def dispatch(self, channel, payload):
+        with self.lock:
+            callbacks = list(self.subscribers.get(channel, ()))
+        for callback in callbacks:
+            callback(payload)
+
+    def ensure_started(self):
+        pass
+
+
+class PostgresBroker(LocalBroker):
+    """
+    Fans messages out to every worker process through Postgres LISTEN/NOTIFY.
+
+    Publishing sends NOTIFY; a listener thread per process (started lazily, and
+    again after fork) receives notifications, including its own, and hands them
+    to the local subscribers.
+    """
+
+    def __init__(self, app):
+        super().__init__()
+        self.app = app
+        self.pid = None
+        self.thread = None
+        self.start_lock = threading.Lock()
+
+    def subscribe(self, channel, callback):
+        super().subscribe(channel, callback)
+        if self.pid == os.getpid():
+            with self.start_lock:
+                self.connection.cursor().execute(f'LISTEN "{channel}"')
+
+    def publish(self, channel, payload):
+        self.ensure_started()
+        with self.app.app_context():
+            with db.engine.connect() as conn:
+                conn.exec_driver_sql("SELECT pg_notify(%s, %s)", (channel, payload))
+                conn.commit()
+
+    def publish_many(self, channel, payloads):
+        """Send several messages with one connection and transaction."""
+        self.ensure_started()
+        with self.app.app_context():
+            with db.engine.connect() as conn:
+                conn.exec_driver_sql("SELECT pg_notify(%s, %s)", [(channel, payload) for payload in payloads])
+                conn.commit()
+
+    def ensure_started(self):
+        if self.pid == os.getpid() and self.thread.is_alive():
+            return
+        with self.start_lock:
+            if self.pid == os.getpid() and self.thread.is_alive():
+                return
+            # Dedicated connection outside the pool, held for the life of the process
+            with self.app.app_context():
+                url = self.app.config.get('PUBSUB_DATABASE_URL') or db.engine.url
+            self.raw_connection = create_engine(url, poolclass=NullPool).raw_connection()
+            self.connection = self.raw_connection.driver_connection
+            self.connection.autocommit = True
+            cursor = self.connection.cursor()
+            for channel in list(self.subscribers):
+                cursor.execute(f'LISTEN "{channel}"')
+            self.pid = os.getpid()
+            self.thread = threading.Thread(target=self._run, args=(self.connection,),
+                                           name='pubsub-listener', daemon=True)
+            self.thread.start()
+
+    def _run(self, conn):
+        while True:
+            try:
+                if select.select([conn], [], [], 5.0) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    notify = conn.notifies.pop(0)
+                    self.dispatch(notify.channel, notify.payload)
+            except Exception:
+                self.app.logger.exception("pub/sub listener failed")
+                return  # restarted by the next ensure_started()
+
+
+def init_pubsub(app):
+    """
+    Cross-worker broker: Postgres LISTEN/NOTIFY when the database is Postgres
+    (PUBSUB_BACKEND=auto), in-process otherwise (single worker / SQLite).
+    """
+    uri = app.config.get('SQLALCHEMY_DATABASE_URI') or ''
+    if app.config.get('PUBSUB_BACKEND') != 'local' and uri.startswith('postgres'):
+        broker = PostgresBroker(app)
+    else:
+        broker = LocalBroker()
+    app.extensions['pubsub'] = broker
+    return broker
@@ -0,0 +1,110 @@
+import time
+from datetime import timedelta
+from decimal import Decimal
+from flask import current_app
+from sqlalchemy import and_, func, select
+from extensions import db, cache
+from ledger import apply_goal_deltas
+from models import Goal, JobWatermark, Transaction, TransactionArchive
+from versioning import bump_versions
+
+WATERMARK = 'ledger_reconciliation'
+CENT = Decimal('0.01')
+
+
+def ledger_balances(since=None):
+    """
+    (goal_id, user_id, current_amount, ledger total) for every goal, or only for goals with
+    transactions created after `since`, as one grouped query. The ledger total is
+    SUM(transactions.amount) plus the totals of months moved out by flask archive-transactions.
+    """
+    totals = select(Transaction.goal_id, func.sum(Transaction.amount).label('total'))
+    archived = select(TransactionArchive.goal_id, func.sum(TransactionArchive.amount_total).label('total'))
+    goals = select(Goal.id, Goal.user_id, Goal.current_amount)
+    if since is not None:
+        # ix_transactions_created_goal (within the newest monthly partitions on Postgres)
+        touched = (select(Goal.id, Goal.user_id)
+                   .where(Goal.id.in_(select(Transaction.goal_id).where(Transaction.created_at > since)))
+                   .cte('touched'))
+        # Summed by (user_id, goal_id) so ix_transactions_user_goal_created serves the lookups
+        totals = totals.join(touched, and_(Transaction.user_id == touched.c.user_id,
+                                           Transaction.goal_id == touched.c.id))
+        archived = archived.where(TransactionArchive.goal_id.in_(select(touched.c.id)))
+        goals = goals.where(Goal.id.in_(select(touched.c.id)))
+    totals = totals.group_by(Transaction.goal_id).subquery()
+    archived = archived.group_by(TransactionArchive.goal_id).subquery()
+    return (goals.add_columns(func.coalesce(totals.c.total, 0) + func.coalesce(archived.c.total, 0))
+            .outerjoin(totals, totals.c.goal_id == Goal.id)
+            .outerjoin(archived, archived.c.goal_id == Goal.id))
+
+
+def last_watermark():
+    row = db.session.get(JobWatermark, WATERMARK)
+    return row.watermark if row else None
+
+
+def reconcile(since=None, repair=False, chunk_size=None):
+    """
+    Verify goal balances against their transactions.
+
+    The grouped query is streamed chunk_size rows at a time (server-side cursor on
+    Postgres) and reads balances and sums from one snapshot. With `repair`, each
+    drifted goal gets (ledger - balance) added atomically, so contributions made
+    while the job runs are never overwritten. Returns a summary dict; the caller
+    decides whether to advance the watermark.
+    """
+    chunk_size = chunk_size or current_app.config['RECONCILE_CHUNK_SIZE']
+    started = time.perf_counter()
+    checked = 0
+    drifted = []
+
+    result = db.session.execute(ledger_balances(since).execution_options(yield_per=chunk_size))
+    for chunk in result.partitions():
+        checked += len(chunk)
+        for goal_id, user_id, balance, total in chunk:
+            drift = (Decimal(str(total)) - Decimal(str(balance or 0))).quantize(CENT)
+            if drift:
+                drifted.append({'goal_id': goal_id, 'user_id': user_id,
+                                'balance': Decimal(str(balance or 0)).quantize(CENT),
+                                'ledger': Decimal(str(total)).quantize(CENT), 'drift': drift})
+    db.session.commit()  # end the read snapshot before repairing
+
+    if repair:
+        for i in range(0, len(drifted), chunk_size):
+            batch = drifted[i:i + chunk_size]
+            user_ids = {d['user_id'] for d in batch}
+            apply_goal_deltas({d['goal_id']: d['drift'] for d in batch})
+            bump_versions(user_ids=user_ids)  # so user-level ETags (e.g. /api/goals) change too
+            db.session.commit()
+            cache.invalidate(*user_ids)
+
+    return {
+        'checked': checked,
+        'drifted': len(drifted),
+        'total_drift': sum((d['drift'] for d in drifted), Decimal('0')),
+        'repaired': len(drifted) if repair else 0,
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 2),
+        'goals': drifted,
+    }
+
+
+def run_reconciliation(incremental=False, since=None, repair=False, chunk_size=None):
+    """
+    Reconcile all goals, or (incremental) only those touched since the last clean run
+    minus RECONCILE_OVERLAP_SECONDS, which covers transactions committed late with an
+    earlier created_at. The watermark only advances when no unrepaired drift is left,
+    so drift keeps being reported until it is fixed.
+    """
+    run_started = db.session.scalar(select(func.now()))
+    if since is None and incremental:
+        watermark = last_watermark()
+        if watermark is not None:
+            since = watermark - timedelta(seconds=current_app.config['RECONCILE_OVERLAP_SECONDS'])
+
+    summary = reconcile(since=since, repair=repair, chunk_size=chunk_size)
+    summary['since'] = since
+
+    if summary['drifted'] == summary['repaired']:
+        db.session.merge(JobWatermark(name=WATERMARK, watermark=run_started))
+        db.session.commit()
+    return summary
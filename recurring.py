@@ -0,0 +1,208 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import and_, func, or_, select, update
+from extensions import db, dialect_insert, cache
+from ledger import bulk_add_transactions
+from models import Goal, SavingsRule, RecurringRun
+
+# Minimum time between executions per frequency. A rule also runs at most once per
+# period_key period (calendar day, ISO week, calendar month), so monthly rules run on
+# the first pass of each month that is at least 28 days after the last execution.
+RECURRING_INTERVALS = {
+    'daily': timedelta(days=1),
+    'weekly': timedelta(weeks=1),
+    'monthly': timedelta(days=28),
+}
+
+
+def due_clause(now):
+    """SQL condition matching recurring rules that are due at `now`."""
+    conditions = [SavingsRule.last_executed.is_(None)]
+    for frequency, interval in RECURRING_INTERVALS.items():
+        conditions.append(and_(
+            SavingsRule.frequency == frequency,
+            SavingsRule.last_executed <= now - interval,
+            # Last run in an earlier period, so a due rule can always claim its period
+            SavingsRule.last_executed < period_start(frequency, now),
+        ))
+    return or_(*conditions)
+
+
+def active_recurring_clause(shard_index=0, shard_count=1):
+    clause = and_(SavingsRule.rule_type == 'recurring', SavingsRule.is_active.is_(True))
+    if shard_count > 1:
+        # Rules are partitioned by user so one user's rules always land on the same shard
+        clause = and_(clause, SavingsRule.user_id % shard_count == shard_index)
+    return clause
+
+
+def period_key(frequency, now):
+    """Ledger period a rule execution at `now` belongs to."""
+    if frequency == 'daily':
+        return now.strftime('%Y-%m-%d')
+    if frequency == 'weekly':
+        year, week, _ = now.isocalendar()
+        return f"{year}-W{week:02d}"
+    if frequency == 'monthly':
+        return now.strftime('%Y-%m')
+    return 'once'
+
+
+def period_start(frequency, now):
+    """Start of the period_key period containing `now`."""
+    day = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    if frequency == 'weekly':
+        return day - timedelta(days=now.weekday())  # ISO weeks start on Monday
+    if frequency == 'monthly':
+        return day.replace(day=1)
+    return day
+
+
+def claim_periods(rules, now):
+    """
+    Record (rule_id, period) in the run ledger for each rule.
+    Returns the ids of rules that were not already executed for their period.
+    """
+    stmt = (
+        dialect_insert(RecurringRun)
+        .values([{'rule_id': r.id, 'period': period_key(r.frequency, now)} for r in rules])
+        .on_conflict_do_nothing(index_elements=['rule_id', 'period'])
+        .returning(RecurringRun.rule_id)
+    )
+    return set(db.session.scalars(stmt))
+
+
+def run_recurring_rules(now=None, chunk_size=None, shard_index=0, shard_count=1):
+    """
+    Execute every due recurring rule in set-based chunks.
+
+    Due rules are selected in SQL, their transactions are bulk-inserted and the
+    per-goal totals are applied with one UPDATE per chunk. Each chunk commits on
+    its own so row locks on goals are held only briefly.
+
+    On Postgres rules are claimed with FOR UPDATE SKIP LOCKED so concurrent runners
+    split the work; on SQLite writers are serialized by the database lock. In both
+    cases the run ledger's (rule_id, period) key makes a retried or concurrent run
+    skip rules that already executed.
+    """
+    now = now or datetime.utcnow()
+    chunk_size = chunk_size or current_app.config['RECURRING_BATCH_SIZE']
+    active = active_recurring_clause(shard_index, shard_count)
+
+    total = db.session.scalar(select(func.count(SavingsRule.id)).where(active))
+    due = (
+        select(SavingsRule.id, SavingsRule.user_id, SavingsRule.goal_id,
+               SavingsRule.amount, SavingsRule.rule_name, SavingsRule.frequency)
+        .join(Goal, Goal.id == SavingsRule.goal_id)
+        .where(active, due_clause(now))
+        .order_by(SavingsRule.id)
+        .limit(chunk_size)
+        .with_for_update(of=SavingsRule, skip_locked=True)
+    )
+
+    executed = []
+    duplicates = 0
+    chunks = 0
+    last_id = 0
+    while True:
+        rules = db.session.execute(due.where(SavingsRule.id > last_id)).all()
+        if not rules:
+            db.session.rollback()
+            break
+        last_id = rules[-1].id
+
+        claimed = claim_periods(rules, now)
+        duplicates += len(rules) - len(claimed)
+        rules = [r for r in rules if r.id in claimed]
+        rule_ids = [r.id for r in rules]
+
+        bulk_add_transactions([{
+            'user_id': r.user_id,
+            'goal_id': r.goal_id,
+            'amount': r.amount,
+            'transaction_type': 'recurring',
+            'description': r.rule_name,
+            'transaction_metadata': {'rule_id': r.id},
+            'is_undoable': True,
+        } for r in rules], now=now)
+        if rule_ids:
+            db.session.execute(
+                update(SavingsRule)
+                .where(SavingsRule.id.in_(rule_ids))
+                .values(last_executed=now)
+                .execution_options(synchronize_session=False)
+            )
+        db.session.commit()
+        cache.invalidate(*{r.user_id for r in rules})
+
+        executed.extend(rule_ids)
+        chunks += 1
+
+    return {
+        'executed': len(executed),
+        'skipped': (total or 0) - len(executed),
+        'already_run': duplicates,
+        'chunks': chunks,
+        'executed_rule_ids': executed,
+    }
+
+
+def run_sharded(app, shard_count, now=None, chunk_size=None):
+    """Run every shard concurrently, one worker thread (and DB session) per shard."""
+    now = now or datetime.utcnow()
+
+    def run_shard(shard_index):
+        with app.app_context():
+            return run_recurring_rules(now, chunk_size, shard_index, shard_count)
+
+    with ThreadPoolExecutor(max_workers=shard_count) as pool:
+        results = list(pool.map(run_shard, range(shard_count)))
+
+    return {
+        'executed': sum(r['executed'] for r in results),
+        'skipped': sum(r['skipped'] for r in results),
+        'already_run': sum(r['already_run'] for r in results),
+        'chunks': sum(r['chunks'] for r in results),
+        'executed_rule_ids': sorted(i for r in results for i in r['executed_rule_ids']),
+    }
+
+
+class RecurringScheduler(threading.Thread):
+    """In-process worker that runs due recurring rules every `interval` seconds."""
+
+    def __init__(self, app, interval, shard_count=1):
+        super().__init__(name='recurring-scheduler', daemon=True)
+        self.app = app
+        self.interval = interval
+        self.shard_count = shard_count
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.run_once()
+
+    def run_once(self):
+        try:
+            summary = run_sharded(self.app, self.shard_count)
+            if summary['executed']:
+                self.app.logger.info("Recurring scheduler executed %d rules", summary['executed'])
+        except Exception:
+            self.app.logger.exception("Recurring scheduler run failed")
+
+    def stop(self):
+        self.stopped.set()
+
+
+def start_recurring_scheduler(app):
+    """Start the in-process scheduler when RECURRING_SCHEDULER_ENABLED is set."""
+    if not app.config.get('RECURRING_SCHEDULER_ENABLED'):
+        return None
+    scheduler = RecurringScheduler(
+        app,
+        interval=app.config['RECURRING_SCHEDULER_INTERVAL'],
+        shard_count=app.config['RECURRING_SHARDS'],
+    )
+    scheduler.start()
+    return scheduler
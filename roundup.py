@@ -0,0 +1,45 @@
+from decimal import Decimal
+
+CENT = Decimal('0.01')
+
+
+def to_cents(value):
+    """Exact Decimal -> integer cents (values are quantized to cents first)."""
+    return int(Decimal(str(value)).quantize(CENT) * 100)
+
+
+def from_cents(cents):
+    return (Decimal(cents) * CENT).quantize(CENT)
+
+
+def round_up_cents(expense_cents, mode, step, floor):
+    """
+    Round-up in cents for a batch of expenses (integer cents, so the math is exact).
+
+    mode 'fixed' adds `step` per expense; 'to_next_dollar' adds ceil(expense) - expense,
+    raised to at least `floor`. `step` and `floor` are Decimal amounts.
+    """
+    if mode == 'fixed':
+        step_cents = to_cents(step)
+        return [step_cents] * len(expense_cents)
+    if mode == 'to_next_dollar':
+        floor_cents = to_cents(floor)
+        return [max(-cents % 100, floor_cents) for cents in expense_cents]
+    raise ValueError(f"Unknown ROUND_UP_MODE {mode!r}")
+
+
+def compute_round_ups(expenses, paces, config):
+    """
+    Round-up plus pace bonus for each expense.
+
+    expenses: list of Decimal expense amounts; paces: matching list of goal savings_pace values.
+    Returns a list of (round_up, bonus, total) Decimals.
+    """
+    round_ups = round_up_cents([to_cents(e) for e in expenses], config['ROUND_UP_MODE'],
+                               config['FIXED_ROUND_UP_STEP'], config['MIN_ROUND_UP_FLOOR'])
+    bonus_cents = {pace: to_cents(bonus) for pace, bonus in config['PACE_BONUS'].items()}
+    results = []
+    for cents, pace in zip(round_ups, paces):
+        bonus = bonus_cents.get(pace, 0)
+        results.append((from_cents(cents), from_cents(bonus), from_cents(cents + bonus)))
+    return results
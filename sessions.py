@@ -0,0 +1,192 @@
+import hashlib
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from flask import session
+from sqlalchemy import delete, select
+from extensions import db
+from models import UserSession
+
+REVOKE_CHANNEL = 'session_revoked'
+
+
+def token_hash(token):
+    """Only a SHA-256 of each token is stored, so a database leak does not leak live sessions."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class SessionStore:
+    """
+    Server-side sessions backed by the user_sessions table.
+
+    The signed cookie carries user_id plus an opaque token; every request checks
+    the token against the table. Valid tokens are cached in-process for
+    SESSION_CACHE_TTL seconds, so most requests cost no query. Revocation
+    deletes the row and is broadcast over pub/sub so every worker drops its
+    cached entry at once; SESSION_CACHE_TTL bounds staleness if a message is lost.
+    """
+
+    def __init__(self, app=None):
+        self.entries = OrderedDict()  # token hash -> (user_id, expires_at, cached_until)
+        self.lock = threading.Lock()
+        self.counters = {'hits': 0, 'misses': 0, 'rejected': 0, 'revoked': 0, 'swept': 0}
+        self.sweeper = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.lifetime = timedelta(seconds=app.config['SESSION_LIFETIME'])
+        self.cache_ttl = app.config['SESSION_CACHE_TTL']
+        self.max_entries = app.config['SESSION_CACHE_MAX_ENTRIES']
+        self.broker = app.extensions['pubsub']
+        self.broker.subscribe(REVOKE_CHANNEL, self._on_revoked)
+        app.before_request(self._check_request)
+        app.extensions['session_store'] = self
+
+    # -- lifecycle --------------------------------------------------------
+
+    def create(self, user_id):
+        """Add a session for `user_id` and return its token (the caller commits)."""
+        token = secrets.token_urlsafe(32)
+        db.session.add(UserSession(
+            user_id=user_id,
+            session_token=token_hash(token),
+            expires_at=datetime.utcnow() + self.lifetime,
+        ))
+        return token
+
+    def validate(self, user_id, token):
+        if not token:
+            return False
+        key = token_hash(token)
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[2] > now:
+                self.entries.move_to_end(key)
+                if entry[0] == user_id and entry[1] > datetime.utcnow():
+                    self.counters['hits'] += 1
+                    return True
+                self.counters['rejected'] += 1
+                return False
+
+        self.counters['misses'] += 1
+        row = db.session.execute(
+            select(UserSession.user_id, UserSession.expires_at)
+            .where(UserSession.session_token == key)
+        ).first()
+        if row is None or row.user_id != user_id or row.expires_at <= datetime.utcnow():
+            self.counters['rejected'] += 1
+            return False
+
+        with self.lock:
+            self.entries[key] = (row.user_id, row.expires_at, now + self.cache_ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return True
+
+    def revoke(self, token):
+        """Delete one session and tell every worker to forget it."""
+        if not token:
+            return 0
+        key = token_hash(token)
+        deleted = db.session.execute(delete(UserSession).where(UserSession.session_token == key)).rowcount
+        db.session.commit()
+        self.broker.publish(REVOKE_CHANNEL, f'token:{key}')
+        return deleted
+
+    def revoke_user(self, user_id):
+        """Delete all of a user's sessions (e.g. after a password change) on every worker."""
+        deleted = db.session.execute(delete(UserSession).where(UserSession.user_id == user_id)).rowcount
+        db.session.commit()
+        self.broker.publish(REVOKE_CHANNEL, f'user:{user_id}')
+        return deleted
+
+    def _on_revoked(self, payload):
+        kind, _, value = payload.partition(':')
+        with self.lock:
+            if kind == 'token':
+                removed = 1 if self.entries.pop(value, None) else 0
+            else:
+                user_id = int(value)
+                keys = [k for k, entry in self.entries.items() if entry[0] == user_id]
+                for k in keys:
+                    del self.entries[k]
+                removed = len(keys)
+            self.counters['revoked'] += removed
+
+    def _check_request(self):
+        user_id = session.get('user_id')
+        if user_id is None:
+            return
+        self.broker.ensure_started()
+        self._ensure_sweeper()
+        if not self.validate(user_id, session.get('session_token')):
+            # Expired, revoked or pre-dates the session store: treat as logged out
+            session.pop('user_id', None)
+            session.pop('session_token', None)
+
+    # -- expiry -----------------------------------------------------------
+
+    def sweep(self, batch_size=None, now=None):
+        """Delete expired sessions in batches (one short transaction each). Returns rows deleted."""
+        batch_size = batch_size or self.app.config['SESSION_SWEEP_BATCH_SIZE']
+        now = now or datetime.utcnow()
+        total = 0
+        while True:
+            expired = (select(UserSession.id)
+                       .where(UserSession.expires_at <= now)
+                       .limit(batch_size)
+                       .scalar_subquery())
+            deleted = db.session.execute(delete(UserSession).where(UserSession.id.in_(expired))).rowcount
+            db.session.commit()
+            total += deleted
+            if deleted < batch_size:
+                break
+        self.counters['swept'] += total
+        return total
+
+    def _ensure_sweeper(self):
+        if not self.app.config['SESSION_SWEEPER_ENABLED']:
+            return
+        if self.sweeper is not None and self.sweeper.is_alive() and self.sweeper.pid == os.getpid():
+            return
+        with self.lock:
+            if self.sweeper is None or not self.sweeper.is_alive() or self.sweeper.pid != os.getpid():
+                self.sweeper = SessionSweeper(self, self.app.config['SESSION_SWEEP_INTERVAL'])
+                self.sweeper.start()
+
+    def stats(self):
+        return dict(self.counters, cached=len(self.entries))
+
+
+class SessionSweeper(threading.Thread):
+    """Per-process background thread that purges expired sessions every `interval` seconds."""
+
+    def __init__(self, store, interval):
+        super().__init__(name='session-sweeper', daemon=True)
+        self.store = store
+        self.interval = interval
+        self.pid = os.getpid()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                with self.store.app.app_context():
+                    deleted = self.store.sweep()
+                if deleted:
+                    self.store.app.logger.info("Session sweeper deleted %d expired sessions", deleted)
+            except Exception:
+                self.store.app.logger.exception("Session sweep failed")
+
+    def stop(self):
+        self.stopped.set()
+
+
+session_store = SessionStore()
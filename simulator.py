@@ -0,0 +1,324 @@
+import math
+import statistics
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import InvalidOperation
+from itertools import accumulate
+from types import SimpleNamespace
+from flask import current_app
+from sqlalchemy import Float, String, and_, case, cast, distinct, func, or_, select
+from extensions import db
+from forecast import forecast_inputs, rule_schedule, schedule
+from ledger import decimalize
+from models import GoalStats, SavingsRule, Transaction
+from recurring import RECURRING_INTERVALS
+from timeseries import as_datetime, time_bucket
+from triggers import normalize_category
+
+RULE_COLUMNS = (SavingsRule.id, SavingsRule.goal_id, SavingsRule.rule_type, SavingsRule.rule_name,
+                SavingsRule.amount, SavingsRule.frequency, SavingsRule.trigger_category,
+                SavingsRule.is_active, SavingsRule.created_at, SavingsRule.last_executed)
+
+
+def proposed_rules(user_id, changes):
+    """
+    Validate [{rule_id, amount?, frequency?, trigger_category?, is_active?}, ...] against
+    the user's rules. Returns [(current, proposed), ...] as plain namespaces, so nothing
+    is attached to the session. Raises ValueError.
+    """
+    if not isinstance(changes, list) or not changes:
+        raise ValueError("Expected a non-empty list of rule changes")
+    if not all(isinstance(c, dict) and isinstance(c.get('rule_id'), int) for c in changes):
+        raise ValueError("Each change needs an integer rule_id")
+
+    rows = db.session.execute(
+        select(*RULE_COLUMNS).where(SavingsRule.user_id == user_id,
+                                    SavingsRule.id.in_([c['rule_id'] for c in changes]))
+    ).all()
+    found = {row.id: row for row in rows}
+
+    pairs = []
+    for change in changes:
+        row = found.get(change['rule_id'])
+        if row is None:
+            raise ValueError(f"Rule {change['rule_id']} not found")
+        current = SimpleNamespace(**row._asdict())
+        proposed = SimpleNamespace(**row._asdict())
+        if change.get('amount') is not None:
+            try:
+                proposed.amount = decimalize(change['amount'])
+            except InvalidOperation:
+                raise ValueError("Invalid amount")
+            if not proposed.amount.is_finite() or proposed.amount <= 0:
+                raise ValueError("Amount must be positive")
+        for field in ('frequency', 'trigger_category'):
+            if field in change:
+                if change[field] is not None and not isinstance(change[field], str):
+                    raise ValueError(f"{field} must be a string")
+                setattr(proposed, field, change[field] or None)
+        if 'is_active' in change:
+            proposed.is_active = bool(change['is_active'])
+        if proposed.rule_type == 'recurring' and proposed.frequency not in RECURRING_INTERVALS:
+            raise ValueError(f"frequency must be one of: {', '.join(RECURRING_INTERVALS)}")
+        pairs.append((current, proposed))
+    return pairs
+
+
+def rule_events(user_id, rules):
+    """
+    What each rule saved so far as day columns: {rule_id: (dates, counts, amounts)}.
+    Rule transactions carry the rule's id in their metadata. Older ones, written before
+    they did, are matched the way the ledger wrote them (same goal, the rule's transaction
+    type, its name as description); raises ValueError when such rows fit several of the
+    user's rules. Summed per day in one query.
+    """
+    # Compared as text, so metadata holding something else under rule_id can't fail a cast
+    tagged = cast(Transaction.transaction_metadata['rule_id'].as_string(), String)
+    names = {(r.rule_type, r.goal_id, r.rule_name) for r in rules}
+    owners = defaultdict(list)
+    for rule_id, *key in db.session.execute(
+            select(SavingsRule.id, SavingsRule.rule_type, SavingsRule.goal_id, SavingsRule.rule_name)
+            .where(SavingsRule.user_id == user_id, SavingsRule.goal_id.in_([r.goal_id for r in rules]))):
+        owners[tuple(key)].append(rule_id)
+
+    day = time_bucket(Transaction.created_at, 'day')
+    rows = db.session.execute(
+        select(tagged, Transaction.transaction_type, Transaction.goal_id, Transaction.description,
+               day, func.count(Transaction.id), func.sum(Transaction.amount, type_=Float))
+        .where(Transaction.user_id == user_id,
+               or_(*(and_(Transaction.transaction_type == r.rule_type, Transaction.goal_id == r.goal_id,
+                          tagged == str(r.id)) for r in rules),
+                   and_(tagged.is_(None),
+                        or_(*(and_(Transaction.transaction_type == t, Transaction.goal_id == g,
+                                   Transaction.description == n) for t, g, n in names)))))
+        .group_by(tagged, Transaction.transaction_type, Transaction.goal_id, Transaction.description, day)
+    )
+    days = {r.id: defaultdict(lambda: [0, 0.0]) for r in rules}
+    for tagged_id, tx_type, goal_id, description, bucket, count, amount in rows:
+        if tagged_id is None:
+            candidates = owners[(tx_type, goal_id, description)]
+            if len(candidates) > 1:
+                raise ValueError(f"Rules {', '.join(map(str, sorted(candidates)))} share the name "
+                                 f"{description!r}; their older transactions can't be told apart")
+            rule_id = candidates[0]
+        else:
+            rule_id = int(tagged_id)
+        totals = days[rule_id][as_datetime(bucket).date()]
+        totals[0] += count
+        totals[1] += float(amount)
+
+    events = {}
+    for rule_id, per_day in days.items():
+        dates = sorted(per_day)
+        events[rule_id] = (dates, [per_day[d][0] for d in dates], [per_day[d][1] for d in dates])
+    return events
+
+
+def expense_days(user_id, category, since):
+    """Days with card expenses in `category` (normalized) since `since`: (dates, counts)."""
+    recorded = and_(Transaction.user_id == user_id, Transaction.original_expense_amount.isnot(None))
+    spellings = [c for c in db.session.scalars(
+        select(distinct(Transaction.expense_category)).where(recorded, Transaction.expense_category.isnot(None))
+    ) if normalize_category(c) == category]
+    if not spellings:
+        return [], []
+
+    day = time_bucket(Transaction.created_at, 'day')
+    # An expense's round-up and its taxes share one created_at, so distinct timestamps count expenses
+    stmt = (select(day, func.count(distinct(Transaction.created_at)))
+            .where(recorded, Transaction.expense_category.in_(spellings))
+            .group_by(day).order_by(day))
+    if since is not None:
+        stmt = stmt.where(Transaction.created_at >= since)
+    rows = db.session.execute(stmt).all()
+    return [as_datetime(bucket).date() for bucket, _ in rows], [count for _, count in rows]
+
+
+def replay(user_id, current, proposed, dates, counts):
+    """
+    Days and number of times the proposed rule would have saved over the period the
+    current one was in use: recurring rules re-run their schedule between the first and
+    last execution, guilty pleasure taxes with a new category re-match the expense
+    history, and habit rewards keep the logged habits.
+    """
+    if not proposed.is_active:
+        return [], []
+    if proposed.rule_type == 'recurring' and dates:
+        step = RECURRING_INTERVALS[proposed.frequency].days
+        runs = range(0, (dates[-1] - dates[0]).days + 1, step)
+        return [dates[0] + timedelta(days=d) for d in runs], [1] * len(runs)
+    if (proposed.rule_type == 'guilty_pleasure_tax'
+            and normalize_category(proposed.trigger_category) != normalize_category(current.trigger_category)):
+        category = normalize_category(proposed.trigger_category)
+        return expense_days(user_id, category, current.created_at) if category else ([], [])
+    return dates, counts
+
+
+def completion_date(user_id, goal_id, target, deltas):
+    """
+    First day on which the goal's running balance, with `deltas` ({date: amount})
+    applied, reached target, else None.
+
+    Walks the monthly goal_stats totals and reads a month's transactions day by day
+    only when its opening balance plus everything saved in it could reach the target,
+    so the cost doesn't grow with the length of the history. Archived months have no
+    transactions left to read and resolve to their last day.
+    """
+    stats = {(int(month[:4]), int(month[5:])): (float(net), float(saved)) for month, net, saved in db.session.execute(
+        select(GoalStats.month, func.sum(GoalStats.amount_total),
+               func.sum(case((GoalStats.amount_total > 0, GoalStats.amount_total), else_=0)))
+        .where(GoalStats.goal_id == goal_id).group_by(GoalStats.month)
+    )}
+    monthly = defaultdict(lambda: [0.0, 0.0])
+    for d, delta in deltas.items():
+        totals = monthly[(d.year, d.month)]
+        totals[0] += delta
+        totals[1] += max(delta, 0.0)
+
+    day = time_bucket(Transaction.created_at, 'day')
+    opening = 0.0
+    for month in sorted(set(stats) | set(monthly)):
+        net, saved = stats.get(month, (0.0, 0.0))
+        delta_net, delta_saved = monthly.get(month, (0.0, 0.0))
+        if opening + saved + delta_saved >= target - 0.005:
+            start = datetime(*month, 1)
+            end = (start + timedelta(days=32)).replace(day=1)
+            days = {as_datetime(bucket).date(): float(amount) for bucket, amount in db.session.execute(
+                select(day, func.sum(Transaction.amount, type_=Float))
+                .where(Transaction.user_id == user_id, Transaction.goal_id == goal_id,
+                       Transaction.created_at >= start, Transaction.created_at < end)
+                .group_by(day)
+            )}
+            for d, delta in deltas.items():
+                if start.date() <= d < end.date():
+                    days[d] = days.get(d, 0.0) + delta
+            balance = opening
+            for d in sorted(days):
+                balance += days[d]
+                if balance >= target - 0.005:
+                    return d
+            if opening + net + delta_net >= target - 0.005:
+                return end.date() - timedelta(days=1)
+        opening += net + delta_net
+    return None
+
+
+def projection(balance, target, rate, deposits):
+    """Expected running balance for each future day and the first day it reaches target."""
+    path = list(accumulate((rate + d for d in deposits), initial=balance))[1:]
+    reached = next((i + 1 for i, b in enumerate(path) if b >= target - 0.005), None)
+    return path, reached
+
+
+def simulate_rules(user_id, changes, days=None):
+    """
+    Dry run of rule changes: where each affected goal would stand today had the proposed
+    rules always applied, and its expected balance and completion date from here on.
+
+    History is replayed as per-day columns (what each rule saved vs what the proposed
+    rule would have saved) applied to the goal's balance. The future uses the forecast
+    inputs (recurring schedule plus the mean unscheduled saving of the lookback window)
+    with the proposed rules swapped in. Only reads; nothing is written.
+    """
+    started = time.perf_counter()
+    config = current_app.config
+    now = datetime.utcnow()
+    today = now.date()
+    days = days or config['SIMULATION_DAYS']
+    horizon = max(days, config['FORECAST_HORIZON_DAYS'])
+    lookback = config['FORECAST_LOOKBACK_DAYS']
+    window_start = today - timedelta(days=lookback - 1)
+
+    pairs = proposed_rules(user_id, changes)
+    events = rule_events(user_id, [current for current, _ in pairs])
+    items = {i['goal'].id: i for i in forecast_inputs([user_id], now, config)}
+    baseline = {goal_id: {'rules': dict(i['rules']), 'daily': list(i['daily'])} for goal_id, i in items.items()}
+
+    deltas = defaultdict(lambda: defaultdict(float))  # goal_id -> date -> proposed - current
+    rules = []
+    for current, proposed in pairs:
+        if current.goal_id not in items:
+            continue
+        dates, counts, amounts = events[current.id]
+        new_dates, new_counts = replay(user_id, current, proposed, dates, counts)
+        amount = float(proposed.amount)
+        changed = [(d, -a) for d, a in zip(dates, amounts)] + [(d, n * amount) for d, n in zip(new_dates, new_counts)]
+        for d, delta in changed:
+            deltas[current.goal_id][d] += delta
+
+        item = items[current.goal_id]
+        if current.rule_type == 'recurring':
+            # Recurring savings are modelled from the schedule, not from the sampled history
+            item['rules'].pop(current.id, None)
+            if proposed.is_active:
+                item['rules'][proposed.id] = rule_schedule(proposed, now)
+        else:
+            offset = lookback - len(item['daily'])
+            for d, delta in changed:
+                index = (d - window_start).days - offset
+                if 0 <= index < len(item['daily']):
+                    item['daily'][index] += delta
+
+        rules.append({
+            'rule_id': current.id,
+            'goal_id': current.goal_id,
+            'rule_type': proposed.rule_type,
+            'amount': amount,
+            'frequency': proposed.frequency,
+            'trigger_category': proposed.trigger_category,
+            'is_active': proposed.is_active,
+            'history': {'transactions': sum(counts), 'saved': round(sum(amounts), 2),
+                        'replayed': sum(new_counts), 'replayed_saved': round(amount * sum(new_counts), 2)},
+        })
+
+    step = max(1, math.ceil(days / config['SIMULATION_MAX_POINTS']))
+    goals = []
+    for goal_id in dict.fromkeys(r['goal_id'] for r in rules):
+        item = items[goal_id]
+        goal = item['goal']
+        target = float(goal.target_amount)
+        balance = float(goal.current_amount)
+        change = sum(deltas[goal_id].values())
+        scenarios = {
+            'current': (balance, baseline[goal_id], goal.completed_at.date() if goal.completed_at else None),
+            'proposed': (balance + change, item, completion_date(user_id, goal_id, target, deltas[goal_id])),
+        }
+
+        results, paths = {}, {}
+        for name, (start, inputs, completed) in scenarios.items():
+            rate = statistics.fmean(inputs['daily'])
+            paths[name], reached = projection(start, target, rate, schedule(inputs, horizon))
+            if completed is None and reached is not None:
+                completed = today + timedelta(days=reached)
+            results[name] = {
+                'balance': round(start, 2),
+                'daily_rate': round(rate + sum(a / s for _, s, a in inputs['rules'].values()), 2),
+                'completion_date': completed.isoformat() if completed else None,
+            }
+
+        current, proposed = results['current'], results['proposed']
+        goals.append({
+            'goal_id': goal_id,
+            'name': goal.name,
+            'target_amount': target,
+            **results,
+            'difference': {
+                'balance': round(change, 2),
+                'days': ((date.fromisoformat(proposed['completion_date'])
+                          - date.fromisoformat(current['completion_date'])).days
+                         if current['completion_date'] and proposed['completion_date'] else None),
+            },
+            'projection': [{'date': (today + timedelta(days=d + 1)).isoformat(),
+                            'current': round(paths['current'][d], 2),
+                            'proposed': round(paths['proposed'][d], 2)}
+                           for d in range(step - 1, days, step)],
+        })
+
+    return {
+        'dry_run': True,
+        'days': days,
+        'rules': rules,
+        'goals': goals,
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 2),
+    }
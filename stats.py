@@ -0,0 +1,135 @@
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import delete, func, insert, select, union_all
+from extensions import db, dialect_insert
+from models import GoalStats, UserStats, Transaction, TransactionArchive
+
+
+def month_bucket(column):
+    """SQL expression formatting a timestamp column as YYYY-MM."""
+    if db.engine.dialect.name == 'postgresql':
+        return func.to_char(column, 'YYYY-MM')
+    return func.strftime('%Y-%m', column)
+
+
+def record_transactions(rows, now=None):
+    """
+    Fold transactions into goal_stats/user_stats with one upsert per table.
+
+    Rows are dicts with user_id, goal_id, transaction_type and amount, plus an
+    optional created_at (defaults to now) and count (defaults to 1; pass -1 with
+    a negated amount to take a transaction back out).
+    """
+    now = now or datetime.utcnow()
+    goals = defaultdict(lambda: [0, Decimal('0'), None])
+    users = defaultdict(lambda: [0, Decimal('0'), None])
+
+    for row in rows:
+        created_at = row.get('created_at') or now
+        count = row.get('count', 1)
+        amount = Decimal(str(row['amount']))
+        seen = created_at if count > 0 else None
+        for bucket in (goals[(row['goal_id'], row['transaction_type'], created_at.strftime('%Y-%m'), row['user_id'])],
+                       users[row['user_id']]):
+            bucket[0] += count
+            bucket[1] += amount
+            if seen and (bucket[2] is None or seen > bucket[2]):
+                bucket[2] = seen
+
+    if not goals:
+        return
+
+    stmt = dialect_insert(GoalStats).values([
+        {'goal_id': goal_id, 'transaction_type': tx_type, 'month': month, 'user_id': user_id,
+         'tx_count': count, 'amount_total': amount, 'last_activity_at': last}
+        for (goal_id, tx_type, month, user_id), (count, amount, last) in goals.items()
+    ])
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=['goal_id', 'transaction_type', 'month'],
+        set_={
+            'tx_count': GoalStats.tx_count + stmt.excluded.tx_count,
+            'amount_total': GoalStats.amount_total + stmt.excluded.amount_total,
+            'last_activity_at': func.coalesce(stmt.excluded.last_activity_at, GoalStats.last_activity_at),
+        },
+    ))
+
+    stmt = dialect_insert(UserStats).values([
+        {'user_id': user_id, 'tx_count': count, 'total_saved': amount, 'last_activity_at': last}
+        for user_id, (count, amount, last) in users.items()
+    ])
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=['user_id'],
+        set_={
+            'tx_count': UserStats.tx_count + stmt.excluded.tx_count,
+            'total_saved': UserStats.total_saved + stmt.excluded.total_saved,
+            'last_activity_at': func.coalesce(stmt.excluded.last_activity_at, UserStats.last_activity_at),
+        },
+    ))
+
+
+def rebuild_stats():
+    """
+    Recompute goal_stats and user_stats from the transactions table plus the per-month totals
+    of archived transactions (see partitions.py). The caller commits.
+    """
+    db.session.execute(delete(GoalStats))
+    db.session.execute(delete(UserStats))
+
+    month = month_bucket(Transaction.created_at)
+    live = (select(Transaction.goal_id, Transaction.transaction_type, month.label('month'),
+                   func.min(Transaction.user_id).label('user_id'), func.count(Transaction.id).label('tx_count'),
+                   func.sum(Transaction.amount).label('amount_total'),
+                   func.max(Transaction.created_at).label('last_activity_at'))
+            .group_by(Transaction.goal_id, Transaction.transaction_type, month))
+    archived = select(TransactionArchive.goal_id, TransactionArchive.transaction_type, TransactionArchive.month,
+                      TransactionArchive.user_id, TransactionArchive.tx_count, TransactionArchive.amount_total,
+                      TransactionArchive.last_activity_at)
+    # A month can have both: rows backdated into it after it was archived
+    rows = union_all(live, archived).subquery()
+    db.session.execute(insert(GoalStats).from_select(
+        ['goal_id', 'transaction_type', 'month', 'user_id', 'tx_count', 'amount_total', 'last_activity_at'],
+        select(rows.c.goal_id, rows.c.transaction_type, rows.c.month, func.min(rows.c.user_id),
+               func.sum(rows.c.tx_count), func.sum(rows.c.amount_total), func.max(rows.c.last_activity_at))
+        .group_by(rows.c.goal_id, rows.c.transaction_type, rows.c.month)
+    ))
+    db.session.execute(insert(UserStats).from_select(
+        ['user_id', 'tx_count', 'total_saved', 'last_activity_at'],
+        select(GoalStats.user_id, func.sum(GoalStats.tx_count), func.sum(GoalStats.amount_total),
+               func.max(GoalStats.last_activity_at))
+        .group_by(GoalStats.user_id)
+    ))
+
+
+def user_summary(user_id, goal_id=None):
+    """Totals, per-type and per-month breakdowns for a user (or one of their goals)."""
+    filters = [GoalStats.user_id == user_id]
+    if goal_id is not None:
+        filters.append(GoalStats.goal_id == goal_id)
+
+    by_type = db.session.execute(
+        select(GoalStats.transaction_type, func.sum(GoalStats.tx_count), func.sum(GoalStats.amount_total))
+        .where(*filters).group_by(GoalStats.transaction_type)
+    ).all()
+    monthly = db.session.execute(
+        select(GoalStats.month, func.sum(GoalStats.tx_count), func.sum(GoalStats.amount_total))
+        .where(*filters).group_by(GoalStats.month).order_by(GoalStats.month)
+    ).all()
+
+    if goal_id is None:
+        totals = db.session.get(UserStats, user_id)
+        summary = totals.to_dict() if totals else UserStats(tx_count=0, total_saved=0).to_dict()
+    else:
+        count, amount, last = db.session.execute(
+            select(func.sum(GoalStats.tx_count), func.sum(GoalStats.amount_total),
+                   func.max(GoalStats.last_activity_at)).where(*filters)
+        ).one()
+        summary = {
+            'tx_count': int(count or 0),
+            'total_saved': float(amount or 0),
+            'last_activity_at': last.isoformat() if last else None
+        }
+
+    summary['by_type'] = {t: {'count': int(c), 'amount': float(a or 0)} for t, c, a in by_type}
+    summary['monthly'] = [{'month': m, 'count': int(c), 'amount': float(a or 0)} for m, c, a in monthly]
+    return summary
@@ -0,0 +1,88 @@
+import os
+import shutil
+import sys
+import tempfile
+from decimal import Decimal
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Set before config.py is imported: tests always get a throwaway SQLite database (never
+# DATABASE_URL from the environment, since every test drops and recreates the tables),
+# no background threads and a cheap password hash.
+DB_DIR = tempfile.mkdtemp(prefix='milestone-tests-')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(DB_DIR, 'test.db')
+os.environ['PUBSUB_BACKEND'] = 'local'
+os.environ['CACHE_BACKEND'] = 'memory'
+os.environ['ACTIVITY_LOG_ENABLED'] = 'false'
+os.environ['SESSION_SWEEPER_ENABLED'] = 'false'
+os.environ['RECURRING_SCHEDULER_ENABLED'] = 'false'
+os.environ['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(DB_DIR, ignore_errors=True)
+
+
+@pytest.fixture(scope='session')
+def _app():
+    from app import create_app
+    app = create_app()
+    app.config['TESTING'] = True
+    app.config['UPLOAD_FOLDER'] = os.path.join(DB_DIR, 'uploads')
+    os.makedirs(app.config['UPLOAD_FOLDER'])
+    return app
+
+
+@pytest.fixture
+def app(_app):
+    """The app inside an app context, with empty tables and empty per-process caches."""
+    from extensions import db, cache
+    from sessions import session_store
+    from triggers import trigger_index
+    with _app.app_context():
+        db.drop_all()
+        db.create_all()
+        cache.clear()
+        session_store.entries.clear()
+        trigger_index.entries.clear()
+        yield _app
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def user(app):
+    from auth import hash_password
+    from extensions import db
+    from models import User
+    user = User(username='saver', email='saver@example.com', password_hash=hash_password('pass'))
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def goal(user):
+    from extensions import db
+    from models import Goal
+    goal = Goal(user_id=user.id, name='Bike', target_amount=Decimal('500.00'), current_amount=Decimal('0.00'))
+    db.session.add(goal)
+    db.session.commit()
+    return goal
+
+
+def login(client, username='saver', password='pass'):
+    return client.post('/login', data={'username': username, 'password': password})
+
+
+@pytest.fixture
+def logged_in(client, user):
+    assert login(client).status_code == 302
+    return client
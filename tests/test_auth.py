@@ -0,0 +1,29 @@
+import pytest
+from sqlalchemy import select
+from werkzeug.security import generate_password_hash
+
+from auth import needs_rehash
+from conftest import login
+from extensions import db
+from models import User
+
+
+@pytest.mark.parametrize('method', ['scrypt', 'pbkdf2', 'pbkdf2:sha256', 'pbkdf2:sha256:1000'])
+def test_hashes_made_with_the_configured_method_are_kept(app, monkeypatch, method):
+    monkeypatch.setitem(app.config, 'PASSWORD_HASH_METHOD', method)
+    assert not needs_rehash(generate_password_hash('pass', method=method))
+    assert needs_rehash(generate_password_hash('pass', method='pbkdf2:sha256:2000'))
+
+
+def test_login_rehashes_only_outdated_hashes(app, client, user, monkeypatch):
+    stored = user.password_hash
+    assert login(client).status_code == 302
+    assert db.session.scalar(select(User.password_hash)) == stored
+
+    monkeypatch.setitem(app.config, 'PASSWORD_HASH_METHOD', 'pbkdf2:sha256')
+    assert login(client).status_code == 302
+    upgraded = db.session.scalar(select(User.password_hash))
+    assert upgraded.startswith('pbkdf2:sha256:600000$')
+
+    assert login(client).status_code == 302
+    assert db.session.scalar(select(User.password_hash)) == upgraded
@@ -0,0 +1,26 @@
+def test_unchanged_goals_are_answered_with_304(logged_in, goal):
+    first = logged_in.get('/api/goals')
+    assert first.status_code == 200
+    assert first.headers['ETag']
+
+    again = logged_in.get('/api/goals', headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304
+    assert again.data == b''
+
+
+def test_contribution_changes_the_etag(logged_in, goal):
+    etag = logged_in.get('/api/goals').headers['ETag']
+    assert logged_in.post(f'/api/goals/{goal.id}/contribute', json={'amount': 25}).status_code == 201
+
+    response = logged_in.get('/api/goals', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert response.get_json()[0]['current_amount'] == 25.0
+
+
+def test_goal_etag_ignores_other_goals(logged_in, goal):
+    other = logged_in.post('/api/goals/create', json={'name': 'Trip', 'target_amount': 100}).get_json()
+    etag = logged_in.get(f'/api/goals/{goal.id}').headers['ETag']
+    logged_in.post(f"/api/goals/{other['goal_id']}/contribute", json={'amount': 5})
+
+    assert logged_in.get(f'/api/goals/{goal.id}', headers={'If-None-Match': etag}).status_code == 304
@@ -0,0 +1,23 @@
+def test_goal_overview_pages_back_through_the_full_history(logged_in, goal, app):
+    for amount in range(1, 26):
+        assert logged_in.post(f'/api/goals/{goal.id}/contribute', json={'amount': amount}).status_code == 201
+
+    overview = logged_in.get(f'/api/goals/{goal.id}/overview').get_json()
+    shown = [t['amount'] for t in overview['recent_transactions']]
+    assert len(shown) == app.config['DASHBOARD_RECENT_TRANSACTIONS']
+
+    cursor = overview['older_transactions_cursor']
+    while cursor:
+        page = logged_in.get(f'/api/goals/{goal.id}/transactions?limit=7&before={cursor}')
+        assert page.status_code == 200
+        shown += [t['amount'] for t in reversed(page.get_json())]
+        cursor = page.headers.get('X-Prev-Cursor')
+
+    assert shown == [float(amount) for amount in range(25, 0, -1)]
+
+
+def test_short_goal_history_has_no_older_cursor(logged_in, goal):
+    logged_in.post(f'/api/goals/{goal.id}/contribute', json={'amount': 5})
+    overview = logged_in.get(f'/api/goals/{goal.id}/overview').get_json()
+    assert len(overview['recent_transactions']) == 1
+    assert overview['older_transactions_cursor'] is None
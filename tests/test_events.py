@@ -0,0 +1,24 @@
+import os
+import runpy
+
+from conftest import ROOT
+from events import live_events
+
+
+def test_default_stream_cap_leaves_worker_threads_free(app):
+    settings = runpy.run_path(os.path.join(ROOT, 'gunicorn.conf.py'))
+    assert settings['worker_class'] == 'gthread'
+    assert settings['threads'] == app.config['WEB_THREADS']
+    assert 0 < app.config['EVENTS_MAX_STREAMS'] < app.config['WEB_THREADS']
+
+
+def test_streams_over_the_cap_get_503(logged_in, user, monkeypatch):
+    monkeypatch.setattr(live_events, 'max_streams', 1)
+    stream = live_events.open(user.id, None)
+    try:
+        response = logged_in.get('/api/events')
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '30'
+        assert logged_in.get('/api/goals').status_code == 200
+    finally:
+        live_events.close(stream)
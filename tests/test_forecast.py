@@ -0,0 +1,37 @@
+import logging
+import sys
+from decimal import Decimal
+
+import pytest
+
+import forecast
+from extensions import db
+from models import SavingsRule
+
+
+@pytest.fixture
+def weekly_rule(goal):
+    db.session.add(SavingsRule(user_id=goal.user_id, goal_id=goal.id, rule_type='recurring', rule_name='Weekly',
+                               amount=Decimal('25.00'), frequency='weekly', is_active=True))
+    db.session.commit()
+
+
+def test_forecast_without_numpy_is_flagged_degraded(logged_in, weekly_rule, monkeypatch, caplog):
+    monkeypatch.setitem(sys.modules, 'numpy', None)  # import numpy raises ImportError
+    monkeypatch.setattr(forecast, '_fallback_logged', False)
+
+    with caplog.at_level(logging.WARNING):
+        goals = logged_in.get('/api/goals/forecast').get_json()['goals']
+        logged_in.get('/api/goals/forecast')
+
+    assert goals[0]['method'] == 'normal'
+    assert goals[0]['degraded'] is True
+    assert goals[0]['expected_date'] is not None
+    assert sum('NumPy is not installed' in r.getMessage() for r in caplog.records) == 1
+
+
+def test_monte_carlo_forecast(logged_in, weekly_rule):
+    pytest.importorskip('numpy')
+    goal = logged_in.get('/api/goals/forecast').get_json()['goals'][0]
+    assert goal['method'] == 'monte_carlo'
+    assert goal['degraded'] is False
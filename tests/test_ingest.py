@@ -0,0 +1,39 @@
+from sqlalchemy import func, select
+
+from extensions import db
+from models import Transaction
+
+
+def test_bad_fields_reject_only_their_item(logged_in, goal):
+    items = [
+        {'goal_id': goal.id, 'amount': 5},
+        {'goal_id': goal.id, 'amount': 5, 'description': {'a': 1}},
+        {'goal_id': goal.id, 'amount': 5, 'metadata': [1, 2]},
+        {'goal_id': goal.id, 'amount': 5, 'transaction_type': 'x' * 51},
+        {'goal_id': goal.id, 'amount': 5, 'investment_type': 7},
+        {'goal_id': goal.id, 'amount': 5, 'expense_category': 'c' * 51},
+        {'goal_id': goal.id, 'amount': 'NaN'},
+        {'goal_id': goal.id, 'amount': 10 ** 9},
+        {'goal_id': goal.id, 'amount': 2.5, 'description': 'ok', 'metadata': {'source': 'bank'}},
+    ]
+    response = logged_in.post('/api/contributions/bulk', json=items)
+    assert response.status_code == 201
+
+    summary = response.get_json()
+    assert (summary['accepted'], summary['rejected']) == (2, 7)
+    assert [r['status'] for r in summary['results']] == ['ok'] + ['error'] * 7 + ['ok']
+    assert db.session.scalar(select(func.sum(Transaction.amount))) == 7.5
+
+
+def test_non_string_category_rejects_only_its_expense(logged_in, goal):
+    items = [
+        {'goal_id': goal.id, 'amount': 5.5, 'category': 123},
+        {'goal_id': goal.id, 'amount': 5.5, 'expense_category': ['coffee']},
+        {'goal_id': goal.id, 'amount': 5.5, 'category': 'Coffee', 'description': 'Latte'},
+    ]
+    response = logged_in.post('/api/expenses', json=items)
+    assert response.status_code == 201
+
+    results = response.get_json()['results']
+    assert [(r['index'], r['status']) for r in results] == [(0, 'error'), (1, 'error'), (2, 'ok')]
+    assert db.session.scalar(select(Transaction.expense_category)) == 'Coffee'
@@ -0,0 +1,25 @@
+import pytest
+
+PATHS = ['/debug/users', '/debug/activity-log', '/debug/cache', '/debug/sessions', '/debug/events', '/metrics']
+
+
+@pytest.mark.parametrize('path', PATHS)
+def test_hidden_without_token(client, path):
+    assert client.get(path).status_code == 404
+
+
+@pytest.mark.parametrize('path', PATHS)
+def test_served_with_token(client, monkeypatch, path):
+    monkeypatch.setitem(client.application.config, 'INTERNAL_ENDPOINTS_TOKEN', 'sesame')
+    assert client.get(path, headers={'Authorization': 'Bearer nope'}).status_code == 404
+    assert client.get(path, headers={'Authorization': 'Bearer sesame'}).status_code == 200
+
+
+def test_logged_in_users_are_not_enough(logged_in):
+    assert logged_in.get('/debug/users').status_code == 404
+
+
+def test_served_in_debug_mode(client, monkeypatch):
+    monkeypatch.setattr(client.application, 'debug', True)
+    assert client.get('/debug/sessions').status_code == 200
+    assert client.get('/metrics').status_code == 200
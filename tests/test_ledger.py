@@ -0,0 +1,63 @@
+import threading
+from decimal import Decimal
+
+from sqlalchemy import func, select
+
+from conftest import login
+from extensions import db
+from models import Goal, Transaction
+
+
+def balances(goal_id):
+    db.session.expire_all()
+    balance = db.session.scalar(select(Goal.current_amount).where(Goal.id == goal_id))
+    ledger = db.session.scalar(select(func.sum(Transaction.amount)).where(Transaction.goal_id == goal_id))
+    return balance, Decimal(str(ledger or 0)).quantize(Decimal('0.01'))
+
+
+def test_concurrent_contributions_are_not_lost(app, user, goal):
+    goal_id = goal.id
+    clients = [app.test_client() for _ in range(4)]
+    for client in clients:
+        login(client)
+    statuses = []
+
+    def contribute(client):
+        for _ in range(10):
+            statuses.append(client.post(f'/api/goals/{goal_id}/contribute', json={'amount': '1.10'}).status_code)
+
+    threads = [threading.Thread(target=contribute, args=(c,)) for c in clients]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert statuses == [201] * 40
+    assert balances(goal_id) == (Decimal('44.00'), Decimal('44.00'))
+
+
+def test_undo_reverts_once(logged_in, goal):
+    logged_in.post(f'/api/goals/{goal.id}/contribute', json={'amount': 30})
+    logged_in.post(f'/api/goals/{goal.id}/contribute', json={'amount': 12.5})
+    tx_id = db.session.scalar(select(Transaction.id).where(Transaction.amount == Decimal('12.50')))
+
+    assert logged_in.post(f'/api/transactions/{tx_id}/undo').status_code == 200
+    assert logged_in.post(f'/api/transactions/{tx_id}/undo').status_code == 400
+    assert balances(goal.id) == (Decimal('30.00'), Decimal('30.00'))
+
+
+def test_undo_of_another_users_transaction_is_not_found(logged_in, goal):
+    other = Goal(user_id=goal.user_id + 1, name='Other', target_amount=100)
+    db.session.add(other)
+    db.session.flush()
+    tx = Transaction(user_id=goal.user_id + 1, goal_id=other.id, amount=Decimal('5.00'),
+                     transaction_type='manual', is_undoable=True)
+    db.session.add(tx)
+    db.session.commit()
+
+    assert logged_in.post(f'/api/transactions/{tx.id}/undo').status_code == 404
+
+
+def test_contribution_must_be_positive(logged_in, goal):
+    assert logged_in.post(f'/api/goals/{goal.id}/contribute', json={'amount': -5}).status_code == 400
+    assert balances(goal.id) == (Decimal('0.00'), Decimal('0.00'))
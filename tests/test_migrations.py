@@ -0,0 +1,32 @@
+import os
+import sqlite3
+import subprocess
+import sys
+
+from conftest import ROOT
+
+
+def flask(db_path, *args):
+    env = dict(os.environ, DATABASE_URL='sqlite:///' + db_path)
+    return subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', *args], cwd=ROOT, env=env,
+                          capture_output=True, text=True, check=True)
+
+
+def tables(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return {name for name, in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+def test_migrations_downgrade_and_upgrade(tmp_path):
+    db_path = str(tmp_path / 'migrations.db')
+    flask(db_path, 'init-db')
+    created = tables(db_path)
+
+    flask(db_path, 'db', 'downgrade', 'base')
+    remaining = tables(db_path)
+    assert not {'recurring_runs', 'goal_stats', 'user_stats', 'job_watermarks'} & remaining
+    assert {'users', 'goals', 'transactions', 'savings_rules'} <= remaining
+
+    flask(db_path, 'db', 'upgrade')
+    assert tables(db_path) == created
+    assert 'head' in flask(db_path, 'db', 'current').stdout
@@ -0,0 +1,74 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func, select, update
+
+from extensions import db
+from models import Goal, RecurringRun, SavingsRule, Transaction
+from recurring import run_recurring_rules
+
+
+@pytest.fixture
+def rule(goal):
+    rule = SavingsRule(user_id=goal.user_id, goal_id=goal.id, rule_type='recurring', rule_name='Weekly',
+                       amount=Decimal('10.00'), frequency='weekly', is_active=True)
+    db.session.add(rule)
+    db.session.commit()
+    return rule
+
+
+def balance(goal_id):
+    return db.session.scalar(select(Goal.current_amount).where(Goal.id == goal_id))
+
+
+def recurring_count(goal_id):
+    return db.session.scalar(select(func.count()).where(Transaction.goal_id == goal_id,
+                                                         Transaction.transaction_type == 'recurring'))
+
+
+def test_rule_runs_once_per_period(rule):
+    now = datetime(2026, 3, 4, 12, 0)
+    assert run_recurring_rules(now=now)['executed'] == 1
+    assert run_recurring_rules(now=now)['executed'] == 0
+    assert balance(rule.goal_id) == Decimal('10.00')
+    assert recurring_count(rule.goal_id) == 1
+
+
+def test_retried_run_is_absorbed_by_the_run_ledger(rule):
+    now = datetime(2026, 3, 4, 12, 0)
+    run_recurring_rules(now=now)
+    # A run that read the rule before last_executed moved (crash before commit, or a
+    # concurrent runner) finds the period already claimed
+    db.session.execute(update(SavingsRule).where(SavingsRule.id == rule.id).values(last_executed=None))
+    db.session.commit()
+
+    summary = run_recurring_rules(now=now)
+    assert summary['executed'] == 0
+    assert summary['already_run'] == 1
+    assert balance(rule.goal_id) == Decimal('10.00')
+    assert recurring_count(rule.goal_id) == 1
+    assert db.session.scalar(select(func.count()).select_from(RecurringRun)) == 1
+
+
+def test_rule_runs_again_next_period(rule):
+    run_recurring_rules(now=datetime(2026, 3, 4, 12, 0))
+    assert run_recurring_rules(now=datetime(2026, 3, 11, 12, 0))['executed'] == 1
+    assert balance(rule.goal_id) == Decimal('20.00')
+
+
+def test_monthly_rule_waits_for_the_next_calendar_month(rule):
+    db.session.execute(update(SavingsRule).where(SavingsRule.id == rule.id).values(frequency='monthly'))
+    db.session.commit()
+    run_recurring_rules(now=datetime(2026, 1, 1, 9, 0))
+
+    # 28+ days later but still January: not due, rather than due and then refused by the ledger
+    for day in (29, 30, 31):
+        summary = run_recurring_rules(now=datetime(2026, 1, day, 9, 0))
+        assert (summary['executed'], summary['already_run']) == (0, 0)
+
+    assert run_recurring_rules(now=datetime(2026, 2, 1, 9, 0))['executed'] == 1
+    assert run_recurring_rules(now=datetime(2026, 2, 27, 9, 0))['executed'] == 0
+    # Last run Feb 1: March 1 is exactly 28 days on, and a new month
+    assert run_recurring_rules(now=datetime(2026, 3, 1, 9, 0))['executed'] == 1
+    assert balance(rule.goal_id) == Decimal('30.00')
@@ -0,0 +1,45 @@
+from decimal import Decimal
+
+import pytest
+
+from roundup import compute_round_ups, round_up_cents, to_cents
+
+CONFIG = {
+    'ROUND_UP_MODE': 'to_next_dollar',
+    'FIXED_ROUND_UP_STEP': Decimal('0.50'),
+    'MIN_ROUND_UP_FLOOR': Decimal('0.00'),
+    'PACE_BONUS': {'Conservative': Decimal('0.50'), 'Moderate': Decimal('1.00')},
+}
+
+
+def test_to_next_dollar():
+    assert round_up_cents([1234, 500, 1, 99], 'to_next_dollar', Decimal('0.50'), Decimal('0.00')) == [66, 0, 99, 1]
+
+
+def test_floor_applies_to_small_round_ups():
+    assert round_up_cents([1234, 500, 1], 'to_next_dollar', Decimal('0.50'), Decimal('0.25')) == [66, 25, 99]
+
+
+def test_fixed_step():
+    assert round_up_cents([1234, 500], 'fixed', Decimal('0.50'), Decimal('0.00')) == [50, 50]
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        round_up_cents([100], 'nearest', Decimal('0.50'), Decimal('0.00'))
+
+
+def test_to_cents_is_exact():
+    assert to_cents(Decimal('0.1') + Decimal('0.2')) == 30
+    assert to_cents('19.99') == 1999
+    assert to_cents(4.35) == 435
+
+
+def test_totals_do_not_drift():
+    results = compute_round_ups([Decimal('3.30')] * 1000, ['Moderate'] * 1000, CONFIG)
+    assert results[0] == (Decimal('0.70'), Decimal('1.00'), Decimal('1.70'))
+    assert sum(total for _, _, total in results) == Decimal('1700.00')
+
+
+def test_unknown_pace_gets_no_bonus():
+    assert compute_round_ups([Decimal('2.75')], [None], CONFIG) == [(Decimal('0.25'), Decimal('0.00'), Decimal('0.25'))]
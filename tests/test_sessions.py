@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update
+
+from conftest import login
+from extensions import db
+from models import UserSession
+from sessions import session_store
+
+
+def test_login_creates_a_server_side_session(client, user):
+    assert client.get('/api/goals').status_code == 401
+    assert login(client).status_code == 302
+    assert client.get('/api/goals').status_code == 200
+    assert db.session.scalar(select(UserSession.user_id)) == user.id
+
+
+def test_wrong_password(client, user):
+    assert login(client, password='nope').status_code == 401
+    assert client.get('/api/goals').status_code == 401
+
+
+def test_logout_revokes_the_session(logged_in):
+    logged_in.get('/logout')
+    assert logged_in.get('/api/goals').status_code == 401
+    assert db.session.scalar(select(UserSession.id)) is None
+
+
+def test_revoke_user_ends_cached_sessions(logged_in, user):
+    assert logged_in.get('/api/goals').status_code == 200  # now cached in-process
+    session_store.revoke_user(user.id)
+    assert logged_in.get('/api/goals').status_code == 401
+
+
+def test_expired_session_is_rejected(logged_in):
+    db.session.execute(update(UserSession).values(expires_at=datetime.utcnow() - timedelta(seconds=1)))
+    db.session.commit()
+    session_store.entries.clear()
+    assert logged_in.get('/api/goals').status_code == 401
+
+
+def test_stolen_cookie_for_another_user_is_rejected(logged_in, user):
+    with logged_in.session_transaction() as s:
+        s['user_id'] = user.id + 1
+    assert logged_in.get('/api/goals').status_code == 401
+
+
+def test_register_logs_the_user_in(client):
+    response = client.post('/register', data={'username': 'new', 'email': 'New@example.com',
+                                              'password': 'pw', 'confirm_password': 'pw'})
+    assert response.status_code == 302
+    assert client.get('/api/goals').status_code == 200
+
+
+def test_register_duplicate_username(client, user):
+    response = client.post('/register', data={'username': 'saver', 'email': 'other@example.com',
+                                              'password': 'pw', 'confirm_password': 'pw'})
+    assert response.status_code == 400
+    assert client.get('/api/goals').status_code == 401
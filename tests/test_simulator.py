@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import insert
+
+from extensions import db
+from models import SavingsRule, Transaction
+
+
+def create_rule(client, goal, **fields):
+    body = {'goal_id': goal.id, 'rule_type': 'habit_reward', 'rule_name': 'Gym', 'amount': 5} | fields
+    response = client.post('/api/rules/create', json=body)
+    assert response.status_code == 201
+    return response.get_json()['rule_id']
+
+
+def simulate(client, rule_id, **body):
+    response = client.post(f'/api/rules/{rule_id}/simulate', json=body)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def test_rules_sharing_a_name_keep_their_own_history(logged_in, goal):
+    first, second = create_rule(logged_in, goal), create_rule(logged_in, goal, amount=3)
+    for rule_id, times in ((first, 2), (second, 3)):
+        for _ in range(times):
+            assert logged_in.post(f'/api/habit/{rule_id}/log').status_code == 200
+
+    assert simulate(logged_in, first, amount=10)['rules'][0]['history'] == {
+        'transactions': 2, 'saved': 10.0, 'replayed': 2, 'replayed_saved': 20.0}
+    assert simulate(logged_in, second, amount=10)['rules'][0]['history']['saved'] == 9.0
+
+
+def test_renamed_rule_keeps_its_history(logged_in, goal):
+    rule_id = create_rule(logged_in, goal)
+    logged_in.post(f'/api/habit/{rule_id}/log')
+    assert logged_in.put(f'/api/rules/{rule_id}', json={'rule_name': 'Running'}).status_code == 200
+
+    assert simulate(logged_in, rule_id, amount=10)['rules'][0]['history']['saved'] == 5.0
+
+
+def test_untagged_history_is_matched_by_name_unless_ambiguous(logged_in, goal, user):
+    first = create_rule(logged_in, goal)
+    db.session.execute(insert(Transaction), [{
+        'user_id': user.id, 'goal_id': goal.id, 'amount': Decimal('5'), 'transaction_type': 'habit_reward',
+        'description': 'Gym', 'created_at': datetime.utcnow() - timedelta(days=1)}])
+    db.session.commit()
+    assert simulate(logged_in, first, amount=10)['rules'][0]['history']['saved'] == 5.0
+
+    create_rule(logged_in, goal)
+    response = logged_in.post(f'/api/rules/{first}/simulate', json={'amount': 10})
+    assert response.status_code == 400
+    assert "share the name 'Gym'" in response.get_json()['error']
+
+
+def test_pausing_a_recurring_rule_drops_its_schedule(logged_in, goal):
+    rule_id = create_rule(logged_in, goal, rule_type='recurring', rule_name='Weekly', amount=7, frequency='weekly')
+    result = simulate(logged_in, rule_id, is_active=False)['goals'][0]
+    assert result['current']['daily_rate'] == 1.0
+    assert result['proposed']['daily_rate'] == 0.0
+
+
+@pytest.mark.parametrize('body', [[1], 'text', 5])
+def test_non_object_bodies_are_rejected(logged_in, goal, body):
+    rule_id = create_rule(logged_in, goal)
+    assert logged_in.post('/api/rules/simulate', json=body).status_code == 400
+    assert logged_in.post(f'/api/rules/{rule_id}/simulate', json=body).status_code == 400
+
+
+def test_non_string_fields_are_rejected(logged_in, goal):
+    rule_id = create_rule(logged_in, goal, rule_type='guilty_pleasure_tax', trigger_category='coffee')
+    for field in ('trigger_category', 'frequency'):
+        response = logged_in.post(f'/api/rules/{rule_id}/simulate', json={field: [1]})
+        assert response.status_code == 400
+        assert response.get_json()['error'] == f"{field} must be a string"
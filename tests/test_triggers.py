@@ -0,0 +1,49 @@
+from decimal import Decimal
+
+import pytest
+
+from extensions import db
+from models import SavingsRule
+from triggers import trigger_index
+
+
+@pytest.fixture
+def tax_rule(goal):
+    rule = SavingsRule(user_id=goal.user_id, goal_id=goal.id, rule_type='guilty_pleasure_tax',
+                       rule_name='Coffee tax', amount=Decimal('2.00'), trigger_category='Coffee', is_active=True)
+    db.session.add(rule)
+    db.session.commit()
+    return rule
+
+
+def post_expense(client, goal_id, category):
+    return client.post('/api/expenses', json=[{'goal_id': goal_id, 'amount': '3.40', 'category': category}])
+
+
+def test_index_survives_ingest_batches(logged_in, goal, tax_rule):
+    assert post_expense(logged_in, goal.id, ' coffee ').status_code == 201
+    entry = trigger_index.entries[goal.user_id]
+    for _ in range(3):
+        assert post_expense(logged_in, goal.id, 'COFFEE').status_code == 201
+    # Each batch bumps the user's data_version, but the index is not rebuilt
+    assert trigger_index.entries[goal.user_id] is entry
+
+
+def test_rule_changes_reach_the_index(logged_in, goal, tax_rule):
+    assert [r.id for r in trigger_index.rules_for(goal.user_id)['coffee']] == [tax_rule.id]
+
+    logged_in.put(f'/api/rules/{tax_rule.id}', json={'trigger_category': 'Snacks'})
+    index = trigger_index.rules_for(goal.user_id)
+    assert 'coffee' not in index
+    assert [r.id for r in index['snacks']] == [tax_rule.id]
+
+    logged_in.delete(f'/api/goals/{goal.id}/delete')
+    assert trigger_index.rules_for(goal.user_id) == {}
+
+
+def test_invalidation_is_broadcast(app, goal, tax_rule):
+    trigger_index.rules_for(goal.user_id)
+    assert goal.user_id in trigger_index.entries
+    # What another worker's invalidate() delivers through the broker
+    app.extensions['pubsub'].publish('trigger_rules_changed', str(goal.user_id))
+    assert goal.user_id not in trigger_index.entries
@@ -0,0 +1,67 @@
+import base64
+import io
+
+import pytest
+
+from uploads import MULTIPART_OVERHEAD
+
+PNG = base64.b64decode('iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg==')
+
+
+def upload(client, data, name='goal.png'):
+    return client.post('/api/upload-goal-image', data={'file': (io.BytesIO(data), name)},
+                       content_type='multipart/form-data')
+
+
+def test_upload_is_stored_by_content_hash(logged_in):
+    first = upload(logged_in, PNG)
+    assert first.status_code == 201
+    assert upload(logged_in, PNG, 'again.png').get_json()['url'] == first.get_json()['url']
+
+
+def test_oversized_body_is_rejected_while_parsing(logged_in, app):
+    response = upload(logged_in, PNG + b'\0' * (app.config['UPLOAD_MAX_BYTES'] + MULTIPART_OVERHEAD))
+    assert response.status_code == 413
+    assert 'error' in response.get_json()
+
+
+def test_upload_may_exceed_the_default_body_limit(logged_in, app, monkeypatch):
+    monkeypatch.setitem(app.config, 'MAX_CONTENT_LENGTH', 1024)
+    assert upload(logged_in, PNG + b'\0' * 4096).status_code == 201
+
+
+def test_file_over_the_upload_limit(logged_in, app, monkeypatch):
+    # Within the request limit but over UPLOAD_MAX_BYTES: caught while streaming to disk
+    monkeypatch.setitem(app.config, 'UPLOAD_MAX_BYTES', 1024)
+    response = upload(logged_in, PNG + b'\0' * 2048)
+    assert response.status_code == 413
+
+
+def test_not_an_image(logged_in):
+    assert upload(logged_in, b'GIF89a but not really', 'goal.txt').status_code == 400
+
+
+def test_bulk_bodies_have_their_own_limit(logged_in, goal, app, monkeypatch):
+    items = [{'goal_id': goal.id, 'amount': 1, 'description': 'x' * 100}] * 20
+    monkeypatch.setitem(app.config, 'MAX_CONTENT_LENGTH', 1024)
+    assert logged_in.post('/api/contributions/bulk', json=items).status_code == 201
+    assert logged_in.post('/api/goals/create', json={'name': 'x' * 2048, 'target_amount': 1}).status_code == 413
+
+    monkeypatch.setitem(app.config, 'BULK_MAX_BYTES', 1024)
+    assert logged_in.post('/api/contributions/bulk', json=items).status_code == 413
+    assert logged_in.post('/api/expenses', json=items).status_code == 413
+
+
+def test_thumbnails_are_rendered_at_each_width(logged_in, app):
+    Image = pytest.importorskip('PIL.Image')
+    buffer = io.BytesIO()
+    Image.new('RGB', (2000, 1000), 'teal').save(buffer, format='JPEG')
+
+    response = upload(logged_in, buffer.getvalue(), 'wide.jpg')
+    assert response.status_code == 201
+    thumbnails = response.get_json()['thumbnails']
+    assert sorted(thumbnails) == sorted(str(size) for size in app.config['UPLOAD_THUMBNAIL_SIZES'])
+    for size, url in thumbnails.items():
+        with Image.open(io.BytesIO(logged_in.get(url).data)) as thumb:
+            assert thumb.size == (int(size), int(size) // 2)
+            assert thumb.format == 'JPEG'
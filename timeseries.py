@@ -0,0 +1,187 @@
+from datetime import datetime, timedelta
+from flask import current_app, request
+from sqlalchemy import func, literal_column, select
+from extensions import db
+from models import GoalStats, Transaction, TransactionArchive
+
+BUCKETS = ('hour', 'day', 'week', 'month')
+SQLITE_BUCKETS = {
+    'hour': lambda column: func.strftime('%Y-%m-%d %H:00:00', column),
+    'day': lambda column: func.date(column),
+    'week': lambda column: func.date(column, 'weekday 0', '-6 days'),  # Monday, like date_trunc
+    'month': lambda column: func.strftime('%Y-%m-01', column),
+}
+
+
+def time_bucket(column, unit):
+    """SQL expression truncating a timestamp column to the start of its hour/day/week/month."""
+    if db.engine.dialect.name == 'postgresql':
+        # Unit inlined (it is one of BUCKETS) so GROUP BY/ORDER BY match the select expression
+        return func.date_trunc(literal_column(f"'{unit}'"), column)
+    return SQLITE_BUCKETS[unit](column)
+
+
+def auto_bucket(since, until):
+    """Finest bucket that keeps a range to at most a few hundred buckets."""
+    if since is None:
+        return 'week'
+    span = until - since
+    if span <= timedelta(days=3):
+        return 'hour'
+    if span <= timedelta(days=180):
+        return 'day'
+    if span <= timedelta(days=1500):
+        return 'week'
+    return 'month'
+
+
+def series_args():
+    """
+    Read days/bucket/points from the query string.
+    Returns (since, until, bucket, points). Raises ValueError on bad input.
+    """
+    until = datetime.utcnow()
+    since = None
+    days = request.args.get('days')
+    if days is not None:
+        try:
+            days = int(days)
+        except ValueError:
+            raise ValueError("Invalid days")
+        if days < 1:
+            raise ValueError("Invalid days")
+        since = until - timedelta(days=days)
+
+    bucket = request.args.get('bucket') or 'auto'
+    if bucket == 'auto':
+        bucket = auto_bucket(since, until)
+    elif bucket not in BUCKETS:
+        raise ValueError(f"bucket must be one of: auto, {', '.join(BUCKETS)}")
+
+    max_points = current_app.config['TIMESERIES_MAX_POINTS']
+    try:
+        points = int(request.args.get('points', max_points))
+    except ValueError:
+        raise ValueError("Invalid points")
+    if points < 3:
+        raise ValueError("Invalid points")
+    return since, until, bucket, min(points, max_points)
+
+
+def lttb(points, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling of [(x, y, item), ...] sorted by x.
+
+    Keeps the first and last point and, from each of threshold - 2 equal slices in
+    between, the point forming the largest triangle with the previously kept point
+    and the next slice's average, so peaks and turns survive. Returns the kept items.
+    """
+    n = len(points)
+    if threshold >= n:
+        return [p[2] for p in points]
+
+    kept = [points[0][2]]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_start, next_end = end, min(int((i + 2) * every) + 1, n)
+        next_slice = points[next_start:next_end] or points[-1:]
+        avg_x = sum(p[0] for p in next_slice) / len(next_slice)
+        avg_y = sum(p[1] for p in next_slice) / len(next_slice)
+
+        ax, ay = points[a][0], points[a][1]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (points[j][1] - ay) - (ax - points[j][0]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        kept.append(points[best][2])
+        a = best
+    kept.append(points[-1][2])
+    return kept
+
+
+def as_datetime(value):
+    """Bucket values come back as datetimes (Postgres) or ISO strings (SQLite)."""
+    return value if isinstance(value, datetime) else datetime.fromisoformat(value)
+
+
+def balance_before(user_id, goal_id, since):
+    """
+    Sum of a goal's transactions before `since`: whole months from goal_stats, plus the
+    transactions from the start of since's month, so the cost doesn't grow with history.
+    """
+    month_start = since.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    months = db.session.scalar(
+        select(func.coalesce(func.sum(GoalStats.amount_total), 0))
+        .where(GoalStats.goal_id == goal_id, GoalStats.month < month_start.strftime('%Y-%m'))
+    )
+    partial = db.session.scalar(
+        select(func.coalesce(func.sum(Transaction.amount), 0))
+        .where(Transaction.user_id == user_id, Transaction.goal_id == goal_id,
+               Transaction.created_at >= month_start, Transaction.created_at < since)
+    )
+    return float(months) + float(partial)
+
+
+def archived_balance(goal_id, since, until):
+    """
+    Total of the goal's archived months (flask archive-transactions) from since's month up to
+    until. Those rows no longer have buckets, so they're carried in the opening balance.
+    """
+    filters = [TransactionArchive.goal_id == goal_id, TransactionArchive.month <= until.strftime('%Y-%m')]
+    if since is not None:
+        filters.append(TransactionArchive.month >= since.strftime('%Y-%m'))
+    return float(db.session.scalar(
+        select(func.coalesce(func.sum(TransactionArchive.amount_total), 0)).where(*filters)))
+
+
+def goal_timeseries(user_id, goal_id, since, until, bucket, points):
+    """
+    Running balance of a goal per bucket between since and until, plus per-type totals.
+
+    Buckets are summed in SQL and the running balance is a window SUM over them,
+    offset by the balance before `since`. Series longer than `points` are reduced
+    with LTTB, so the payload is bounded however long the history is.
+    """
+    filters = [Transaction.user_id == user_id, Transaction.goal_id == goal_id,
+               Transaction.created_at <= until]
+    if since is not None:
+        filters.append(Transaction.created_at >= since)
+
+    opening = balance_before(user_id, goal_id, since) if since is not None else 0.0
+    opening += archived_balance(goal_id, since, until)
+
+    period = time_bucket(Transaction.created_at, bucket)
+    rows = db.session.execute(
+        select(period, func.sum(Transaction.amount), func.count(Transaction.id),
+               func.sum(func.sum(Transaction.amount)).over(order_by=period))
+        .where(*filters).group_by(period).order_by(period)
+    ).all()
+
+    series = []
+    for start, amount, count, running in rows:
+        start = as_datetime(start)
+        point = {'t': start.isoformat(), 'amount': round(float(amount), 2), 'count': count,
+                 'balance': round(opening + float(running), 2)}
+        series.append((start.timestamp(), point['balance'], point))
+
+    by_type = db.session.execute(
+        select(Transaction.transaction_type, func.count(Transaction.id), func.sum(Transaction.amount))
+        .where(*filters).group_by(Transaction.transaction_type)
+    ).all()
+
+    return {
+        'goal_id': goal_id,
+        'bucket': bucket,
+        'since': since.isoformat() if since else None,
+        'until': until.isoformat(),
+        'opening_balance': round(opening, 2),
+        'closing_balance': series[-1][1] if series else round(opening, 2),
+        'buckets': len(series),
+        'downsampled': len(series) > points,
+        'points': lttb(series, points),
+        'by_type': {t: {'count': int(c), 'amount': float(a or 0)} for t, c, a in by_type},
+    }
@@ -0,0 +1,82 @@
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import select
+from extensions import db
+from models import SavingsRule
+
+RULES_CHANNEL = 'trigger_rules_changed'
+
+
+def normalize_category(name):
+    """Case- and whitespace-insensitive key for category matching."""
+    return ' '.join(name.split()).casefold() if name else None
+
+
+class TriggerIndex:
+    """
+    Per-user map of normalized category -> active guilty_pleasure_tax rules.
+
+    Built lazily on first use and kept for TRIGGER_INDEX_TTL seconds, so expense
+    batches normally cost no rule query (ingest bumps the user's data_version on
+    every batch, so that can't be the cache key). Rule and goal changes call
+    invalidate() after their commit, which is broadcast over pub/sub so every
+    worker drops the entry at once; the TTL bounds staleness if a message is lost.
+    """
+
+    def __init__(self, app=None):
+        self.entries = OrderedDict()  # user_id -> (cached_until, {category: [rule, ...]})
+        self.generation = 0  # invalidations seen; a build that raced one is not kept
+        self.lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = app.config['TRIGGER_INDEX_TTL']
+        self.max_users = app.config['TRIGGER_INDEX_MAX_USERS']
+        self.broker = app.extensions['pubsub']
+        self.broker.subscribe(RULES_CHANNEL, self._on_changed)
+        app.extensions['trigger_index'] = self
+
+    def rules_for(self, user_id):
+        self.broker.ensure_started()
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is not None and entry[0] > now:
+                self.entries.move_to_end(user_id)
+                return entry[1]
+            generation = self.generation
+
+        index = {}
+        rules = db.session.execute(
+            select(SavingsRule.id, SavingsRule.goal_id, SavingsRule.amount,
+                   SavingsRule.rule_name, SavingsRule.trigger_category)
+            .where(SavingsRule.user_id == user_id,
+                   SavingsRule.rule_type == 'guilty_pleasure_tax',
+                   SavingsRule.is_active.is_(True),
+                   SavingsRule.trigger_category.isnot(None))
+        ).all()
+        for rule in rules:
+            index.setdefault(normalize_category(rule.trigger_category), []).append(rule)
+
+        with self.lock:
+            if self.generation == generation:
+                self.entries[user_id] = (now + self.ttl, index)
+                self.entries.move_to_end(user_id)
+                while len(self.entries) > self.max_users:
+                    self.entries.popitem(last=False)
+        return index
+
+    def invalidate(self, user_id):
+        """Drop the user's index on every worker; call after the rule or goal change commits."""
+        self._on_changed(str(user_id))  # at once here, even if the broker delivers asynchronously
+        self.broker.publish(RULES_CHANNEL, str(user_id))
+
+    def _on_changed(self, payload):
+        with self.lock:
+            self.entries.pop(int(payload), None)
+            self.generation += 1
+
+
+trigger_index = TriggerIndex()
@@ -0,0 +1,175 @@
+import hashlib
+import os
+import tempfile
+import time
+from flask import Blueprint, current_app, send_from_directory, url_for
+from sqlalchemy import select
+from extensions import db
+from models import Goal
+
+bp = Blueprint('uploads', __name__)
+
+# Leading bytes -> extension; the stored type comes from the content, not the client's filename
+IMAGE_SIGNATURES = (
+    (b'\x89PNG\r\n\x1a\n', '.png'),
+    (b'\xff\xd8\xff', '.jpg'),
+    (b'GIF87a', '.gif'),
+    (b'GIF89a', '.gif'),
+)
+THUMBNAIL_DIR = 'thumbs'
+# Multipart headers and boundaries allowed on top of UPLOAD_MAX_BYTES in an upload request
+MULTIPART_OVERHEAD = 64 * 1024
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+def sniff_extension(head):
+    for signature, ext in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return ext
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return '.webp'
+    return None
+
+
+def thumbnail_name(name, size):
+    stem, ext = os.path.splitext(name)
+    return f"{THUMBNAIL_DIR}/{stem}-{size}{ext}"
+
+
+def make_thumbnails(path, name, folder, sizes):
+    """
+    Pre-render width-bounded variants of an image. Needs Pillow; skipped without it.
+
+    Sizes are rendered largest first, each by shrinking the previous variant in place, so
+    only one decoded copy is held (JPEGs are also decoded at a reduced scale).
+    """
+    try:
+        from PIL import Image  # in requirements.txt; thumbnails are skipped without it
+    except ImportError:
+        return []
+    os.makedirs(os.path.join(folder, THUMBNAIL_DIR), exist_ok=True)
+    targets = {size: os.path.join(folder, thumbnail_name(name, size)) for size in sizes}
+    missing = sorted((size for size, target in targets.items() if not os.path.exists(target)), reverse=True)
+    if missing:
+        with Image.open(path) as image:
+            image_format = image.format
+            width, height = image.size
+            scale = min(missing[0] / width, missing[0] * 4 / height, 1)
+            # JPEG: decode at a reduced scale that is still at least twice the largest variant
+            image.draft(None, (int(width * scale * 2), int(height * scale * 2)))
+            variant = image
+            for size in missing:
+                variant.thumbnail((size, size * 4))
+                if variant.mode not in ('RGB', 'RGBA', 'L', 'P'):
+                    variant = variant.convert('RGB')
+                variant.save(targets[size], format=image_format, optimize=True)
+    return list(sizes)
+
+
+def save_upload(stream, folder, max_bytes, chunk_size, thumbnail_sizes):
+    """
+    Copy an upload to disk in chunks while hashing it, then store it as <sha256><ext>.
+
+    Identical content maps to the same name, so duplicates are stored once (the
+    temp file is just dropped). Raises UploadTooLarge past max_bytes and
+    ValueError for content that isn't a supported image. Returns (name, thumbnail sizes).
+    """
+    digest = hashlib.sha256()
+    size = 0
+    ext = None
+    fd, tmp_path = tempfile.mkstemp(dir=folder, prefix='.upload-')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    break
+                if ext is None:
+                    ext = sniff_extension(chunk[:16])
+                    if ext is None:
+                        raise ValueError("Unsupported file type")
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"File exceeds {max_bytes} bytes")
+                digest.update(chunk)
+                out.write(chunk)
+        if ext is None:
+            raise ValueError("Empty file")
+
+        name = f"{digest.hexdigest()}{ext}"
+        path = os.path.join(folder, name)
+        if os.path.exists(path):
+            os.unlink(tmp_path)
+            os.utime(path)  # fresh mtime keeps it from orphan cleanup until the goal is saved
+        else:
+            os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+    try:
+        sizes = make_thumbnails(path, name, folder, thumbnail_sizes)
+    except Exception:
+        current_app.logger.exception("Thumbnail generation failed for %s", name)
+        sizes = []
+    return name, sizes
+
+
+def upload_url(name):
+    return url_for('uploads.serve_upload', filename=name)
+
+
+def thumbnail_url(image_url, size=None):
+    """Listing-size variant of a content-addressed upload URL, else the URL itself."""
+    if not image_url:
+        return image_url
+    prefix = url_for('uploads.serve_upload', filename='')
+    if not image_url.startswith(prefix):
+        return image_url
+    size = size or current_app.config['UPLOAD_THUMBNAIL_SIZES'][0]
+    name = thumbnail_name(image_url[len(prefix):], size)
+    if os.path.exists(os.path.join(current_app.config['UPLOAD_FOLDER'], name)):
+        return upload_url(name)
+    return image_url
+
+
+@bp.route('/uploads/<path:filename>')
+def serve_upload(filename):
+    # Names are content hashes, so a URL's bytes never change: cache forever
+    response = send_from_directory(current_app.config['UPLOAD_FOLDER'], filename, max_age=IMMUTABLE_MAX_AGE)
+    response.headers['Cache-Control'] = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+    return response
+
+
+def cleanup_orphans(folder, min_age_seconds, dry_run=False):
+    """
+    Delete uploads (and their thumbnails) that no Goal.image_url references. Files newer
+    than min_age_seconds are kept: images are uploaded before the goal that uses them is saved.
+    Returns the list of deleted (or, with dry_run, deletable) file names.
+    """
+    referenced = set()
+    for (image_url,) in db.session.execute(
+            select(Goal.image_url).where(Goal.image_url.isnot(None)).execution_options(yield_per=1000)):
+        referenced.add(os.path.basename(image_url.split('?', 1)[0]))
+
+    cutoff = time.time() - min_age_seconds
+    removed = []
+    for entry in os.scandir(folder):
+        if (not entry.is_file() or entry.name.startswith('.') or entry.name in referenced
+                or entry.stat().st_mtime > cutoff):
+            continue
+        stem, ext = os.path.splitext(entry.name)
+        paths = [entry.path]
+        thumbs = os.path.join(folder, THUMBNAIL_DIR)
+        if os.path.isdir(thumbs):
+            paths += [t.path for t in os.scandir(thumbs) if t.name.startswith(f"{stem}-") and t.name.endswith(ext)]
+        for path in paths:
+            if not dry_run:
+                os.unlink(path)
+            removed.append(os.path.relpath(path, folder))
+    return removed
@@ -0,0 +1,72 @@
+import hashlib
+from functools import wraps
+from flask import g, make_response, request, session
+from sqlalchemy import select, update
+from extensions import db
+from models import User, Goal
+
+
+def bump_versions(user_ids=(), goal_ids=()):
+    """Increment data versions in the current transaction. Accepts single ids or iterables."""
+    user_ids = [user_ids] if isinstance(user_ids, int) else [u for u in user_ids if u is not None]
+    goal_ids = [goal_ids] if isinstance(goal_ids, int) else [i for i in goal_ids if i is not None]
+    if user_ids:
+        db.session.execute(
+            update(User).where(User.id.in_(user_ids))
+            .values(data_version=User.data_version + 1)
+            .execution_options(synchronize_session=False)
+        )
+    if goal_ids:
+        db.session.execute(
+            update(Goal).where(Goal.id.in_(goal_ids))
+            .values(version=Goal.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+
+
+def user_version(user_id, **kwargs):
+    return db.session.scalar(select(User.data_version).where(User.id == user_id))
+
+
+def goal_version(user_id, goal_id, **kwargs):
+    """Version of one of the user's goals, or None if it isn't theirs."""
+    return db.session.scalar(select(Goal.version).where(Goal.id == goal_id, Goal.user_id == user_id))
+
+
+def resource_version():
+    """Version looked up for the current request by @conditional (None outside it)."""
+    return g.get('resource_version')
+
+
+def conditional(version_lookup):
+    """
+    Strong ETag / If-None-Match support for authenticated JSON reads.
+
+    version_lookup(user_id, **view_args) returns the version the response depends on.
+    A matching If-None-Match is answered with 304 before the view runs; otherwise
+    the view's 200 response is tagged. The version is kept in g so views can key
+    caches on it.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if 'user_id' not in session:
+                return f(*args, **kwargs)
+            version = version_lookup(session['user_id'], **kwargs)
+            if version is None:
+                return f(*args, **kwargs)
+
+            g.resource_version = version
+            raw = f"{session['user_id']}:{version}:{request.full_path}:{request.accept_mimetypes}"
+            etag = hashlib.sha1(raw.encode()).hexdigest()
+            if etag in request.if_none_match:
+                response = make_response('', 304)
+                response.set_etag(etag)
+                return response
+
+            response = make_response(f(*args, **kwargs))
+            if response.status_code == 200:
+                response.set_etag(etag)
+            return response
+        return decorated_function
+    return decorator
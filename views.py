@@ -0,0 +1,94 @@
+from flask import Blueprint, request, render_template, session, redirect, url_for
+from sqlalchemy.exc import IntegrityError
+from extensions import db
+from models import User, Goal
+from auth import authenticate, hash_password
+from sessions import session_store
+
+bp = Blueprint('views', __name__)
+
+
+@bp.route('/')
+def index():
+    if 'user_id' not in session:
+        return redirect(url_for('views.login'))
+    return render_template('index.html')
+
+
+@bp.route('/home')
+def home_landing():
+    """Public marketing homepage with animations and product overview."""
+    return render_template('home.html')
+
+@bp.route('/goals/<int:goal_id>')
+def goal_detail(goal_id):
+    if 'user_id' not in session:
+        return redirect(url_for('views.login'))
+
+    goal = Goal.query.filter_by(id=goal_id, user_id=session['user_id']).first_or_404()
+    return render_template('goal.html', goal_id=goal.id)
+
+# Authentication routes (simplified for demo)
+@bp.route('/register', methods=['GET', 'POST'])
+def register():
+    if request.method == 'POST':
+        username = request.form.get('username', '').strip()
+        email = request.form.get('email', '').strip().lower()
+        password = request.form.get('password')
+        confirm_password = request.form.get('confirm_password')
+
+        error = None
+
+        if not username or not email or not password:
+            error = 'All fields are required.'
+        elif password != confirm_password:
+            error = 'Passwords do not match.'
+
+        if error:
+            return f"<p>{error}</p>", 400
+
+        # Uniqueness of username and email is enforced by their unique indexes
+        user = User(
+            username=username,
+            email=email,
+            password_hash=hash_password(password)
+        )
+        db.session.add(user)
+        try:
+            db.session.flush()
+        except IntegrityError:
+            db.session.rollback()
+            return "<p>Username or email already in use.</p>", 400
+
+        token = session_store.create(user.id)
+        db.session.commit()
+        session['user_id'] = user.id
+        session['session_token'] = token
+        return redirect(url_for('views.index'))
+
+    return render_template('register.html')
+
+@bp.route('/login', methods=['GET', 'POST'])
+def login():
+    if request.method == 'POST':
+        username = request.form.get('username')
+        password = request.form.get('password')
+
+        user = authenticate(username, password)
+        if user:
+            # Also persists a transparent password re-hash, if one happened
+            token = session_store.create(user.id)
+            db.session.commit()
+            session['user_id'] = user.id
+            session['session_token'] = token
+            return redirect(url_for('views.index'))
+
+        return "Invalid credentials", 401
+    
+    return render_template('login.html')
+
+@bp.route('/logout')
+def logout():
+    session_store.revoke(session.pop('session_token', None))
+    session.pop('user_id', None)
+    return redirect(url_for('views.login'))